@@ -0,0 +1,271 @@
+"""Tempo de cada etapa das quatro conciliações (2.1 RMB, 4.1 Depreciação, 5.1 Almoxarifado e 6 Biblioteca).
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_conciliacao [--ugs N] [--linhas N] [--paginas-ocr N] [--repeticoes N]
+                                           [--saida resultado.json] [--comparar anterior.json]
+
+As entradas são sintéticas (benchmarks/sinteticos.py) e usam a MATRIZ.xlsx do repositório. Cada etapa
+guarda o menor tempo entre as repetições (sem --saida, o JSON vai para benchmarks/resultados/, fora do git); o cache de texto dos PDFs é esvaziado antes de cada repetição.
+Etapas: matriz, excel, pdf_texto (cache frio), pdf_texto_cache, ocr, cruzamento, relatorio e total.
+No RMB e no Almoxarifado, classificacao_texto/classificacao_escaneada são o tempo médio por página da
+pré-classificação texto x escaneada, registrado pelo próprio extrair_paginas nessas etapas (já contido em
+pdf_texto/ocr, fica fora do total; sem OCR, as páginas escaneadas não entram).
+Sem tesseract/pdftoppm no PATH, a etapa de OCR fica registrada em "indisponivel".
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import openpyxl
+import pandas as pd
+
+from benchmarks.sinteticos import (gerar_aba_almoxarifado, gerar_aba_depreciacao, gerar_aba_ug, gerar_pdf_imagem,
+                                   gerar_pdf_texto, gravar_planilha, linhas_almoxarifado, linhas_biblioteca,
+                                   linhas_depreciacao, linhas_rmb)
+from conciliador_core import almoxarifado, biblioteca, cache, depreciacao, matriz, pdf_texto, rmb
+from conciliador_core.matriz import CAMINHO_MATRIZ, extrair_id_unidade, obter_matriz
+from conciliador_core.relatorio import PDF_Report
+from conciliador_core.siafi import PlanilhaSiafi
+
+ETAPAS = ["matriz", "excel", "pdf_texto", "pdf_texto_cache", "classificacao_texto", "classificacao_escaneada", "ocr", "cruzamento", "relatorio"]
+FORA_DO_TOTAL = {"pdf_texto_cache", "classificacao_texto", "classificacao_escaneada"}
+IDX_MES, ANO = 2, 2026  # Março/2026
+LINHAS_POR_PAGINA_OCR = 45
+PASTA_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados")  # fora do git (.gitignore)
+
+def _ocr_disponivel():
+    faltando = [b for b in ("tesseract", "pdftoppm") if shutil.which(b) is None]
+    return None if not faltando else f"{' e '.join(faltando)} não encontrado(s) no PATH"
+
+def _repetir(chaves, n):
+    return [chaves[i % len(chaves)] for i in range(n)]
+
+# ==========================================
+# ENTRADAS SINTÉTICAS
+# ==========================================
+def gerar_entradas(pasta, n_ugs, n_linhas, paginas_ocr):
+    """Planilhas e PDFs das quatro conciliações gravados em `pasta`; devolve os caminhos/bytes de cada uma."""
+    m = obter_matriz(CAMINHO_MATRIZ)
+    chaves = sorted(set(m.chave_vinculo.values()))
+    grupos = sorted(set(m.grupo.values()))
+    contas_dep = [c for c in m.grupo if c != "123110402"]
+    ugs = [str(153001 + i) for i in range(n_ugs)]
+    linhas_ocr = paginas_ocr * LINHAS_POR_PAGINA_OCR
+    entradas = {}
+
+    caminho = os.path.join(pasta, "siafi_rmb.xlsx")
+    gravar_planilha(caminho, {ug: gerar_aba_ug(n_linhas, seed=i) for i, ug in enumerate(ugs)})
+    entradas["rmb"] = {
+        "planilha": caminho,
+        "pdfs": {ug: gerar_pdf_texto(linhas_rmb(_repetir(chaves, n_linhas), seed=i)) for i, ug in enumerate(ugs)},
+        "pdfs_ocr": {ug: gerar_pdf_imagem(linhas_rmb(_repetir(chaves, linhas_ocr), seed=i)[:linhas_ocr], LINHAS_POR_PAGINA_OCR) for i, ug in enumerate(ugs[:1])} if paginas_ocr else {},
+    }
+
+    caminho = os.path.join(pasta, "siafi_depreciacao.xlsx")
+    gravar_planilha(caminho, {ug: gerar_aba_depreciacao(_repetir(contas_dep, n_linhas), seed=i) for i, ug in enumerate(ugs)})
+    entradas["depreciacao"] = {
+        "planilha": caminho,
+        "pdfs": {f"{ug}.pdf": gerar_pdf_texto(linhas_depreciacao(_repetir(grupos, max(len(grupos), n_linhas // 6)), seed=i), paisagem=True, tamanho_fonte=6) for i, ug in enumerate(ugs)},
+    }
+
+    caminho = os.path.join(pasta, "siafi_almoxarifado.xlsx")
+    gravar_planilha(caminho, {f"UG {ug}": gerar_aba_almoxarifado(min(n_linhas, 99), seed=i) for i, ug in enumerate(ugs)})
+    entradas["almoxarifado"] = {
+        "planilha": caminho,
+        "pdfs": {ug: gerar_pdf_texto(linhas_almoxarifado(min(n_linhas, 99), seed=i)) for i, ug in enumerate(ugs)},
+        "pdfs_ocr": {ug: gerar_pdf_imagem(linhas_almoxarifado(linhas_ocr, seed=i)[:linhas_ocr], LINHAS_POR_PAGINA_OCR) for i, ug in enumerate(ugs[:1])} if paginas_ocr else {},
+    }
+
+    caminho = os.path.join(pasta, "biblioteca.xlsx")
+    gravar_planilha(caminho, {"Planilha1": pd.DataFrame([[ug, f"UNIDADE {ug}", 1000.0 * (i + 1), 100.0 * (i + 1)] for i, ug in enumerate(ugs)])})
+    pdfs = {}
+    for i, ug in enumerate(ugs):
+        pdfs[f"{ug}.pdf"] = gerar_pdf_texto(linhas_biblioteca(ANO, seed=i))
+        pdfs[f"{ug}d.pdf"] = gerar_pdf_texto(linhas_biblioteca(ANO, depreciacao=True, seed=i))
+    entradas["biblioteca"] = {"planilha": caminho, "pdfs": pdfs}
+    return entradas
+
+# ==========================================
+# ETAPAS DE CADA CONCILIAÇÃO
+# ==========================================
+def _medir(tempos, etapa, funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    tempos[etapa] = time.perf_counter() - inicio
+    return resultado
+
+def _renderizar(modulo, dados_ug, conciliacoes, *extra):
+    # Só a escrita do PDF final: as conciliações já vêm da etapa de cruzamento
+    pdf_out = PDF_Report(modulo.TITULO_RELATORIO)
+    pdf_out.add_page()
+    for (ug, info), conc in zip(dados_ug.items(), conciliacoes): modulo.escrever_ug(pdf_out, ug, info, conc, *extra)
+    return bytes(pdf_out.output())
+
+def _medir_classificacao(tempos, pdfs, perfil, **parametros):
+    # Média por página de classificar_pagina, separada entre as páginas de texto e as escaneadas, como ficou
+    # registrada pelo extrair_paginas das etapas pdf_texto/ocr (PDFs que não chegaram ao cache ficam de fora)
+    por_classe = {}
+    for pdf_bytes in pdfs:
+        for classe, segundos in pdf_texto.tempos_classificacao(pdf_bytes, perfil, **parametros) or []: por_classe.setdefault(classe, []).append(segundos)
+    for classe, segundos in por_classe.items(): tempos[f"classificacao_{classe}"] = sum(segundos) / len(segundos)
+
+def _rodar_rmb(e, tempos, ocr_ok):
+    m = _medir(tempos, "matriz", obter_matriz, CAMINHO_MATRIZ)
+
+    def ler_excel():
+        with PlanilhaSiafi(e["planilha"]) as planilha:
+            return {ug: rmb.ler_aba(planilha.ler(aba), m) for aba, ug in planilha.abas_ug()}
+    abas = _medir(tempos, "excel", ler_excel)
+
+    def ler_pdfs(pdfs): return {ug: rmb.ler_pdf(b) for ug, b in pdfs.items()}
+    dfs_pdf = _medir(tempos, "pdf_texto", ler_pdfs, e["pdfs"])
+    _medir(tempos, "pdf_texto_cache", ler_pdfs, e["pdfs"])
+    if ocr_ok and e["pdfs_ocr"]: _medir(tempos, "ocr", ler_pdfs, e["pdfs_ocr"])
+    _medir_classificacao(tempos, list(e["pdfs"].values()) + list(e["pdfs_ocr"].values()), "rmb")
+
+    def cruzar():
+        dados_ug = {ug: rmb.montar_ug(*abas[ug], dfs_pdf[ug]) for ug in abas}
+        return dados_ug, [rmb.conciliar_ug(info) for info in dados_ug.values()]
+    dados_ug, conciliacoes = _medir(tempos, "cruzamento", cruzar)
+    _medir(tempos, "relatorio", _renderizar, rmb, dados_ug, conciliacoes)
+
+def _rodar_depreciacao(e, tempos, ocr_ok):
+    m = _medir(tempos, "matriz", obter_matriz, CAMINHO_MATRIZ)
+
+    def ler_excel():
+        wb = openpyxl.load_workbook(e["planilha"], read_only=True, data_only=True)
+        try: return {aba: depreciacao.ler_aba(wb[aba].iter_rows(values_only=True), m) for aba in wb.sheetnames if aba != "MATRIZ"}
+        finally: wb.close()
+    abas = _medir(tempos, "excel", ler_excel)
+
+    def ler_pdfs(): return {extrair_id_unidade(nome): depreciacao.processar_pdf(b, IDX_MES) for nome, b in e["pdfs"].items()}
+    d_pdfs = _medir(tempos, "pdf_texto", ler_pdfs)
+    _medir(tempos, "pdf_texto_cache", ler_pdfs)
+
+    def cruzar():
+        dados_ug = {}
+        for aba, d_excel in abas.items():
+            uid = extrair_id_unidade(aba)
+            dados_ug[aba] = depreciacao.montar_ug(uid, d_excel, d_pdfs.get(uid, {}), uid in d_pdfs)
+        return dados_ug, [depreciacao.conciliar_ug(info) for info in dados_ug.values()]
+    dados_ug, conciliacoes = _medir(tempos, "cruzamento", cruzar)
+    _medir(tempos, "relatorio", _renderizar, depreciacao, dados_ug, conciliacoes, depreciacao.MESES[IDX_MES])
+
+def _rodar_almoxarifado(e, tempos, ocr_ok):
+    def ler_excel():
+        with PlanilhaSiafi(e["planilha"]) as planilha:
+            return {extrair_id_unidade(aba): (aba, almoxarifado.ler_aba(planilha.ler(aba))) for aba in planilha.abas}
+    abas = _medir(tempos, "excel", ler_excel)
+
+    def ler_pdfs(pdfs): return {ug: almoxarifado.ler_pdf(b) for ug, b in pdfs.items()}
+    dfs_pdf = _medir(tempos, "pdf_texto", ler_pdfs, e["pdfs"])
+    _medir(tempos, "pdf_texto_cache", ler_pdfs, e["pdfs"])
+    if ocr_ok and e["pdfs_ocr"]: _medir(tempos, "ocr", ler_pdfs, e["pdfs_ocr"])
+    _medir_classificacao(tempos, list(e["pdfs"].values()) + list(e["pdfs_ocr"].values()), "almoxarifado", detectar_rotacao=True)
+
+    def cruzar():
+        dados_ug = {ug: almoxarifado.montar_ug(aba, df.copy(), dfs_pdf[ug].copy()) for ug, (aba, df) in abas.items()}
+        return dados_ug, [almoxarifado.conciliar_ug(info) for info in dados_ug.values()]
+    dados_ug, conciliacoes = _medir(tempos, "cruzamento", cruzar)
+    _medir(tempos, "relatorio", _renderizar, almoxarifado, dados_ug, conciliacoes)
+
+def _rodar_biblioteca(e, tempos, ocr_ok):
+    dados_ug = _medir(tempos, "excel", biblioteca.ler_planilha, e["planilha"])
+    # `processar` soma os PDFs dentro de dados_ug, então cada leitura parte de uma cópia limpa
+    base = copy.deepcopy(dados_ug)
+    _medir(tempos, "pdf_texto", biblioteca.processar, dados_ug, e["pdfs"], IDX_MES, ANO)
+    _medir(tempos, "pdf_texto_cache", biblioteca.processar, base, e["pdfs"], IDX_MES, ANO)
+    conciliacoes = _medir(tempos, "cruzamento", lambda: [biblioteca.conciliar_ug(info) for info in dados_ug.values()])
+    _medir(tempos, "relatorio", _renderizar, biblioteca, dados_ug, conciliacoes)
+
+CONCILIACOES = {
+    "rmb": _rodar_rmb,
+    "depreciacao": _rodar_depreciacao,
+    "almoxarifado": _rodar_almoxarifado,
+    "biblioteca": _rodar_biblioteca,
+}
+SEM_OCR = {"depreciacao", "biblioteca"}  # só leem a camada de texto dos PDFs
+
+# ==========================================
+# EXECUÇÃO E COMPARAÇÃO
+# ==========================================
+def medir(entradas, repeticoes):
+    """{conciliação: {etapa: segundos}} com o menor tempo de cada etapa e {"conciliação.etapa": motivo} das que não rodaram."""
+    motivo_ocr = _ocr_disponivel()
+    resultados, indisponivel = {}, {}
+    for nome, rodar in CONCILIACOES.items():
+        melhores = {}
+        for _ in range(repeticoes):
+            shutil.rmtree(cache.PASTA_CACHE, ignore_errors=True)
+            matriz._cache_matriz.clear()
+            tempos = {}
+            rodar(entradas[nome], tempos, motivo_ocr is None)
+            for etapa, t in tempos.items(): melhores[etapa] = min(t, melhores.get(etapa, t))
+        melhores["total"] = sum(t for etapa, t in melhores.items() if etapa not in FORA_DO_TOTAL)
+        resultados[nome] = {etapa: round(melhores[etapa], 6) for etapa in ETAPAS + ["total"] if etapa in melhores}
+        if nome in SEM_OCR: indisponivel[f"{nome}.ocr"] = "conciliação sem OCR"
+        elif "ocr" not in melhores: indisponivel[f"{nome}.ocr"] = motivo_ocr or "--paginas-ocr 0"
+        if nome in ("almoxarifado", "biblioteca"): indisponivel[f"{nome}.matriz"] = "conciliação não usa a MATRIZ"
+    return resultados, indisponivel
+
+def imprimir(resultados, anterior=None):
+    print(f"{'conciliação':<14}{'etapa':<25}{'atual (s)':>11}" + (f"{'anterior (s)':>14}{'razão':>8}" if anterior else ""))
+    for nome, etapas in resultados.items():
+        for etapa, t in etapas.items():
+            linha = f"{nome:<14}{etapa:<25}{t:>11.4f}"
+            if anterior:
+                t_ant = anterior.get(nome, {}).get(etapa)
+                linha += f"{t_ant:>14.4f}{t_ant / t if t else float('inf'):>7.2f}x" if t_ant is not None else f"{'-':>14}{'-':>8}"
+            print(linha)
+
+def criar_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_conciliacao", description="Tempo de cada etapa das conciliações com entradas sintéticas.")
+    parser.add_argument("--ugs", type=int, default=5, help="quantidade de UGs (abas e PDFs) por conciliação")
+    parser.add_argument("--linhas", type=int, default=200, help="linhas por aba e por relatório PDF")
+    parser.add_argument("--paginas-ocr", type=int, default=2, help="páginas escaneadas no PDF usado para medir o OCR (0 desliga)")
+    parser.add_argument("--repeticoes", type=int, default=3, help="execuções de cada conciliação; vale o menor tempo")
+    parser.add_argument("--saida", help="arquivo JSON com os resultados (padrão: benchmarks/resultados/bench_conciliacao_<data>.json)")
+    parser.add_argument("--comparar", metavar="ANTERIOR.json", help="resultado de uma execução anterior para comparar")
+    return parser
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    parametros = {"ugs": args.ugs, "linhas": args.linhas, "paginas_ocr": args.paginas_ocr, "repeticoes": args.repeticoes}
+
+    with tempfile.TemporaryDirectory(prefix="bench_conciliacao_") as pasta:
+        cache.PASTA_CACHE = os.path.join(pasta, "cache")  # não mexe no cache de quem usa o app
+        inicio = time.perf_counter()
+        entradas = gerar_entradas(pasta, args.ugs, args.linhas, args.paginas_ocr)
+        print(f"entradas sintéticas geradas em {time.perf_counter() - inicio:.1f}s ({parametros})")
+        resultados, indisponivel = medir(entradas, args.repeticoes)
+
+    saida = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "plataforma": platform.platform(),
+        "nucleos": os.cpu_count(),
+        "parametros": parametros,
+        "resultados": resultados,
+        "indisponivel": indisponivel,
+    }
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f: anterior = json.load(f)["resultados"]
+    imprimir(resultados, anterior)
+    for etapa, motivo in indisponivel.items(): print(f"(sem medição) {etapa}: {motivo}")
+
+    caminho = args.saida or os.path.join(PASTA_RESULTADOS, f"bench_conciliacao_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    with open(caminho, "w", encoding="utf-8") as f: json.dump(saida, f, ensure_ascii=False, indent=2)
+    print(f"resultados gravados em {caminho}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Compara `converter_coluna` com as funções de conversão aplicadas célula a célula (`.apply`).
+
+Uso (na raiz do repositório): python -m benchmarks.bench_converter_coluna [n_celulas]
+Falha com AssertionError se algum valor divergir da função original.
+"""
+import math
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from conciliador_core.valores import (converter_coluna, converter_valor_excel, formatar_moeda_pdf, limpar_valor,
+                                      limpar_valor_excel, limpar_valor_pdf)
+
+REGRAS = [limpar_valor, limpar_valor_excel, converter_valor_excel, limpar_valor_pdf, formatar_moeda_pdf]
+
+# Células difíceis, escritas à mão: separadores ambíguos, aspas, R$, espaços, sinais e lixo
+CASOS_BORDA = ["1.234,56", "1,234.56", "1234,5", "1234.5", "1.234", "1,234", "1.234.567", "12,345,678.9",
+               '"1.234,56"', "'99,90'", "R$ 1.234,56", "R$1234", "  -1.234,56 ", "-0,01", "(1.234,56)",
+               "1.234,56 D", "1.234,56C", "12.3", ",50", ".5", "5.", "-", ".", ",", "", "   ", "abc", "1e5",
+               "1_000", "nan", "inf", "+5", "0", "0.0", "0,00", "1.2.3", "1,2,3", "--5", "5-", "1.,5", "12.,",
+               "R$ -", 0, 0.0, 1234.5, -7, 10**20, 1e-05, True, np.nan, None, np.int64(42),
+               np.float64(3.25)]
+
+def _celula_aleatoria(rng):
+    valor = rng.uniform(-1e7, 1e7)
+    forma = rng.randrange(10)
+    br = f"{valor:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+    if forma == 0: return round(valor, 2)
+    if forma == 1: return br
+    if forma == 2: return f"{valor:,.2f}"
+    if forma == 3: return f"R$ {br}"
+    if forma == 4: return f'"{br}"'
+    if forma == 5: return f"{valor:.{rng.randrange(4)}f}"
+    if forma == 6: return f" {br} D"
+    if forma == 7: return rng.choice(["", " ", "-", "TOTAL", np.nan])
+    if forma == 8: return f"{abs(valor):,.1f}".replace(',', '.')
+    return rng.choice(CASOS_BORDA)
+
+def _iguais(a, b):
+    return a == b or (math.isnan(a) and math.isnan(b))
+
+def conferir(celulas):
+    for regra in REGRAS:
+        esperado = [regra(c) for c in celulas]
+        for entrada in (celulas, pd.Series(celulas, dtype=object)):
+            obtido, validos = converter_coluna(entrada, regra)
+            assert obtido.dtype == np.float64 and validos.dtype == np.bool_
+            for c, e, o, v in zip(celulas, esperado, obtido, validos):
+                assert _iguais(e, o), f"{regra.__name__}({c!r}): esperado {e!r}, obtido {o!r}"
+                if v == False: assert e == 0.0, f"{regra.__name__}({c!r}) marcado inválido com valor {e!r}"
+
+def cronometrar(celulas, regra):
+    s = celulas if isinstance(celulas, pd.Series) else pd.Series(celulas, dtype=object)
+    inicio = time.perf_counter()
+    s.apply(regra)
+    t_apply = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    converter_coluna(s, regra)
+    return t_apply, time.perf_counter() - inicio
+
+def main(n_celulas=1_000_000):
+    rng = random.Random(0)
+    conferir(CASOS_BORDA)  # poucas células: conversão célula a célula
+    conferir(CASOS_BORDA + [_celula_aleatoria(rng) for _ in range(20_000)])  # operações de coluna
+    print("resultados idênticos às funções originais")
+
+    celulas = [_celula_aleatoria(rng) for _ in range(n_celulas)]
+    for regra in REGRAS:
+        t_apply, t_coluna = cronometrar(celulas, regra)
+        print(f"{regra.__name__:<22} {n_celulas} células | .apply: {t_apply:.2f}s | coluna: {t_coluna:.2f}s | {t_apply / t_coluna:.1f}x")
+
+    # Coluna como o read_excel costuma entregar: quase tudo número, algumas linhas de texto
+    numeros = np.random.default_rng(0).uniform(-1e7, 1e7, n_celulas)
+    planilha = [_celula_aleatoria(rng) if i % 50 == 0 else v for i, v in enumerate(numeros.tolist())]
+    for nome, coluna in (("float64", pd.Series(numeros)), ("planilha 98% números", planilha)):
+        t_apply, t_coluna = cronometrar(coluna, limpar_valor)
+        print(f"limpar_valor ({nome}) {n_celulas} células | .apply: {t_apply:.2f}s | coluna: {t_coluna:.3f}s | {t_apply / t_coluna:.1f}x")
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,61 @@
+"""Compara o ZIP de abas separadas da página 3 (Depreciação) com a versão antiga, que relia a planilha inteira por aba.
+
+Uso (na raiz do repositório, com a MATRIZ.xlsx): python -m benchmarks.bench_dividir_zip [n_abas] [linhas_por_aba] [processos]
+Falha com AssertionError se algum arquivo do ZIP divergir (valores, estilos, larguras, alturas e mesclas).
+"""
+import io
+import sys
+import time
+import zipfile
+
+import openpyxl
+
+from benchmarks.bench_preparar_depreciacao import conferir
+from benchmarks.sinteticos import gerar_planilha_preparo_depreciacao
+from conciliador_core.matriz import obter_matriz
+from conciliador_core.preparacao import gerar_zip_abas, modelo_da_aba, preparar_planilha_depreciacao
+
+def dividir_antigo(output_completo, abas_processadas):
+    # Versão original da página 3, mantida como referência
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "a", zipfile.ZIP_DEFLATED, False) as zip_file:
+        for sheet_name in abas_processadas:
+            output_completo.seek(0)
+            wb_temp = openpyxl.load_workbook(output_completo)
+            for nome_aba in wb_temp.sheetnames:
+                if nome_aba != sheet_name: del wb_temp[nome_aba]
+            single_output = io.BytesIO()
+            wb_temp.save(single_output)
+            zip_file.writestr(f"{sheet_name}.xlsx", single_output.getvalue())
+    return zip_buffer.getvalue()
+
+def conferir_zips(zip_antigo, zip_novo):
+    with zipfile.ZipFile(io.BytesIO(zip_antigo)) as za, zipfile.ZipFile(io.BytesIO(zip_novo)) as zn:
+        assert sorted(za.namelist()) == sorted(zn.namelist())
+        for nome in za.namelist():
+            wb_a, wb_n = (openpyxl.load_workbook(io.BytesIO(z.read(nome))) for z in (za, zn))
+            conferir(wb_a, wb_n)
+            ws_a, ws_n = wb_a.active, wb_n.active
+            assert sorted(map(str, ws_a.merged_cells.ranges)) == sorted(map(str, ws_n.merged_cells.ranges)), nome
+            assert {r: d.height for r, d in ws_a.row_dimensions.items() if d.height} == {r: d.height for r, d in ws_n.row_dimensions.items() if d.height}, nome
+
+def main(n_abas=20, n_linhas=1000, processos=1):
+    matriz = obter_matriz()
+    contas = [str(chave) for chave, _ in matriz.linhas if chave is not None]
+    wb, abas = preparar_planilha_depreciacao(io.BytesIO(gerar_planilha_preparo_depreciacao(contas, n_abas, n_linhas)), matriz)
+    output_completo = io.BytesIO()
+    wb.save(output_completo)
+
+    inicio = time.perf_counter()
+    zip_antigo = dividir_antigo(output_completo, abas)
+    t_antigo = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    zip_novo = gerar_zip_abas([modelo_da_aba(wb[nome]) for nome in abas], processos)
+    t_novo = time.perf_counter() - inicio
+
+    conferir_zips(zip_antigo, zip_novo)
+    print("arquivos do ZIP idênticos aos da versão antiga")
+    print(f"{n_abas} abas x {n_linhas} linhas | relendo por aba: {t_antigo:.2f}s | write-only ({processos} processo(s)): {t_novo:.2f}s | {t_antigo / t_novo:.1f}x")
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:4]))
@@ -0,0 +1,46 @@
+"""Compara a extração do RMB pelo texto corrido (regex) com a extração por coordenadas, em tempo e acerto.
+
+Uso (na raiz do repositório): python -m benchmarks.bench_extracao_rmb [n_pdfs] [itens_por_pdf]
+Os PDFs são tabelas sintéticas (benchmarks/sinteticos.py) em três cenários: colunas todas preenchidas,
+células vazias e valores que quebram para a linha de baixo. Acerto = chaves com o saldo esperado.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.sinteticos import gerar_pdf_tabela_rmb
+from conciliador_core import cache, rmb
+
+CENARIOS = {
+    "completo": {},
+    "celulas_vazias": {"celulas_vazias": 0.15},
+    "valores_quebrados": {"valores_quebrados": 0.10},
+}
+
+def acertos(df_pdf, esperado):
+    obtido = dict(zip(df_pdf['Chave_Vinculo'], df_pdf['Saldo_PDF']))
+    return sum(1 for chave, saldo in esperado.items() if abs(obtido.get(chave, 0.0) - saldo) < 0.01) - sum(1 for chave in obtido if chave not in esperado)
+
+def cronometrar(pdfs, modo):
+    # Cache frio: cada medição relê os PDFs do zero
+    shutil.rmtree(cache.PASTA_CACHE, ignore_errors=True)
+    inicio = time.perf_counter()
+    resultados = [rmb.ler_pdf(pdf_bytes, modo=modo) for pdf_bytes, _ in pdfs]
+    return time.perf_counter() - inicio, resultados
+
+def main(n_pdfs=5, itens_por_pdf=300):
+    with tempfile.TemporaryDirectory(prefix="bench_extracao_rmb_") as pasta:
+        cache.PASTA_CACHE = os.path.join(pasta, "cache")  # não mexe no cache de quem usa o app
+        print(f"{'cenário':<19}{'modo':<13}{'tempo (s)':>10}{'acerto':>16}")
+        for nome, opcoes in CENARIOS.items():
+            pdfs = [gerar_pdf_tabela_rmb([(i * 7 + s) % 60 + 1 for i in range(itens_por_pdf)], seed=s, **opcoes) for s in range(n_pdfs)]
+            total = sum(len(esperado) for _, esperado in pdfs)
+            for modo in rmb.MODOS_EXTRACAO:
+                tempo, resultados = cronometrar(pdfs, modo)
+                certos = sum(acertos(df, esperado) for df, (_, esperado) in zip(resultados, pdfs))
+                print(f"{nome:<19}{modo:<13}{tempo:>10.3f}{f'{certos}/{total}':>16}")
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
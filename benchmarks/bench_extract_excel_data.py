@@ -0,0 +1,26 @@
+"""Tempo da leitura colunar das abas UG contra a antiga, linha a linha.
+
+Uso (na raiz do repositório): python -m benchmarks.bench_extract_excel_data [n_abas] [linhas_por_aba]
+A igualdade entre as duas versões é conferida em tests/test_siafi.py (python -m pytest tests).
+"""
+import sys
+import time
+
+from benchmarks.sinteticos import gerar_aba_ug
+from conciliador_core.siafi import extract_excel_data
+from tests.test_siafi import extract_excel_data_linha_a_linha
+
+def cronometrar(funcao, abas):
+    inicio = time.perf_counter()
+    for df_raw in abas: funcao(df_raw)
+    return time.perf_counter() - inicio
+
+def main(n_abas=100, linhas_por_aba=300):
+    abas = [gerar_aba_ug(linhas_por_aba, seed=s) for s in range(n_abas)]
+    t_antigo = cronometrar(extract_excel_data_linha_a_linha, abas)
+    t_novo = cronometrar(extract_excel_data, abas)
+    print(f"{n_abas} abas x {linhas_por_aba} linhas")
+    print(f"linha a linha: {t_antigo:.3f}s | colunar: {t_novo:.3f}s | {t_antigo / t_novo:.1f}x")
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,164 @@
+"""Compara a memória que os dados_ug e as conciliações das páginas 2.1, 5.1 e 4.1 ocupam no session_state com a versão antiga.
+
+Uso (na raiz do repositório): python -m benchmarks.bench_memoria_sessao [n_ugs] [chaves_por_ug]
+A versão antiga guardava DataFrames (e uma cópia "original" do relatório) por UG e o cruzamento inteiro de cada
+UG em `conciliacoes`; a nova guarda arrays NumPy, só as edições e só as linhas do cruzamento que são mostradas.
+Falha com AssertionError se algum cruzamento (com e sem edições) ou total divergir da versão antiga.
+"""
+import copy
+import sys
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from conciliador_core import almoxarifado, depreciacao, rmb
+from conciliador_core.memoria import formatar_bytes, tamanho
+
+# ==========================================
+# VERSÃO ANTIGA (REFERÊNCIA)
+# ==========================================
+def rmb_montar_antigo(df_padrao, saldo_estoque, tem_estoque, df_pdf_final):
+    return {'df_excel': df_padrao, 'df_pdf': df_pdf_final.copy(), 'df_pdf_original': df_pdf_final.copy(),
+            'saldo_estoque': saldo_estoque, 'tem_estoque': tem_estoque}
+
+def rmb_conciliar_antigo(info):
+    original = pd.merge(info['df_pdf_original'], info['df_excel'], on='Chave_Vinculo', how='outer').fillna(0)
+    original['Diferenca_Original'] = original['Saldo_PDF'] - original['Saldo_Excel']
+    final = pd.merge(info['df_pdf'], info['df_excel'], on='Chave_Vinculo', how='outer').fillna(0)
+    final['Descricao'] = final.apply(lambda x: x['Descricao_Completa'] if pd.notna(x['Descricao_Completa']) and str(x['Descricao_Completa']).strip() != '0' else "ITEM SEM DESCRIÇÃO NO SIAFI", axis=1)
+    final['Diferenca'] = (final['Saldo_PDF'] - final['Saldo_Excel']).round(2)
+    return final, original[abs(original['Diferenca_Original']) > 0.05]['Chave_Vinculo'].tolist()
+
+def almox_montar_antigo(nome_aba, df_padrao, df_pdf_final):
+    df_padrao['Chave_Vinculo'] = df_padrao['Chave_Vinculo'].astype(str)
+    df_pdf_final['Chave_Vinculo'] = df_pdf_final['Chave_Vinculo'].astype(str)
+    cruzamento = pd.merge(df_pdf_final, df_padrao, on='Chave_Vinculo', how='outer').fillna(0)
+    chaves = cruzamento[abs(cruzamento['Saldo_PDF'] - cruzamento['Saldo_Excel']) > 0.05]['Chave_Vinculo'].tolist()
+    return {'nome_aba': nome_aba, 'df_excel': df_padrao, 'df_pdf': df_pdf_final.copy(), 'df_pdf_orig': df_pdf_final.copy(),
+            'chaves_com_erro': chaves, 'erro_original': len(chaves) > 0}
+
+def almox_conciliar_antigo(info):
+    final = pd.merge(info['df_pdf'], info['df_excel'], on='Chave_Vinculo', how='outer').fillna(0)
+    final['Descricao'] = final.apply(lambda x: x['Descricao_Completa'] if x['Descricao_Completa'] != 0 else f"Conta {x['Chave_Vinculo']} (Sem no Excel)", axis=1)
+    final['Diferenca'] = (final['Saldo_PDF'] - final['Saldo_Excel']).round(2)
+    return final
+
+def mostradas(final, chaves):
+    # Linhas do cruzamento que a página e o relatório usam (divergentes ou com edição liberada)
+    return final[(abs(final['Diferenca']) > 0.05) | final['Chave_Vinculo'].isin(chaves)].reset_index(drop=True)
+
+def conferir(final_antigo, chaves, conciliacao):
+    pd.testing.assert_frame_equal(mostradas(final_antigo, chaves), conciliacao['final'], check_dtype=False)
+    assert np.isclose(final_antigo['Saldo_PDF'].sum(), conciliacao['soma_pdf']) and np.isclose(final_antigo['Saldo_Excel'].sum(), conciliacao['soma_excel'])
+
+def editar_df_antigo(info, chave, novo_val):
+    # Como as páginas aplicavam a edição no DataFrame do relatório
+    if chave in info['df_pdf']['Chave_Vinculo'].values:
+        info['df_pdf'].loc[info['df_pdf']['Chave_Vinculo'] == chave, 'Saldo_PDF'] = novo_val
+    else:
+        info['df_pdf'] = pd.concat([info['df_pdf'], pd.DataFrame([{'Chave_Vinculo': chave, 'Saldo_PDF': novo_val}])], ignore_index=True)
+
+def dep_montar_antigo(uid, d_excel, d_pdf_raw, tem_pdf):
+    d_pdf = {}
+    for g in sorted(set(d_pdf_raw) | set(d_excel)):
+        d_pdf[g] = {'saldo': round(-1 * d_pdf_raw.get(g, {}).get('saldo', 0.0), 2), 'movimento': round(-1 * d_pdf_raw.get(g, {}).get('movimento', 0.0), 2)}
+    return {'uid': uid, 'd_excel': d_excel, 'd_pdf': d_pdf, 'd_pdf_orig': copy.deepcopy(d_pdf), 'tem_pdf': tem_pdf}
+
+def dep_alertas_antigos(info):
+    d_pdf, d_pdf_orig = info['d_pdf'], info['d_pdf_orig']
+    return [(g, m, d_pdf[g][m]) for g in sorted(d_pdf) for m in ('saldo', 'movimento') if abs(d_pdf[g][m] - d_pdf_orig[g][m]) > 0.01]
+
+# ==========================================
+# ENTRADAS SINTÉTICAS
+# ==========================================
+def entradas(n_ugs, n_chaves, seed=0):
+    rng = np.random.default_rng(seed)
+    ugs = []
+    for n in range(n_ugs):
+        chaves = np.sort(rng.choice(np.arange(1, 4 * n_chaves), n_chaves, replace=False))
+        saldos = np.round(rng.uniform(0, 5e6, n_chaves), 2)
+        df_excel = pd.DataFrame({'Chave_Vinculo': chaves, 'Saldo_Excel': saldos, 'Descricao_Completa': [f"BENS MÓVEIS - ITEM {c}" for c in chaves]})
+        pdf = saldos.copy()
+        pdf[rng.random(n_chaves) < 0.1] += 100.0  # ~10% das chaves divergem
+        no_pdf = rng.random(n_chaves) > 0.05      # e algumas faltam no relatório
+        df_pdf = pd.DataFrame({'Chave_Vinculo': chaves[no_pdf], 'Saldo_PDF': pdf[no_pdf]})
+        ugs.append((str(153001 + n), df_excel, df_pdf))
+    return ugs
+
+def retido(construir):
+    # Bytes alocados que continuam vivos depois de montar os dados_ug (o que fica no session_state)
+    tracemalloc.start()
+    inicio = tracemalloc.get_traced_memory()[0]
+    dados = construir()
+    fim = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return dados, fim - inicio
+
+def main(n_ugs=60, n_chaves=80):
+    ugs = entradas(n_ugs, n_chaves)
+    resultados = []
+
+    # RMB
+    antigo, b_antigo = retido(lambda: {ug: rmb_montar_antigo(e.copy(), 0.0, False, p.copy()) for ug, e, p in ugs})
+    novo, b_novo = retido(lambda: {ug: rmb.montar_ug(e.copy(), 0.0, False, p.copy()) for ug, e, p in ugs})
+    for ug in antigo:
+        final_a, chaves_a = rmb_conciliar_antigo(antigo[ug])
+        assert chaves_a == rmb.chaves_com_erro(novo[ug]), ug
+        for chave in chaves_a[::2] + [10 ** 6]:  # edita metade das divergentes e uma chave que não existe no relatório
+            editar_df_antigo(antigo[ug], chave, 1234.56)
+            novo[ug].pdf.editar(chave, 1234.56)
+        final_a, _ = rmb_conciliar_antigo(antigo[ug])
+        conferir(final_a, chaves_a, rmb.conciliar_ug(novo[ug]))
+    resultados.append(("RMB", antigo, b_antigo, novo, b_novo))
+    conc_antigas = {ug: {'final': rmb_conciliar_antigo(info)[0]} for ug, info in antigo.items()}
+    resultados.append(("  conciliações", conc_antigas, 0, {ug: rmb.conciliar_ug(info) for ug, info in novo.items()}, 0))
+
+    # Almoxarifado (chaves de texto)
+    antigo, b_antigo = retido(lambda: {ug: almox_montar_antigo(ug, e.copy(), p.copy()) for ug, e, p in ugs})
+    novo, b_novo = retido(lambda: {ug: almoxarifado.montar_ug(ug, e.copy(), p.copy()) for ug, e, p in ugs})
+    for ug in antigo:
+        assert antigo[ug]['chaves_com_erro'] == novo[ug].chaves_com_erro, ug
+        for chave in antigo[ug]['chaves_com_erro'][::2]:
+            editar_df_antigo(antigo[ug], chave, 99.9)
+            novo[ug].pdf.editar(chave, 99.9)
+        conferir(almox_conciliar_antigo(antigo[ug]), antigo[ug]['chaves_com_erro'], almoxarifado.conciliar_ug(novo[ug]))
+    resultados.append(("Almoxarifado", antigo, b_antigo, novo, b_novo))
+    conc_antigas = {ug: {'final': almox_conciliar_antigo(info)} for ug, info in antigo.items()}
+    resultados.append(("  conciliações", conc_antigas, 0, {ug: almoxarifado.conciliar_ug(info) for ug, info in novo.items()}, 0))
+
+    # Como a página 5.1: edita todas as chaves divergentes, inclusive as que só existem na planilha
+    # (relatório vazio, e chaves de texto mais longas que as do relatório)
+    df_excel = pd.DataFrame({'Chave_Vinculo': ['01', '05', '123'], 'Saldo_Excel': [1.0, 2.0, 3.0], 'Descricao_Completa': ['A', 'B', 'C']})
+    for df_pdf in (pd.DataFrame(columns=['Chave_Vinculo', 'Saldo_PDF']), pd.DataFrame({'Chave_Vinculo': ['01', '05'], 'Saldo_PDF': [1.0, 9.0]})):
+        info_a, info_n = almox_montar_antigo("extra", df_excel.copy(), df_pdf.copy()), almoxarifado.montar_ug("extra", df_excel.copy(), df_pdf.copy())
+        assert info_a['chaves_com_erro'] == info_n.chaves_com_erro
+        for chave in info_a['chaves_com_erro']:
+            editar_df_antigo(info_a, chave, 7.5)
+            info_n.pdf.editar(chave, 7.5)
+        conferir(almox_conciliar_antigo(info_a), info_a['chaves_com_erro'], almoxarifado.conciliar_ug(info_n))
+
+    # Depreciação (grupos com saldo e movimento)
+    deps = [(ug, {g: {'saldo': s, 'movimento': s / 12} for g, s in zip(e['Chave_Vinculo'].tolist()[:20], e['Saldo_Excel'])},
+             {g: {'saldo': -s, 'movimento': -s / 12} for g, s in zip(p['Chave_Vinculo'].tolist()[:20], p['Saldo_PDF'])}) for ug, e, p in ugs]
+    antigo, b_antigo = retido(lambda: {ug: dep_montar_antigo(ug, d_excel, d_pdf, True) for ug, d_excel, d_pdf in deps})
+    novo, b_novo = retido(lambda: {ug: depreciacao.montar_ug(ug, d_excel, d_pdf, True) for ug, d_excel, d_pdf in deps})
+    for ug in antigo:
+        assert list(antigo[ug]['d_pdf']) == novo[ug].pdf_saldo.chaves.tolist(), ug
+        for g in list(novo[ug].grupos_com_erro)[::2]:
+            antigo[ug]['d_pdf'][g]['saldo'] = 1.5
+            novo[ug].pdf_saldo.editar(g, 1.5)
+        alertas = [(g, m, (novo[ug].pdf_saldo if m == 'saldo' else novo[ug].pdf_movimento).atual(g)) for g in novo[ug].pdf_saldo.chaves.tolist()
+                   for m in ('saldo', 'movimento') if (novo[ug].pdf_saldo if m == 'saldo' else novo[ug].pdf_movimento).editado(g)]
+        assert dep_alertas_antigos(antigo[ug]) == alertas, ug
+    resultados.append(("Depreciação", antigo, b_antigo, novo, b_novo))
+    print("cruzamentos idênticos aos da versão antiga (com e sem edições)")
+
+    # As conciliações (cache da revisão) só têm a estimativa: são montadas junto com a página, não num passo à parte
+    for nome, antigo, b_antigo, novo, b_novo in resultados:
+        alocado = f" | alocado: {formatar_bytes(b_antigo)} -> {formatar_bytes(b_novo)}" if b_antigo else ""
+        print(f"{nome:<15} {n_ugs} UGs x {n_chaves} chaves{alocado}"
+              f" | estimado (memoria.tamanho): {formatar_bytes(tamanho(antigo))} -> {formatar_bytes(tamanho(novo))}")
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,50 @@
+"""Compara o OCR da página inteira com o OCR adaptativo (só a tabela em alta resolução), em tempo e acerto.
+
+Uso (na raiz do repositório): python -m benchmarks.bench_ocr [paginas] [dpi]
+As páginas são relatórios RMB e Almoxarifado escaneados sintéticos (benchmarks/sinteticos.py).
+Acerto = valores monetários das linhas originais encontrados no texto do OCR. Precisa de tesseract e pdftoppm;
+com o tesserocr instalado, mede o motor em processo (ver conciliador_core/motor_ocr.py).
+"""
+import re
+import sys
+import time
+from collections import Counter
+
+from benchmarks.bench_conciliacao import LINHAS_POR_PAGINA_OCR, _ocr_disponivel
+from benchmarks.sinteticos import gerar_pdf_imagem, linhas_almoxarifado, linhas_rmb
+from conciliador_core import motor_ocr
+from conciliador_core.ocr import MODOS_OCR, ocr_paginas
+
+_RE_VALOR = re.compile(r'\d{1,3}(?:\.\d{3})*,\d{2}')
+
+def acerto(esperadas, texto):
+    # Fração dos valores esperados (com repetição) que aparecem no texto do OCR
+    esperado = Counter(v for linha in esperadas for v in _RE_VALOR.findall(linha))
+    obtido = Counter(_RE_VALOR.findall((texto or "").replace(' ', '')))
+    return sum((esperado & obtido).values()), sum(esperado.values())
+
+def main(paginas=2, dpi=300):
+    motivo = _ocr_disponivel()
+    if motivo:
+        print(f"OCR indisponível: {motivo}")
+        return 0
+    n_linhas = paginas * LINHAS_POR_PAGINA_OCR
+    relatorios = {
+        "rmb": linhas_rmb(list(range(1, 60)) * (n_linhas // 59 + 1))[:n_linhas],
+        "almoxarifado": linhas_almoxarifado(n_linhas)[:n_linhas],
+    }
+    print(f"motor de OCR: {motor_ocr.MOTOR}")
+    print(f"{'relatório':<14}{'modo':<12}{'s/página':>10}{'acerto':>16}")
+    for nome, linhas in relatorios.items():
+        pdf_bytes = gerar_pdf_imagem(linhas, LINHAS_POR_PAGINA_OCR)
+        numeros = list(range(1, paginas + 1))
+        for modo in MODOS_OCR:
+            inicio = time.perf_counter()
+            textos = ocr_paginas(pdf_bytes, numeros, dpi=dpi, modo=modo)
+            tempo = (time.perf_counter() - inicio) / paginas
+            certos, total = acerto(linhas, "\n".join(t or "" for t in textos))
+            print(f"{nome:<14}{modo:<12}{tempo:>10.2f}{f'{certos}/{total}':>16}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(*(int(a) for a in sys.argv[1:3])))
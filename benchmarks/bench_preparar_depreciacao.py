@@ -0,0 +1,96 @@
+"""Compara a preparação das abas da página 3 (Depreciação) com a versão antiga, que excluía linha a linha.
+
+Uso (na raiz do repositório, com a MATRIZ.xlsx): python -m benchmarks.bench_preparar_depreciacao [n_abas] [linhas_por_aba]
+Falha com AssertionError se alguma célula (valor, fonte, borda) divergir da versão antiga.
+"""
+import io
+import sys
+from copy import copy
+import time
+
+import openpyxl
+from openpyxl.styles import Alignment, Border, Font, Side
+
+from benchmarks.sinteticos import gerar_planilha_preparo_depreciacao
+from conciliador_core.matriz import obter_matriz
+from conciliador_core.preparacao import preparar_planilha_depreciacao
+
+def preparar_antigo(conteudo, matriz):
+    # Versão original da página 3, mantida como referência
+    dicionario_matriz = {}
+    for chave, valor in matriz.linhas:
+        if chave is not None: dicionario_matriz[str(chave).strip()] = valor
+    wb_alvo = openpyxl.load_workbook(io.BytesIO(conteudo))
+    borda_fina = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+    fonte_arial_9 = Font(name='Arial', size=9)
+    alinhamento_centro = Alignment(vertical='center')
+    for sheet_name in wb_alvo.sheetnames:
+        if sheet_name == "MATRIZ": continue
+        ws = wb_alvo[sheet_name]
+        ws.insert_cols(1)
+        ultima_linha = ws.max_row
+        for r in range(ultima_linha, 8, -1):
+            celula_b = ws.cell(row=r, column=2)
+            valor_b = str(celula_b.value).strip() if celula_b.value else ""
+            if valor_b == "123110402":
+                ws.delete_rows(r)
+                continue
+            if valor_b.replace('.', '', 1).isdigit():
+                celula_b.value = float(valor_b) if '.' in valor_b else int(valor_b)
+                celula_b.number_format = 'General'
+            ws.cell(row=r, column=1).value = dicionario_matriz.get(valor_b, "#N/D")
+        ultima_linha = ws.max_row
+        if ultima_linha >= 9:
+            dados_para_ordenar = [[ws.cell(row=r, column=c).value for c in range(1, 5)] for r in range(9, ultima_linha + 1)]
+            dados_para_ordenar.sort(key=lambda x: str(x[0]) if x[0] is not None else "")
+            for i, linha_dados in enumerate(dados_para_ordenar):
+                for col_idx, valor in enumerate(linha_dados): ws.cell(row=9 + i, column=col_idx + 1).value = valor
+        linha_total = ws.max_row + 1
+        ws.cell(row=linha_total, column=2).value = "TOTAL"
+        ws.cell(row=linha_total, column=3).value = f"=SUM(C9:C{linha_total - 1})"
+        ws.cell(row=linha_total, column=3).number_format = "#,##0.00"
+        ws.cell(row=linha_total, column=4).value = f"=SUM(D9:D{linha_total - 1})"
+        ws.cell(row=linha_total, column=4).number_format = "#,##0.00"
+        ws.cell(row=8, column=1).value = "Nat Desp"
+        for letra, largura in (('A', 15), ('B', 15), ('C', 20), ('D', 20)): ws.column_dimensions[letra].width = largura
+        for r in range(6, linha_total + 1):
+            for c in range(1, 5):
+                celula = ws.cell(row=r, column=c)
+                celula.font = fonte_arial_9
+                celula.alignment = alinhamento_centro
+                if r >= 9: celula.border = borda_fina
+    return wb_alvo
+
+def _estilo(celula, nome):
+    valor = getattr(celula, nome)
+    return valor if isinstance(valor, str) else copy(valor)  # o StyleProxy não compara pelo conteúdo
+
+def conferir(wb_antigo, wb_novo):
+    assert wb_antigo.sheetnames == wb_novo.sheetnames
+    for ws_a, ws_n in zip(wb_antigo.worksheets, wb_novo.worksheets):
+        assert ws_a.max_row == ws_n.max_row and ws_a.max_column == ws_n.max_column, ws_a.title
+        for linha_a, linha_n in zip(ws_a.iter_rows(), ws_n.iter_rows()):
+            for a, n in zip(linha_a, linha_n):
+                assert a.value == n.value and type(a.value) is type(n.value), f"{ws_a.title}!{a.coordinate}: {a.value!r} x {n.value!r}"
+                for estilo in ('font', 'border', 'alignment', 'number_format'):
+                    assert _estilo(a, estilo) == _estilo(n, estilo), f"{ws_a.title}!{a.coordinate}: {estilo}"
+        for letra in "ABCD": assert ws_a.column_dimensions[letra].width == ws_n.column_dimensions[letra].width
+
+def main(n_abas=3, n_linhas=3000):
+    matriz = obter_matriz()
+    contas = [str(chave) for chave, _ in matriz.linhas if chave is not None]
+    conferir(preparar_antigo(gerar_planilha_preparo_depreciacao(contas, 2, 300, seed=1), matriz),
+             preparar_planilha_depreciacao(io.BytesIO(gerar_planilha_preparo_depreciacao(contas, 2, 300, seed=1)), matriz)[0])
+    print("células idênticas às da versão antiga")
+
+    conteudo = gerar_planilha_preparo_depreciacao(contas, n_abas, n_linhas)
+    inicio = time.perf_counter()
+    preparar_antigo(conteudo, matriz)
+    t_antigo = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    preparar_planilha_depreciacao(io.BytesIO(conteudo), matriz)
+    t_novo = time.perf_counter() - inicio
+    print(f"{n_abas} abas x {n_linhas} linhas | linha a linha: {t_antigo:.2f}s | uma passada: {t_novo:.2f}s | {t_antigo / t_novo:.1f}x")
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,85 @@
+"""Compara a escrita das abas da página 1 (RMB) com a versão antiga, que pintava as linhas célula a célula.
+
+Uso (na raiz do repositório, com a MATRIZ.xlsx): python -m benchmarks.bench_preparar_rmb [n_abas] [linhas_por_aba]
+Falha com AssertionError se alguma célula (valor, cor de fundo) da planilha gerada divergir da versão antiga.
+"""
+import io
+import sys
+import time
+
+import openpyxl
+import pandas as pd
+
+from benchmarks.sinteticos import gerar_aba_preparo_rmb
+from conciliador_core.matriz import obter_matriz
+from conciliador_core.preparacao import escrever_aba_rmb, preparar_aba_rmb
+
+def formatar_aba_antiga(writer, sheet_name, data_rows, header_rows):
+    # Versão original da página 1, mantida como referência (o preparo dos dados é o mesmo)
+    header_rows.to_excel(writer, sheet_name=sheet_name, startrow=0, startcol=1, index=False, header=False)
+    data_rows.to_excel(writer, sheet_name=sheet_name, startrow=7, startcol=0, index=False, header=False)
+    worksheet = writer.sheets[sheet_name]
+    workbook = writer.book
+    fmt_currency = workbook.add_format({'num_format': '#,##0.00'})
+    fmt_total_label = workbook.add_format({'bold': True, 'align': 'right'})
+    fmt_total_value = workbook.add_format({'bold': True, 'num_format': '#,##0.00', 'top': 1})
+    fmt_red = workbook.add_format({'bg_color': '#FF0000', 'font_color': '#FFFFFF'})
+    fmt_blue = workbook.add_format({'bg_color': '#0000FF', 'font_color': '#FFFFFF'})
+    worksheet.set_column('A:A', 40)
+    worksheet.set_column('B:C', 15)
+    worksheet.set_column('D:D', 18, fmt_currency)
+    for i in range(len(data_rows)):
+        val_conta = data_rows.iloc[i, 1]
+        val_valor = data_rows.iloc[i, 3]
+        try: val_valor = float(val_valor)
+        except: val_valor = 0
+        row_idx = 7 + i
+        if val_conta == 123110801 and val_valor != 0:
+            worksheet.write(row_idx, 1, val_conta, fmt_red)
+            worksheet.write(row_idx, 2, data_rows.iloc[i, 2], fmt_red)
+            worksheet.write(row_idx, 3, val_valor, fmt_red)
+        elif val_conta == 123119905 and val_valor != 0:
+            worksheet.write(row_idx, 1, val_conta, fmt_blue)
+            worksheet.write(row_idx, 2, data_rows.iloc[i, 2], fmt_blue)
+            worksheet.write(row_idx, 3, val_valor, fmt_blue)
+    total_row = 7 + len(data_rows)
+    worksheet.write(total_row, 2, "TOTAL", fmt_total_label)
+    worksheet.write(total_row, 3, pd.to_numeric(data_rows.iloc[:, 3], errors='coerce').sum(), fmt_total_value)
+
+def gerar(modelos, escrever):
+    saida = io.BytesIO()
+    with pd.ExcelWriter(saida, engine='xlsxwriter') as writer:
+        for modelo in modelos: escrever(writer, modelo)
+    return saida.getvalue()
+
+def escrever_antigo(writer, modelo):
+    formatar_aba_antiga(writer, modelo['nome'], modelo['dados'], modelo['cabecalho'])
+
+def conferir(xlsx_antigo, xlsx_novo):
+    wb_a, wb_n = (openpyxl.load_workbook(io.BytesIO(x)) for x in (xlsx_antigo, xlsx_novo))
+    assert wb_a.sheetnames == wb_n.sheetnames
+    for ws_a, ws_n in zip(wb_a.worksheets, wb_n.worksheets):
+        for linha_a, linha_n in zip(ws_a.iter_rows(), ws_n.iter_rows(), strict=True):
+            for a, n in zip(linha_a, linha_n, strict=True):
+                assert a.value == n.value, f"{ws_a.title}!{a.coordinate}: {a.value!r} x {n.value!r}"
+                assert a.fill.fgColor.rgb == n.fill.fgColor.rgb and a.font.color == n.font.color, f"{ws_a.title}!{a.coordinate}: cor"
+                assert a.number_format == n.number_format, f"{ws_a.title}!{a.coordinate}: formato"
+
+def main(n_abas=10, n_linhas=5000):
+    procv = dict(obter_matriz().linhas)
+    modelos = [preparar_aba_rmb(f"{150000 + n}", gerar_aba_preparo_rmb(n_linhas, seed=n), procv) for n in range(n_abas)]
+    conferir(gerar(modelos, escrever_antigo), gerar(modelos, escrever_aba_rmb))
+    print("planilhas idênticas às da versão antiga")
+
+    # Cada saída (planilha única e cada arquivo do ZIP) pinta as linhas de novo: conta a escrita uma vez
+    for nome, escrever in (("célula a célula", escrever_antigo), ("write_row por destaque", escrever_aba_rmb)):
+        inicio = time.perf_counter()
+        gerar(modelos, escrever)
+        print(f"{n_abas} abas x {n_linhas} linhas | {nome}: {time.perf_counter() - inicio:.2f}s")
+
+    inicio = time.perf_counter()
+    for n in range(n_abas): preparar_aba_rmb(f"{150000 + n}", gerar_aba_preparo_rmb(n_linhas, seed=n), procv)
+    print(f"montagem dos modelos (uma vez, inclui gerar as abas sintéticas): {time.perf_counter() - inicio:.2f}s")
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,207 @@
+import random
+
+import numpy as np
+import pandas as pd
+from fpdf import FPDF, XPos, YPos
+from PIL import Image, ImageDraw, ImageFont
+
+# ==========================================
+# DADOS SINTÉTICOS PARA OS BENCHMARKS
+# ==========================================
+CONTAS_RMB = ['123110101', '123110102', '123110103', '123110199', '123110201', '123110301', '123110302',
+              '123110303', '123110402', '123110501', '123110502', '123110503', '123110505', '123110703',
+              '123110801', '123119910']
+
+def _valor_br(rng, valor):
+    # Mesma quantia escrita nos formatos que aparecem nas planilhas exportadas do SIAFI
+    texto = f"{valor:,.2f}"
+    forma = rng.randrange(6)
+    if forma == 0: return valor
+    if forma == 1: return texto.replace(',', '_').replace('.', ',').replace('_', '.')
+    if forma == 2: return texto
+    if forma == 3: return f'"{texto.replace(",", "_").replace(".", ",").replace("_", ".")}"'
+    if forma == 4: return f"{valor:.2f}"
+    return int(valor)
+
+def gerar_aba_ug(n_linhas=120, n_colunas=6, seed=0):
+    """Aba UG como o `pd.read_excel(..., header=None)` devolve: cabeçalho, contas e linhas soltas."""
+    rng = random.Random(seed)
+    linhas = [["MINISTÉRIO DA EDUCAÇÃO"] + [np.nan] * (n_colunas - 1),
+              ["UG", f"{150000 + seed}"] + [np.nan] * (n_colunas - 2),
+              [np.nan] * n_colunas,
+              ["Conta Contábil", "Descrição", "Saldo"] + [np.nan] * (n_colunas - 3)]
+    for _ in range(n_linhas):
+        linha = [np.nan] * n_colunas
+        tipo = rng.randrange(10)
+        conta = rng.choice(CONTAS_RMB)
+        linha[0] = float(conta) if rng.random() < 0.5 else conta
+        valor = round(rng.uniform(-5e5, 5e6), 2)
+        if tipo < 5:
+            linha[1], linha[2] = f"DESCRIÇÃO {conta} ", _valor_br(rng, valor)
+        elif tipo == 5:  # descrição e valor deslocados para a direita
+            linha[2], linha[n_colunas - 1] = "  bens diversos", _valor_br(rng, valor)
+        elif tipo == 6:  # só o valor
+            linha[rng.randrange(1, n_colunas)] = rng.choice([_valor_br(rng, valor), 0, "0", "0.0"])
+        elif tipo == 7:  # só a descrição, às vezes com espaços em branco ao lado
+            linha[1], linha[2] = "material permanente", "   "
+        elif tipo == 8:  # linha de outra conta, ou total
+            linha[0] = rng.choice(["113110101", "TOTAL", 211000000.0])
+            linha[2] = _valor_br(rng, valor)
+        # tipo 9: conta sem nenhuma outra célula
+        linhas.append(linha)
+    linhas.append([np.nan] * n_colunas)
+    return pd.DataFrame(linhas)
+
+def _valor_pdf(rng, minimo=0.0, maximo=5e6):
+    return f"{rng.uniform(minimo, maximo):,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+
+def gravar_planilha(caminho, abas):
+    # {nome_da_aba: DataFrame} -> .xlsx sem cabeçalho nem índice, como as exportações do SIAFI
+    with pd.ExcelWriter(caminho) as escritor:
+        for nome, df in abas.items(): df.to_excel(escritor, sheet_name=nome, header=False, index=False)
+
+# ==========================================
+# RELATÓRIOS PDF SINTÉTICOS
+# ==========================================
+def gerar_pdf_texto(linhas, paisagem=False, tamanho_fonte=8):
+    """PDF com camada de texto (uma linha por `linhas`), como os relatórios exportados pelos sistemas."""
+    pdf = FPDF(orientation="L" if paisagem else "P")
+    pdf.set_auto_page_break(True, margin=10)
+    pdf.add_page()
+    pdf.set_font("helvetica", size=tamanho_fonte)
+    for linha in linhas: pdf.cell(0, tamanho_fonte * 0.5, linha, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    return bytes(pdf.output())
+
+def gerar_pdf_imagem(linhas, linhas_por_pagina=45):
+    """PDF só com imagens (relatório escaneado): sem texto extraível, cada página vai para o OCR."""
+    pdf = FPDF()
+    fonte = ImageFont.load_default(size=22)
+    for inicio in range(0, max(len(linhas), 1), linhas_por_pagina):
+        img = Image.new("L", (1240, 1754), 255)  # A4 a 150 dpi
+        desenho = ImageDraw.Draw(img)
+        for i, linha in enumerate(linhas[inicio:inicio + linhas_por_pagina]):
+            desenho.text((60, 60 + i * 36), linha, fill=0, font=fonte)
+        pdf.add_page()
+        pdf.image(img, x=0, y=0, w=210, h=297)
+    return bytes(pdf.output())
+
+def linhas_rmb(chaves, seed=0):
+    # Linhas de item do RMB: código terminado na chave de vínculo e ao menos 4 valores (o saldo é o 4º do fim)
+    rng = random.Random(seed)
+    linhas = ["RELATÓRIO DE MOVIMENTAÇÃO DE BENS MÓVEIS - RMB", "ITEM DESCRIÇÃO SALDO ANTERIOR ENTRADAS SAÍDAS SALDO ATUAL DEPRECIAÇÃO"]
+    for chave in chaves:
+        valores = " ".join(_valor_pdf(rng) for _ in range(6))
+        linhas.append(f"44905201{int(chave):02d} MATERIAL PERMANENTE ITEM {chave} {valores}")
+    return linhas
+
+def gerar_pdf_tabela_rmb(chaves, seed=0, celulas_vazias=0.0, valores_quebrados=0.0):
+    """RMB em tabela de colunas fixas com os números alinhados à direita; devolve (pdf_bytes, {chave: saldo}).
+
+    `celulas_vazias`: fração das células fora do saldo que saem em branco. `valores_quebrados`: fração dos
+    itens cujos valores ficam na linha de baixo da descrição.
+    """
+    rng = random.Random(seed)
+    larguras = [26, 66] + [30] * 6
+    pdf = FPDF(orientation="L")
+    pdf.set_auto_page_break(True, margin=10)
+    pdf.add_page()
+    pdf.set_font("helvetica", size=7)
+
+    def linha(celulas):
+        for i, (largura, texto) in enumerate(zip(larguras, celulas)): pdf.cell(largura, 4, texto, align="L" if i < 2 else "R")
+        pdf.ln(4)
+
+    pdf.cell(0, 5, "RELATÓRIO DE MOVIMENTAÇÃO DE BENS MÓVEIS - RMB", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    linha(["ITEM", "DESCRIÇÃO", "SALDO ANTERIOR", "ENTRADAS", "SALDO ATUAL", "SAÍDAS", "DEPRECIAÇÃO", "VALOR LÍQUIDO"])
+    esperado = {}
+    for chave in chaves:
+        valores = [_valor_pdf(rng) for _ in range(6)]
+        valores = [v if i == 2 or rng.random() >= celulas_vazias else "" for i, v in enumerate(valores)]
+        esperado[int(chave)] = esperado.get(int(chave), 0.0) + float(valores[2].replace('.', '').replace(',', '.'))
+        codigo, descricao = f"44905201{int(chave):02d}", f"MATERIAL PERMANENTE ITEM {chave}"
+        if rng.random() < valores_quebrados:
+            linha([codigo, descricao])
+            linha(["", ""] + valores)
+        else:
+            linha([codigo, descricao] + valores)
+    return bytes(pdf.output()), esperado
+
+def linhas_depreciacao(grupos, seed=0):
+    # Um bloco por grupo: rótulos com os 12 meses e o "(*) SALDO ATUAL" no fim
+    rng = random.Random(seed)
+    linhas = []
+    for grupo in grupos:
+        linhas.append(f"{grupo} - GRUPO PATRIMONIAL {grupo}")
+        for rotulo in ("SALDO INICIAL", "DEPRECIAÇÃO MÊS CORRENTE", "ENTRADAS (TRANSFERÊNCIA)", "SAÍDAS (TRANSFERÊNCIA)", "SAÍDAS (BAIXAS)"):
+            linhas.append(rotulo + " " + " ".join(_valor_pdf(rng, 0, 9e4) for _ in range(12)))
+        linhas.append(f"(*) SALDO ATUAL {_valor_pdf(rng)}")
+    return linhas
+
+def linhas_almoxarifado(n_contas, seed=0):
+    rng = random.Random(seed)
+    return ["INVENTÁRIO DO ALMOXARIFADO - SALDO POR CONTA CONTÁBIL"] + \
+           [f"3390300{c:02d} - MATERIAL DE CONSUMO {c} {_valor_pdf(rng, 0, 2e5)} {_valor_pdf(rng, 0, 2e5)}" for c in range(1, n_contas + 1)]
+
+def linhas_biblioteca(ano, depreciacao=False, seed=0):
+    rng = random.Random(seed)
+    if depreciacao:
+        return ["DEPRECIAÇÃO DO ACERVO BIBLIOGRÁFICO"] + [f"{m:02d}/{ano} {_valor_pdf(rng, 0, 9e4)} {_valor_pdf(rng)}" for m in range(1, 13)]
+    meses = ["Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]
+    return ["Pergamum - Relatório de Acervo"] + [f"{m} {rng.randrange(10, 999)} {_valor_pdf(rng)}" for m in meses] + [f"TOTAL {_valor_pdf(rng)}"]
+
+# ==========================================
+# ABAS SINTÉTICAS DAS OUTRAS CONCILIAÇÕES
+# ==========================================
+def gerar_aba_depreciacao(contas, seed=0):
+    # Conta contábil (12...), descrição e os dois últimos valores: movimento do mês e saldo
+    rng = random.Random(seed)
+    return pd.DataFrame([[conta, f"DEPRECIAÇÃO ACUMULADA {conta}", round(rng.uniform(-9e4, 0), 2), round(rng.uniform(-5e6, 0), 2)] for conta in contas])
+
+def gerar_aba_almoxarifado(n_contas, seed=0):
+    rng = random.Random(seed)
+    linhas = [["SALDO DE ALMOXARIFADO", np.nan, np.nan, np.nan, np.nan],
+              ["Conta Corrente", "Descrição", np.nan, np.nan, "Saldo"]]
+    linhas += [[c, f"MATERIAL DE CONSUMO {c}", np.nan, np.nan, _valor_br(rng, round(rng.uniform(0, 2e5), 2))] for c in range(1, n_contas + 1)]
+    return pd.DataFrame(linhas)
+
+def gerar_planilha_preparo_depreciacao(contas, n_abas=3, n_linhas=2000, seed=0):
+    """Bytes de um .xlsx como o exportado do SIAFI para a página 3: 7 linhas de título, cabeçalho na 8ª e as contas a partir da 9ª."""
+    import io
+    import openpyxl
+    from openpyxl.styles import Font
+
+    rng = random.Random(seed)
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for n in range(n_abas):
+        ws = wb.create_sheet(f"{153000 + n}")
+        ws.append(["MINISTÉRIO DA EDUCAÇÃO"])
+        ws.merge_cells("A1:C1")
+        ws.row_dimensions[1].height = 24
+        ws.append([f"UG {153000 + n}"])
+        ws.append(["Depreciação acumulada"])
+        for _ in range(4): ws.append([])
+        ws.append(["Conta Contábil", "Movimento", "Saldo"])
+        for c in ws[8]: c.font = Font(bold=True)
+        for _ in range(n_linhas):
+            conta = rng.choice(contas + ["123110402", "123110402", "129999999", "TOTAL GERAL"])
+            forma = rng.randrange(4)
+            if forma == 1 and str(conta).isdigit(): conta = int(conta)
+            elif forma == 2: conta = f" {conta} "
+            ws.append([conta, round(rng.uniform(-9e4, 0), 2), round(rng.uniform(-5e6, 0), 2)])
+        for linha in ws.iter_rows(min_row=9, min_col=2, max_col=3):
+            for c in linha: c.number_format = "#,##0.00"
+    saida = io.BytesIO()
+    wb.save(saida)
+    return saida.getvalue()
+
+def gerar_aba_preparo_rmb(n_linhas=2000, seed=0):
+    """Aba como a página 1 (RMB) lê com header=None: 7 linhas de título e as contas com descrição e saldo a partir da 8ª."""
+    rng = random.Random(seed)
+    linhas = [["MINISTÉRIO DA EDUCAÇÃO", np.nan, np.nan], [f"UG {150000 + seed}", np.nan, np.nan]] + [[np.nan] * 3] * 4
+    linhas.append(["Conta Contábil", "Descrição", "Saldo"])
+    for _ in range(n_linhas):
+        conta = rng.choice(CONTAS_RMB + ['123119905', '123110801'])
+        valor = rng.choice([0.0, round(rng.uniform(-5e5, 5e6), 2), round(rng.uniform(0, 5e6), 2)])
+        linhas.append([int(conta), f"DESCRIÇÃO {conta}", valor])
+    return pd.DataFrame(linhas)
@@ -0,0 +1,6 @@
+import sys
+
+from conciliador_core.lote import main
+
+# python -m conciliador_core ...  (ver conciliador_core/lote.py)
+sys.exit(main())
@@ -0,0 +1,259 @@
+import re
+
+import pandas as pd
+from fpdf import XPos, YPos
+
+from conciliador_core import ingestao
+from conciliador_core.arquivos import IndiceArquivos, ler_bytes
+from conciliador_core.memoria import Saldos
+from conciliador_core.pdf_texto import extrair_paginas
+from conciliador_core.relatorio import PDF_Report
+from conciliador_core.valores import converter_coluna, formatar_real, limpar_valor
+
+# ==========================================
+# CONCILIAÇÃO ALMOXARIFADO x SIAFI (SEM INTERFACE)
+# ==========================================
+TITULO_RELATORIO = 'Relatório de Conferência: Almoxarifado x SIAFI'
+
+def pagina_precisa_ocr(txt):
+    tem_dados_validos = bool(txt) and re.search(r'\d{1,3}(?:[.,]\d{3})*[.,]\d{2}', txt) is not None
+    return not txt or not tem_dados_validos or len(txt) < 50
+
+def parear(planilha_siafi, pdfs):
+    """Junta cada aba com número de UG ao PDF com o mesmo número no nome (ver IndiceArquivos); devolve (pares, logs)."""
+    pares, logs = [], []
+    indice = IndiceArquivos(pdfs)
+    ugs = set()
+    for aba in planilha_siafi.abas:
+        match = re.search(r'(\d+)', aba)
+        if match:
+            ug = match.group(1)
+            ugs.add(ug)
+            pdf_match = indice.primeiro(ug)
+
+            if pdf_match:
+                pares.append({'ug': ug, 'nome_aba': aba, 'pdf': pdf_match})
+            else:
+                logs.append(f"⚠️ Aba '{aba}' (UG {ug}): Planilha encontrada, mas falta o PDF correspondente.")
+        else:
+            logs.append(f"ℹ️ Aba '{aba}' ignorada: Não foi encontrado um número de UG no nome da aba.")
+    logs += [f"⚠️ {aviso}" for aviso in indice.avisos(ugs)]
+    return pares, logs
+
+def ler_aba(df_raw):
+    # Saldo por conta corrente (2 dígitos) abaixo do cabeçalho 'Conta Corrente'; None se não houver cabeçalho
+    idx_cabecalho = df_raw[df_raw.apply(lambda r: r.astype(str).str.contains('Conta Corrente', case=False).any(), axis=1)].index
+    if idx_cabecalho.empty: return None
+
+    df_raw.columns = df_raw.iloc[idx_cabecalho[0]]
+    df = df_raw.iloc[idx_cabecalho[0]+1:].reset_index(drop=True)
+
+    df['Conta_Corrente'] = df.iloc[:, 0].astype(str).str.replace(r'\.0$', '', regex=True).str.strip().str.zfill(2)
+    df['Valor_Limpo'] = converter_coluna(df.iloc[:, 4])[0]
+    df['Descricao_Excel'] = "Conta Corrente " + df['Conta_Corrente']
+
+    df = df[df['Conta_Corrente'] != 'NAN']
+    df = df[df['Conta_Corrente'].str.isnumeric()]
+
+    df_padrao = df.groupby('Conta_Corrente').agg({'Valor_Limpo': 'sum', 'Descricao_Excel': 'first'}).reset_index()
+    df_padrao.columns = ['Chave_Vinculo', 'Saldo_Excel', 'Descricao_Completa']
+    return df_padrao
+
+def ler_pdf(pdf_bytes, ao_progredir=None):
+    # Saldo atual (último valor da linha) de cada conta, somado pelos 2 últimos dígitos
+    dados_pdf = []
+    for txt, is_ocr in extrair_paginas(pdf_bytes, perfil="almoxarifado", precisa_ocr=pagina_precisa_ocr, detectar_rotacao=True, ao_progredir=ao_progredir):
+        if not txt: continue
+
+        for line in txt.split('\n'):
+            if re.match(r'^"?\d+"?\s*[-]?\s*[A-Za-z]', line) or re.match(r'^"?\d+', line):
+                vals = []
+                if is_ocr:
+                    vals_raw = re.findall(r'([\d\.\s]+,\d{2})', line)
+                    vals = [v.replace(' ', '') for v in vals_raw]
+                else:
+                    vals = re.findall(r'([0-9]{1,3}(?:[.,][0-9]{3})*[.,]\d{2})', line)
+
+                if len(vals) >= 1:
+                    chave_match = re.match(r'^"?(\d+)', line)
+                    if chave_match:
+                        conta_contabil_completa = chave_match.group(1)
+                        chave_vinculo = str(conta_contabil_completa[-2:]).zfill(2)
+                        saldo_atual_pdf = limpar_valor(vals[-1])
+
+                        dados_pdf.append({'Chave_Vinculo': chave_vinculo, 'Saldo_PDF': saldo_atual_pdf})
+
+    if dados_pdf:
+        return pd.DataFrame(dados_pdf).groupby('Chave_Vinculo')['Saldo_PDF'].sum().reset_index()
+    return pd.DataFrame()
+
+class DadosUG:
+    """O que a revisão guarda de uma UG: saldos da planilha e do relatório (ver memoria.Saldos) e as chaves divergentes na leitura.
+
+    As correções do usuário ficam em `pdf.edicoes`; o saldo lido do relatório continua em `pdf.original(chave)`.
+    """
+    __slots__ = ('nome_aba', 'excel', 'pdf', 'chaves_com_erro', 'erro_original')
+
+    def __init__(self, nome_aba, excel, pdf, chaves_com_erro):
+        self.nome_aba, self.excel, self.pdf = nome_aba, excel, pdf
+        self.chaves_com_erro, self.erro_original = chaves_com_erro, len(chaves_com_erro) > 0
+
+def montar_ug(nome_aba, df_padrao, df_pdf_final):
+    # Dados de uma UG guardados para a revisão, com as chaves divergentes na primeira leitura
+    if df_padrao.empty: df_padrao = pd.DataFrame(columns=['Chave_Vinculo', 'Saldo_Excel', 'Descricao_Completa'])
+    if df_pdf_final.empty: df_pdf_final = pd.DataFrame(columns=['Chave_Vinculo', 'Saldo_PDF'])
+
+    df_padrao['Chave_Vinculo'] = df_padrao['Chave_Vinculo'].astype(str)
+    df_pdf_final['Chave_Vinculo'] = df_pdf_final['Chave_Vinculo'].astype(str)
+
+    cruzamento_temp = pd.merge(df_pdf_final, df_padrao, on='Chave_Vinculo', how='outer').fillna(0)
+    chaves_com_erro = cruzamento_temp[abs(cruzamento_temp['Saldo_PDF'] - cruzamento_temp['Saldo_Excel']) > 0.05]['Chave_Vinculo'].tolist()
+
+    return DadosUG(nome_aba, Saldos.de_dataframe(df_padrao, 'Chave_Vinculo', 'Saldo_Excel', 'Descricao_Completa', tipo_chave=str),
+                   Saldos.de_dataframe(df_pdf_final, 'Chave_Vinculo', 'Saldo_PDF', tipo_chave=str), chaves_com_erro)
+
+def processar(pares, planilha_siafi, ao_progredir=None):
+    """Lê a aba e o PDF de cada par e devolve (dados_ug, logs).
+
+    `ao_progredir(texto, fracao)` recebe a mensagem de status e/ou a fração concluída (um dos dois pode ser None).
+    """
+    avisar = ao_progredir or (lambda texto, fracao: None)
+    dados_ug = {}
+    logs = []
+
+    for idx, par in enumerate(pares):
+        ug = par['ug']
+        nome_aba = par['nome_aba']
+        avisar(f"Processando Aba '{nome_aba}' (UG: {ug})...", None)
+
+        # === 1. LEITURA EXCEL ===
+        df_padrao = pd.DataFrame()
+        try:
+            df_lido = ler_aba(planilha_siafi.ler(nome_aba))
+            if df_lido is not None: df_padrao = df_lido
+            else: logs.append(f"⚠️ Aba '{nome_aba}' (UG {ug}): Cabeçalho 'Conta Corrente' não encontrado.")
+        except Exception as e:
+            logs.append(f"❌ Erro na leitura da Aba '{nome_aba}' (UG {ug}): {e}")
+
+        # === 2. LEITURA PDF ===
+        def progresso_ocr(feitas, total, idx=idx, ug=ug, nome_aba=nome_aba):
+            avisar(f"Processando Aba '{nome_aba}' (UG: {ug}) - OCR: página {feitas} de {total}...", (idx + feitas / total) / len(pares))
+
+        df_pdf_final = pd.DataFrame()
+        try:
+            df_pdf_final = ingestao.obter(ler_bytes(par['pdf']), ler_pdf, progresso_ocr)
+        except Exception as e:
+            logs.append(f"❌ Erro Leitura PDF UG {ug}: {e}")
+
+        # === 3. PREPARAÇÃO PARA MEMÓRIA ===
+        dados_ug[ug] = montar_ug(nome_aba, df_padrao, df_pdf_final)
+        avisar(None, (idx + 1) / len(pares))
+
+    return dados_ug, logs
+
+# ==========================================
+# CRUZAMENTO E RELATÓRIO
+# ==========================================
+def conciliar_ug(info):
+    """Cruzamento atual (com as edições de `info.pdf` já aplicadas) e seus totais.
+
+    Os totais usam todas as chaves; `final` guarda só as linhas divergentes e as de `info.chaves_com_erro`.
+    """
+    df_excel = info.excel.dataframe('Chave_Vinculo', 'Saldo_Excel', 'Descricao_Completa')
+    cruzamento = pd.merge(info.pdf.dataframe('Chave_Vinculo', 'Saldo_PDF'), df_excel, on='Chave_Vinculo', how='outer').fillna(0)
+    cruzamento['Diferenca'] = (cruzamento['Saldo_PDF'] - cruzamento['Saldo_Excel']).round(2)
+    soma_pdf = cruzamento['Saldo_PDF'].sum()
+    soma_excel = cruzamento['Saldo_Excel'].sum()
+
+    final = cruzamento[(abs(cruzamento['Diferenca']) > 0.05) | cruzamento['Chave_Vinculo'].isin(info.chaves_com_erro)].reset_index(drop=True)
+    final.insert(len(final.columns) - 1, 'Descricao', [d if d != 0 else f"Conta {c} (Sem no Excel)" for c, d in zip(final['Chave_Vinculo'], final['Descricao_Completa'])])
+    return {'final': final, 'soma_pdf': soma_pdf, 'soma_excel': soma_excel, 'dif_total': soma_pdf - soma_excel}
+
+def escrever_ug(pdf_out, ug, info, conciliacao):
+    final = conciliacao['final']
+
+    pdf_out.set_font("helvetica", 'B', 11)
+    pdf_out.set_fill_color(240, 240, 240)
+    pdf_out.cell(0, 10, text=f"Unidade Gestora: {ug} (Aba: {info.nome_aba})", border=1, new_x=XPos.LMARGIN, new_y=YPos.NEXT, fill=True)
+
+    mask_mostrar = (abs(final['Diferenca']) > 0.05) | (final['Chave_Vinculo'].isin(info.chaves_com_erro))
+    itens_para_mostrar = final[mask_mostrar].copy()
+
+    if not itens_para_mostrar.empty:
+        pdf_out.set_font("helvetica", 'B', 9)
+        pdf_out.set_fill_color(255, 200, 200)
+        pdf_out.cell(15, 8, "Chave", 1, fill=True)
+        pdf_out.cell(85, 8, "Descrição (Conta Corrente)", 1, fill=True)
+        pdf_out.cell(30, 8, "Saldo relatório", 1, fill=True, align='C')
+        pdf_out.cell(30, 8, "Saldo SIAFI", 1, fill=True, align='C')
+        pdf_out.cell(30, 8, "Diferença", 1, fill=True, align='C', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+        pdf_out.set_font("helvetica", '', 8)
+        alertas_auditoria = []
+
+        for _, row in itens_para_mostrar.iterrows():
+            chave = row['Chave_Vinculo']
+            val_original = info.pdf.original(chave)
+            editado = abs(row['Saldo_PDF'] - val_original) > 0.01
+
+            str_saldo_relatorio = formatar_real(row['Saldo_PDF']) + (" *" if editado else "")
+
+            pdf_out.cell(15, 7, str(chave), 1)
+            pdf_out.cell(85, 7, str(row['Descricao'])[:48], 1)
+            pdf_out.cell(30, 7, str_saldo_relatorio, 1, align='R')
+            pdf_out.cell(30, 7, formatar_real(row['Saldo_Excel']), 1, align='R')
+            if abs(row['Diferenca']) > 0.05: pdf_out.set_text_color(200, 0, 0)
+            pdf_out.cell(30, 7, formatar_real(row['Diferenca']), 1, align='R', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+            pdf_out.set_text_color(0, 0, 0)
+
+            if editado:
+                alertas_auditoria.append(f"* ALERTA: O valor da Conta {chave} foi alterado manualmente pelo utilizador. (Valor original lido do relatório: R$ {formatar_real(val_original)})")
+
+        # Impressão dos alertas de auditoria no PDF
+        if alertas_auditoria:
+            pdf_out.set_font("helvetica", 'I', 7)
+            pdf_out.set_text_color(180, 0, 0)
+            for alerta in alertas_auditoria:
+                pdf_out.cell(0, 5, alerta, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+            pdf_out.set_text_color(0, 0, 0)
+    else:
+        pdf_out.set_font("helvetica", 'I', 9)
+        pdf_out.cell(0, 8, "Nenhuma divergência encontrada nas contas.", 1, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf_out.ln(2)
+    pdf_out.set_font("helvetica", 'B', 9)
+    pdf_out.set_fill_color(220, 230, 241)
+    pdf_out.cell(100, 8, "TOTAIS", 1, fill=True)
+    pdf_out.cell(30, 8, formatar_real(conciliacao['soma_pdf']), 1, fill=True, align='R')
+    pdf_out.cell(30, 8, formatar_real(conciliacao['soma_excel']), 1, fill=True, align='R')
+    if abs(conciliacao['dif_total']) > 0.05: pdf_out.set_text_color(200, 0, 0)
+    pdf_out.cell(30, 8, formatar_real(conciliacao['dif_total']), 1, fill=True, align='R', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf_out.set_text_color(0, 0, 0)
+    pdf_out.ln(5)
+
+def gerar_relatorio(dados_ug, conciliacoes=None):
+    # `conciliacoes` ({ug: conciliar_ug(info)}) evita refazer o cruzamento já feito na revisão
+    conciliacoes = conciliacoes or {}
+    pdf_out = PDF_Report(TITULO_RELATORIO)
+    pdf_out.add_page()
+    for ug, info in dados_ug.items(): escrever_ug(pdf_out, ug, info, conciliacoes.get(ug) or conciliar_ug(info))
+    return bytes(pdf_out.output())
+
+def resumo(dados_ug):
+    """Totais e contas divergentes de cada UG, para exportação (JSON/CSV)."""
+    unidades = []
+    for ug, info in dados_ug.items():
+        conc = conciliar_ug(info)
+        final = conc['final']
+        divergentes = final[abs(final['Diferenca']) > 0.05]
+        unidades.append({
+            'ug': ug,
+            'aba': info.nome_aba,
+            'total_relatorio': round(float(conc['soma_pdf']), 2),
+            'total_siafi': round(float(conc['soma_excel']), 2),
+            'diferenca': round(float(conc['dif_total']), 2),
+            'divergencias': [{'ug': ug, 'item': str(r['Chave_Vinculo']), 'descricao': str(r['Descricao']),
+                              'valor_relatorio': round(float(r['Saldo_PDF']), 2), 'valor_siafi': round(float(r['Saldo_Excel']), 2),
+                              'diferenca': float(r['Diferenca'])} for _, r in divergentes.iterrows()]
+        })
+    return unidades
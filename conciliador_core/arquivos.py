@@ -0,0 +1,82 @@
+import os
+import re
+
+# ==========================================
+# ARQUIVOS DE ENTRADA (UPLOAD OU DISCO)
+# ==========================================
+def ler_bytes(arquivo):
+    """Conteúdo de um upload do Streamlit, de um arquivo aberto, de um caminho ou de bytes já lidos."""
+    if isinstance(arquivo, (bytes, bytearray)): return bytes(arquivo)
+    if isinstance(arquivo, (str, os.PathLike)):
+        with open(arquivo, "rb") as f: return f.read()
+    arquivo.seek(0)
+    return arquivo.read()
+
+def nome_arquivo(arquivo):
+    # Nome como aparece no upload (sem pastas), também para caminhos em disco
+    if isinstance(arquivo, (str, os.PathLike)): return os.path.basename(arquivo)
+    return arquivo.name
+
+# ==========================================
+# ÍNDICE DOS ARQUIVOS PELA UG DO NOME
+# ==========================================
+_RE_UG_NO_NOME = re.compile(r'(\d+)')
+_RE_SUFIXO_BIBLIOTECA = re.compile(r'(a|d)?(\d*)')
+
+def identificar_arquivo(nome):
+    """(ug, tipo, sufixo) pelo nome do arquivo; a UG é o primeiro número do nome (None se não houver).
+
+    Nomes `<ug>.pdf`, `<ug>a<n>.pdf` são do tipo "acervo" e `<ug>d<n>.pdf` do tipo "dep" (sufixo = n);
+    nos demais o tipo é None e o sufixo é o texto depois da UG.
+    """
+    base = os.path.splitext(os.path.basename(nome))[0].lower()
+    match = _RE_UG_NO_NOME.search(base)
+    if not match: return None, None, base
+    prefixo, resto = base[:match.start()], base[match.end():]
+    sufixo = _RE_SUFIXO_BIBLIOTECA.fullmatch(resto)
+    if prefixo or not sufixo: return match.group(1), None, resto
+    return match.group(1), "dep" if sufixo.group(1) == "d" else "acervo", sufixo.group(2)
+
+class IndiceArquivos:
+    """Arquivos enviados indexados pela UG do nome, com cada nome interpretado uma só vez (ver identificar_arquivo).
+
+    A busca é exata pela UG (a UG 1532 não casa com 153289.pdf). `arquivos` é um dicionário
+    nome -> arquivo (upload, caminho ou bytes), na ordem do envio.
+    """
+    def __init__(self, arquivos):
+        self.por_ug = {}   # ug -> [(nome, tipo, sufixo, arquivo)]
+        self.sem_ug = []
+        for nome, arquivo in arquivos.items():
+            ug, tipo, sufixo = identificar_arquivo(nome)
+            if ug is None: self.sem_ug.append(nome)
+            else: self.por_ug.setdefault(ug, []).append((nome, tipo, sufixo, arquivo))
+
+    def arquivos(self, ug, tipo=None):
+        # [(nome, arquivo)] da UG na ordem do envio; com `tipo`, só os desse tipo
+        return [(nome, arquivo) for nome, t, _, arquivo in self.por_ug.get(ug, ()) if tipo is None or t == tipo]
+
+    def primeiro(self, ug):
+        encontrados = self.arquivos(ug)
+        return encontrados[0][1] if encontrados else None
+
+    def orfaos(self, ugs):
+        """Nomes dos arquivos sem número no nome ou cuja UG não está em `ugs`."""
+        return self.sem_ug + [nome for ug, lista in self.por_ug.items() if ug not in ugs for nome, *_ in lista]
+
+    def duplicados(self, por_tipo=False):
+        """{ug: [nomes]} das UGs com mais de um arquivo (com `por_tipo`, mais de um com o mesmo tipo e sufixo)."""
+        repetidos = {}
+        for ug, lista in self.por_ug.items():
+            grupos = {}
+            for nome, tipo, sufixo, _ in lista: grupos.setdefault((tipo, sufixo) if por_tipo else None, []).append(nome)
+            nomes = [nome for grupo in grupos.values() if len(grupo) > 1 for nome in grupo]
+            if nomes: repetidos[ug] = nomes
+        return repetidos
+
+    def avisos(self, ugs, por_tipo=False):
+        # Mensagens sobre arquivos ignorados e repetidos; sem `por_tipo`, quem pareia usa o primeiro arquivo da UG
+        mensagens = [f"Arquivo ignorado: '{nome}' não corresponde a nenhuma UG da planilha." for nome in self.orfaos(ugs)]
+        for ug, nomes in self.duplicados(por_tipo).items():
+            if ug in ugs:
+                mensagens.append(f"Arquivos repetidos para a UG {ug}: {', '.join(nomes)}." + ("" if por_tipo else f" Foi usado '{nomes[0]}'."))
+        return mensagens
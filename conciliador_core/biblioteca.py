@@ -0,0 +1,304 @@
+import re
+from collections import deque
+
+import pandas as pd
+from fpdf import XPos, YPos
+
+from conciliador_core.arquivos import IndiceArquivos, ler_bytes, nome_arquivo
+from conciliador_core.pdf_texto import iterar_linhas
+from conciliador_core.relatorio import PDF_Report
+from conciliador_core.valores import formatar_real, limpar_valor_excel, limpar_valor_pdf
+
+# ==========================================
+# CONCILIAÇÃO ACERVO BIBLIOGRÁFICO (SEM INTERFACE)
+# ==========================================
+TITULO_RELATORIO = 'Relatório de Conferência Biblioteca'
+MESES = ["Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]
+MESES_ABREV = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
+
+def textos_busca(idx_mes, ano):
+    # (mês por extenso, mês abreviado) para o Acervo e "MM/AAAA" para a Depreciação
+    return MESES[idx_mes], MESES_ABREV[idx_mes], f"{idx_mes + 1:02d}/{ano}"
+
+def _linhas_legiveis(pdf_bytes):
+    # PDF ilegível termina a leitura sem erro, como um relatório sem o mês procurado
+    try:
+        yield from iterar_linhas(pdf_bytes)
+    except Exception:
+        return
+
+def _janelas(linhas, tamanho):
+    # (linha, próximas tamanho-1 linhas) de cada linha, sem guardar mais que `tamanho` linhas na memória
+    janela = deque()
+    for linha in linhas:
+        janela.append(linha)
+        if len(janela) == tamanho:
+            yield janela[0], list(janela)[1:]
+            janela.popleft()
+    while janela:
+        yield janela[0], list(janela)[1:]
+        janela.popleft()
+
+# Linha que abre o mês no relatório do Acervo (por extenso antes do abreviado, para "MARÇO" não parar em "MAR")
+_RE_LINHA_MES = re.compile(r'^[\d\s\W]*(' + '|'.join(m.upper() for m in MESES + MESES_ABREV) + r')\b')
+_IDX_MES = {m.upper(): i % 12 for i, m in enumerate(MESES + MESES_ABREV)}
+_RE_LINHA_TOTAL = re.compile(r'^[\d\s\W]*TOTAL\b')
+# Competência "MM/AAAA" que abre a linha no relatório de Depreciação
+_RE_LINHA_COMPETENCIA = re.compile(r'^\d{2}/\d{4}')
+
+def _valor_do_bloco(line_clean, proximas_linhas, is_dep):
+    # Último valor monetário da linha e das seguintes, até o próximo mês/total/rodapé (None se não houver)
+    bloco_texto = line_clean
+
+    for proxima in proximas_linhas:
+        proxima = proxima.strip().replace('"', '')
+        if not proxima: continue
+        if not is_dep:
+            if re.match(r'^(Janeiro|Fevereiro|Março|Abril|Maio|Junho|Julho|Agosto|Setembro|Outubro|Novembro|Dezembro|Jan\.?|Fev\.?|Mar\.?|Abr\.?|Mai\.?|Jun\.?|Jul\.?|Ago\.?|Set\.?|Out\.?|Nov\.?|Dez\.?|TOTAL|Pag\.|Página|Pergamum|Sistema|Emissão|Data)', proxima, re.IGNORECASE):
+                break
+        else:
+            if re.match(r'^(\d{2}/\d{4}|TOTAL|Pag\.|Página|Pergamum|Sistema|Emissão|Data)', proxima, re.IGNORECASE):
+                break
+        bloco_texto += " " + proxima
+
+    bloco_texto = re.sub(r'(\.\d{3})\s+(?=\d{3}[.,]\d{2}(?!\d))', r'\1', bloco_texto)
+    matches = [m for m in re.findall(r'[\d\.,]+', bloco_texto) if any(c.isdigit() for c in m)]
+
+    for m in reversed(matches):
+        v_clean = re.sub(r'[^\d\.,]', '', m).rstrip('.,')
+        if len(v_clean) >= 3 and v_clean[-3] in ['.', ',']:
+            return limpar_valor_pdf(v_clean)
+    return None
+
+def extrair_meses_pdf(pdf_bytes, is_dep=False):
+    """Valores de todos os meses de um relatório, numa só leitura.
+
+    Acervo: lista com o maior valor de cada mês (0.0 se o mês não aparece), somando as linhas TOTAL aos meses já vistos.
+    Depreciação: {"MM/AAAA": último valor da competência}.
+    """
+    valores = {}  # mês (índice ou "MM/AAAA") -> valores na ordem em que aparecem
+
+    for line, proximas_linhas in _janelas(_linhas_legiveis(pdf_bytes), 30):
+        line_clean = line.strip().replace('"', '')
+        if not line_clean: continue
+
+        if not is_dep:
+            match = _RE_LINHA_MES.search(line_clean.upper())
+            if match: meses = [_IDX_MES[match.group(1)]]
+            elif valores and _RE_LINHA_TOTAL.match(line_clean.upper()): meses = list(valores)
+            else: continue
+        else:
+            match = _RE_LINHA_COMPETENCIA.match(line_clean.upper())
+            if not match: continue
+            meses = [match.group(0)]
+
+        valor_real = _valor_do_bloco(line_clean, proximas_linhas, is_dep)
+        for mes in meses:
+            valores.setdefault(mes, [])
+            if valor_real is not None: valores[mes].append(valor_real)
+
+    if is_dep:
+        return {mes: v[-1] for mes, v in valores.items() if v}
+    return [max(valores[i]) if valores.get(i) else 0.0 for i in range(12)]
+
+def valor_do_mes(valores, idx_mes, ano):
+    # Valor do mês no resultado de extrair_meses_pdf (lista do Acervo ou dicionário da Depreciação)
+    if isinstance(valores, list): return valores[idx_mes]
+    return valores.get(textos_busca(idx_mes, ano)[2], 0.0)
+
+def ler_planilha(planilha_mestre):
+    """dados_ug com os saldos SIAFI de cada UG (linhas cuja 1ª coluna tem 5+ dígitos) da planilha base."""
+    if hasattr(planilha_mestre, "seek"): planilha_mestre.seek(0)
+    if nome_arquivo(planilha_mestre).lower().endswith('.csv'):
+        df = pd.read_csv(planilha_mestre)
+    else:
+        df = pd.read_excel(planilha_mestre, header=None)
+
+    dados_ug = {}
+    for idx, row in df.iterrows():
+        val0 = str(row[0]).strip()
+        if val0.isdigit() and len(val0) >= 5:
+            ug = val0
+            nome = str(row[1]).strip()
+            saldo_acervo = limpar_valor_excel(row[2]) if len(row) > 2 else 0.0
+            saldo_dep = limpar_valor_excel(row[3]) if len(row) > 3 else 0.0
+
+            dados_ug[ug] = {
+                'nome': nome,
+                'ex_acervo': saldo_acervo,
+                'ex_dep': abs(saldo_dep),
+                'pdf_acervo': 0.0,
+                'pdf_dep': 0.0,
+                'original_pdf_acervo': 0.0,
+                'original_pdf_dep': 0.0,
+                'arquivos_acervo_somados': 0,
+                'arquivos_dep_somados': 0,
+                'detalhes_acervo': {},
+                'detalhes_dep': {},
+                'erro_original_acervo': False,
+                'erro_original_dep': False
+            }
+    return dados_ug
+
+def extrair_pdfs(dados_ug, pdfs, ao_progredir=None):
+    """Todos os meses dos PDFs de Acervo (`<ug>[a<n>].pdf`) e Depreciação (`<ug>d<n>.pdf`) de cada UG (ver IndiceArquivos).
+
+    Devolve {ug: {'acervo': {nome: valores}, 'dep': {nome: valores}}}; cada mês sai daí com `preencher_mes`.
+    `pdfs` é um dicionário nome em minúsculas -> arquivo. `ao_progredir(texto, fracao)` recebe a fração concluída.
+    """
+    avisar = ao_progredir or (lambda texto, fracao: None)
+    indice = IndiceArquivos(pdfs)
+    extraidos = {}
+    total_ugs = len(dados_ug)
+
+    for i, ug in enumerate(dados_ug):
+        extraidos[ug] = {
+            'acervo': {nome: extrair_meses_pdf(ler_bytes(f)) for nome, f in indice.arquivos(ug, "acervo")},
+            'dep': {nome: extrair_meses_pdf(ler_bytes(f), is_dep=True) for nome, f in indice.arquivos(ug, "dep")}
+        }
+        avisar(None, (i + 1) / total_ugs)
+    return extraidos
+
+def preencher_mes(dados_ug, extraidos, idx_mes, ano):
+    """Soma nos dados_ug (recém-lidos da planilha) os valores do mês vindos de `extrair_pdfs`; devolve os logs."""
+    logs = []
+
+    for ug, info in dados_ug.items():
+        # Acervo
+        for nome, valores in extraidos[ug]['acervo'].items():
+            info['arquivos_acervo_somados'] += 1
+            valor_extraido = valor_do_mes(valores, idx_mes, ano)
+            info['pdf_acervo'] += valor_extraido
+            info['detalhes_acervo'][nome] = valor_extraido
+        if info['arquivos_acervo_somados'] == 0: logs.append(f"⚠️ UG {ug}: Faltou o PDF do Acervo.")
+
+        # Depreciação
+        for nome, valores in extraidos[ug]['dep'].items():
+            info['arquivos_dep_somados'] += 1
+            valor_extraido = valor_do_mes(valores, idx_mes, ano)
+            info['pdf_dep'] += valor_extraido
+            info['detalhes_dep'][nome] = valor_extraido
+        if info['arquivos_dep_somados'] == 0: logs.append(f"⚠️ UG {ug}: Faltou o PDF de Depreciação.")
+
+        # TIRAR A "FOTOGRAFIA" DOS VALORES ORIGINAIS ANTES DE QUALQUER EDIÇÃO
+        info['original_pdf_acervo'] = info['pdf_acervo']
+        info['original_pdf_dep'] = info['pdf_dep']
+
+        # Marca internamente se a UG teve divergência na primeira leitura para libertar a edição
+        info['erro_original_acervo'] = abs(info['pdf_acervo'] - info['ex_acervo']) > 0.05
+        info['erro_original_dep'] = abs(info['pdf_dep'] - info['ex_dep']) > 0.05
+    return logs
+
+def dados_do_periodo(planilha, extraidos, idx_mes, ano):
+    """(dados_ug, logs) do mês `idx_mes`/`ano` a partir da planilha lida (`ler_planilha`), sem alterá-la."""
+    # Os campos da planilha são números e textos: basta um dicionário novo por UG, não uma cópia profunda
+    dados_ug = {ug: {**info, 'detalhes_acervo': {}, 'detalhes_dep': {}} for ug, info in planilha.items()}
+    return dados_ug, preencher_mes(dados_ug, extraidos, idx_mes, ano)
+
+def avisos_arquivos(dados_ug, pdfs):
+    # PDFs que não são de nenhuma UG da planilha e os repetidos (mesmo tipo e número), que seriam somados
+    return [f"⚠️ {aviso}" for aviso in IndiceArquivos(pdfs).avisos(set(dados_ug), por_tipo=True)]
+
+def processar(dados_ug, pdfs, idx_mes, ano, ao_progredir=None):
+    """Soma nos dados_ug os valores do mês `idx_mes`/`ano` dos PDFs de cada UG; devolve os logs (ver extrair_pdfs)."""
+    return avisos_arquivos(dados_ug, pdfs) + preencher_mes(dados_ug, extrair_pdfs(dados_ug, pdfs, ao_progredir), idx_mes, ano)
+
+def tabela_anual(extraidos, ano):
+    # Total de Acervo e Depreciação de cada UG nos 12 meses, como está nos PDFs (visão do ano inteiro)
+    linhas = []
+    for ug, arquivos in extraidos.items():
+        for tipo, chave in (('Acervo', 'acervo'), ('Depreciação', 'dep')):
+            linhas.append({'UG': ug, 'Tipo': tipo, **{mes: sum(valor_do_mes(v, i, ano) for v in arquivos[chave].values()) for i, mes in enumerate(MESES_ABREV)}})
+    return pd.DataFrame(linhas, columns=['UG', 'Tipo'] + MESES_ABREV)
+
+# ==========================================
+# CRUZAMENTO E RELATÓRIO
+# ==========================================
+def conciliar_ug(info):
+    # Diferenças finais (com as edições já aplicadas) e se cada valor foi editado à mão
+    return {
+        'dif_acervo': info['pdf_acervo'] - info['ex_acervo'],
+        'dif_dep': info['pdf_dep'] - info['ex_dep'],
+        'editado_acervo': abs(info['pdf_acervo'] - info['original_pdf_acervo']) > 0.01,
+        'editado_dep': abs(info['pdf_dep'] - info['original_pdf_dep']) > 0.01
+    }
+
+def escrever_ug(pdf_out, ug, info, conciliacao):
+    dif_acervo_final, dif_dep_final = conciliacao['dif_acervo'], conciliacao['dif_dep']
+    editado_acervo, editado_dep = conciliacao['editado_acervo'], conciliacao['editado_dep']
+
+    texto_ug = f"Unidade Gestora: {ug} - {info['nome'][:50]}"
+    avisos_soma = []
+    if info['arquivos_acervo_somados'] > 1: avisos_soma.append(f"{info['arquivos_acervo_somados']} Acervos")
+    if info['arquivos_dep_somados'] > 1: avisos_soma.append(f"{info['arquivos_dep_somados']} Depreciações")
+    if avisos_soma: texto_ug += f" (+{' e '.join(avisos_soma)})"
+
+    pdf_out.set_font("helvetica", 'B', 10)
+    pdf_out.set_fill_color(240, 240, 240)
+    pdf_out.cell(0, 8, text=texto_ug, border=1, new_x=XPos.LMARGIN, new_y=YPos.NEXT, fill=True)
+
+    pdf_out.set_font("helvetica", 'B', 8)
+    pdf_out.set_fill_color(220, 230, 241)
+    pdf_out.cell(46, 7, "Conta", 1, fill=True)
+    pdf_out.cell(48, 7, "Saldo relatório", 1, fill=True, align='C') # Nova nomenclatura
+    pdf_out.cell(48, 7, "Saldo SIAFI", 1, fill=True, align='C')      # Nova nomenclatura
+    pdf_out.cell(48, 7, "Diferença", 1, fill=True, align='C', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf_out.set_font("helvetica", '', 8)
+
+    str_pdf_acervo = f"R$ {formatar_real(info['pdf_acervo'])}" + (" *" if editado_acervo else "")
+    str_pdf_dep = f"R$ {formatar_real(info['pdf_dep'])}" + (" *" if editado_dep else "")
+
+    # Linha Acervo
+    pdf_out.cell(46, 7, "Acervo Bibliográfico", 1)
+    pdf_out.cell(48, 7, str_pdf_acervo, 1, align='R')
+    pdf_out.cell(48, 7, f"R$ {formatar_real(info['ex_acervo'])}", 1, align='R')
+    if abs(dif_acervo_final) > 0.05: pdf_out.set_text_color(200, 0, 0)
+    pdf_out.cell(48, 7, f"R$ {formatar_real(dif_acervo_final)}", 1, align='R', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf_out.set_text_color(0, 0, 0)
+
+    # Linha Depreciação
+    pdf_out.cell(46, 7, "Depreciação Acumulada", 1)
+    pdf_out.cell(48, 7, str_pdf_dep, 1, align='R')
+    pdf_out.cell(48, 7, f"R$ {formatar_real(info['ex_dep'])}", 1, align='R')
+    if abs(dif_dep_final) > 0.05: pdf_out.set_text_color(200, 0, 0)
+    pdf_out.cell(48, 7, f"R$ {formatar_real(dif_dep_final)}", 1, align='R', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf_out.set_text_color(0, 0, 0)
+
+    # LOG DE ALERTA NO PDF
+    if editado_acervo or editado_dep:
+        pdf_out.set_font("helvetica", 'I', 7)
+        pdf_out.set_text_color(180, 0, 0)
+        if editado_acervo:
+            pdf_out.cell(0, 5, f"* ALERTA: O valor do Acervo foi alterado manualmente pelo utilizador. (Valor original lido do PDF: R$ {formatar_real(info['original_pdf_acervo'])})", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        if editado_dep:
+            pdf_out.cell(0, 5, f"* ALERTA: O valor da Depreciação foi alterado manualmente pelo utilizador. (Valor original lido do PDF: R$ {formatar_real(info['original_pdf_dep'])})", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf_out.set_text_color(0, 0, 0)
+
+    pdf_out.ln(5)
+
+def gerar_relatorio(dados_ug, conciliacoes=None):
+    # `conciliacoes` ({ug: conciliar_ug(info)}) evita refazer o cruzamento já feito na revisão
+    conciliacoes = conciliacoes or {}
+    pdf_out = PDF_Report(TITULO_RELATORIO)
+    pdf_out.add_page()
+    for ug, info in dados_ug.items(): escrever_ug(pdf_out, ug, info, conciliacoes.get(ug) or conciliar_ug(info))
+    return bytes(pdf_out.output())
+
+def resumo(dados_ug):
+    """Acervo e depreciação de cada UG, com as contas divergentes, para exportação (JSON/CSV)."""
+    unidades = []
+    for ug, info in dados_ug.items():
+        conc = conciliar_ug(info)
+        contas = [('Acervo', info['pdf_acervo'], info['ex_acervo'], conc['dif_acervo']),
+                  ('Depreciação', info['pdf_dep'], info['ex_dep'], conc['dif_dep'])]
+        unidades.append({
+            'ug': ug,
+            'nome': info['nome'],
+            'arquivos_acervo': list(info['detalhes_acervo']),
+            'arquivos_depreciacao': list(info['detalhes_dep']),
+            'divergencias': [{'ug': ug, 'item': conta, 'descricao': info['nome'],
+                              'valor_relatorio': round(relatorio, 2), 'valor_siafi': round(siafi, 2),
+                              'diferenca': round(dif, 2)} for conta, relatorio, siafi, dif in contas if abs(dif) > 0.05]
+        })
+    return unidades
@@ -0,0 +1,89 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+# ==========================================
+# CACHE EM DISCO DO TEXTO EXTRAÍDO DOS PDFs
+# ==========================================
+# Cada entrada guarda o texto de todas as páginas de um PDF (e se veio do OCR),
+# endereçada pelo SHA-256 do arquivo mais os parâmetros de extração. Assim o
+# mesmo relatório reenviado, por qualquer página do sistema, não é relido.
+# Entradas menores (ex.: a orientação detectada de um documento) usam o mesmo esquema.
+# Aumente VERSAO_EXTRATOR sempre que a forma de extrair o texto mudar.
+VERSAO_EXTRATOR = "2"
+
+PASTA_CACHE = os.environ.get("CONCILIADOR_CACHE_DIR", os.path.join(tempfile.gettempdir(), "conciliador_cache"))
+LIMITE_CACHE_BYTES = int(os.environ.get("CONCILIADOR_CACHE_MB", "512")) * 1024 * 1024
+
+_poda_lock = threading.Lock()
+
+def chave_cache(pdf_bytes, *parametros):
+    h = hashlib.sha256(pdf_bytes)
+    h.update("|".join(str(p) for p in (VERSAO_EXTRATOR,) + parametros).encode("utf-8"))
+    return h.hexdigest()
+
+def _caminho(chave):
+    return os.path.join(PASTA_CACHE, f"{chave}.json.gz")
+
+def ler_entrada(chave):
+    """Dicionário guardado para a chave, ou None se não houver."""
+    caminho = _caminho(chave)
+    try:
+        with gzip.open(caminho, "rt", encoding="utf-8") as f:
+            entrada = json.load(f)
+        os.utime(caminho)  # marca como usado recentemente (LRU pela data de modificação)
+    except (OSError, ValueError):
+        return None
+    return entrada
+
+def ler_paginas(chave):
+    """Lista de (texto, is_ocr) guardada para a chave, ou None se não houver."""
+    entrada = ler_entrada(chave)
+    if entrada is None or "paginas" not in entrada: return None
+    return [(p["texto"], p["is_ocr"]) for p in entrada["paginas"]]
+
+def ler_classificacao(chave):
+    """Lista de (classe, segundos) da pré-classificação guardada junto das páginas, ou None se não houver."""
+    entrada = ler_entrada(chave)
+    if entrada is None or "classificacao" not in entrada: return None
+    return [tuple(c) for c in entrada["classificacao"]]
+
+def gravar_paginas(chave, paginas, classificacao=None):
+    entrada = {"paginas": [{"texto": t, "is_ocr": o} for t, o in paginas]}
+    if classificacao: entrada["classificacao"] = [list(c) for c in classificacao]
+    gravar_entrada(chave, entrada)
+
+def gravar_entrada(chave, entrada):
+    temporario = None
+    try:
+        os.makedirs(PASTA_CACHE, exist_ok=True)
+        fd, temporario = tempfile.mkstemp(dir=PASTA_CACHE, suffix=".tmp")
+        with os.fdopen(fd, "wb") as bruto, gzip.open(bruto, "wt", encoding="utf-8") as f:
+            json.dump(entrada, f, ensure_ascii=False)
+        os.replace(temporario, _caminho(chave))  # escrita atômica: leitores nunca veem arquivo pela metade
+    except OSError:
+        if temporario and os.path.exists(temporario): os.remove(temporario)
+        return
+    _podar()
+
+def _podar():
+    # Remove as entradas usadas há mais tempo até o cache caber no limite
+    with _poda_lock:
+        entradas = []
+        with os.scandir(PASTA_CACHE) as it:
+            for e in it:
+                if e.name.endswith(".json.gz"):
+                    try:
+                        st = e.stat()
+                        entradas.append((st.st_mtime, st.st_size, e.path))
+                    except OSError: pass
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        for _, tamanho, caminho in sorted(entradas):
+            if total <= LIMITE_CACHE_BYTES: break
+            try:
+                os.remove(caminho)
+                total -= tamanho
+            except OSError: pass
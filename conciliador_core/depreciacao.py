@@ -0,0 +1,395 @@
+import re
+
+import openpyxl
+import pandas as pd
+from fpdf import XPos, YPos
+
+from conciliador_core import ingestao
+from conciliador_core.arquivos import IndiceArquivos, ler_bytes, nome_arquivo
+from conciliador_core.matriz import extrair_id_unidade
+from conciliador_core.memoria import Saldos
+from conciliador_core.pdf_texto import iterar_linhas
+from conciliador_core.relatorio import PDF_Report
+from conciliador_core.valores import converter_valor_excel, formatar_moeda_pdf, formatar_real
+
+# ==========================================
+# CONCILIAÇÃO DEPRECIAÇÃO x SIAFI (SEM INTERFACE)
+# ==========================================
+TITULO_RELATORIO = 'Relatório de Conciliação - Depreciação Acumulada'
+MESES = ["JAN", "FEV", "MAR", "ABR", "MAI", "JUN", "JUL", "AGO", "SET", "OUT", "NOV", "DEZ"]
+
+_RE_CABECALHO_GRUPO = re.compile(r"^\s*(\d+)\s*-\s*[A-Z]")
+
+def _padrao_rotulo(nome_linha):
+    # Rótulo com ou sem acento e com qualquer espaço entre as palavras
+    nome_regex = nome_linha.replace("(", r"\(").replace(")", r"\)").replace(" ", r"\s+")
+    return nome_regex.replace("Ç", "[CÇ]").replace("Ã", "[AÃ]").replace("Ê", "[EÊ]").replace("Í", "[IÍ]")
+
+# Linhas do bloco com um valor por mês; as quatro últimas formam o movimento do mês (as saídas entram subtraindo)
+ROTULOS_COLUNAS = ["SALDO INICIAL", "DEPRECIAÇÃO MÊS CORRENTE", "ENTRADAS (TRANSFERÊNCIA)", "SAÍDAS (TRANSFERÊNCIA)", "SAÍDAS (BAIXAS)"]
+_PADRAO_PARADA = r"(?:SALDO INICIAL|DEPRECIA[CÇ][AÃ]O M[EÊ]S|ENTRADAS|SA[IÍ]DAS|AJUSTE|TOTAL|SALDO ATUAL|\(\*\))"
+_RE_PARADA = re.compile(_PADRAO_PARADA, re.IGNORECASE)  # onde termina a lista de valores de um rótulo
+_RE_VALOR_SALDO = re.compile(r"\d{1,3}(?:\.\d{3})*,\d{2}")
+# Um só padrão reconhece, da esquerda para a direita, tudo o que interessa no bloco. O lookahead
+# descarta logo as posições que não começam com dígito, "(" ou a inicial de algum rótulo.
+_RE_TOKEN = re.compile(
+    r"(?=[\d(ADEST])(?:"
+    + "|".join(f"(?P<r{i}>{_padrao_rotulo(r)})" for i, r in enumerate(ROTULOS_COLUNAS))
+    + r"|(?P<asterisco>\(\*\)(?P<saldo>(?-i:\s*SALDO))?)"
+    + rf"|(?P<parada>{_PADRAO_PARADA})"
+    + r"|(?P<atual>(?-i:ATUAL))"
+    + r"|(?P<valor>\d{1,3}(?:[.,]\d{3})*[.,]\d{2}))",
+    re.IGNORECASE)
+
+def blocos_grupo(linhas):
+    """(grupo, texto do bloco) de cada cabeçalho "N - NOME", entregue assim que o cabeçalho seguinte aparece."""
+    grupo_id, bloco = None, []
+    for linha in linhas:
+        match = _RE_CABECALHO_GRUPO.match(linha)
+        if match:
+            if grupo_id is not None: yield grupo_id, "".join(bloco)
+            grupo_id, bloco = int(match.group(1)), []
+        if grupo_id is not None: bloco.append(linha + "\n")
+    if grupo_id is not None: yield grupo_id, "".join(bloco)
+
+def ler_bloco(bloco_texto):
+    """Saldo atual e todas as colunas mensais (ROTULOS_COLUNAS) de um bloco, numa só passada.
+
+    Cada rótulo (a primeira ocorrência) recebe os valores que vêm depois dele até o próximo rótulo
+    conhecido, "(*)" ou o fim do bloco. O saldo é o primeiro valor depois de "(*) SALDO ... ATUAL".
+    """
+    colunas = {}
+    abertos = []  # rótulos ainda recebendo valores
+    fim_saldo = pos_atual = None
+
+    for match in _RE_TOKEN.finditer(bloco_texto):
+        tipo = match.lastgroup if match.lastgroup != 'saldo' else 'asterisco'
+        if tipo == 'valor':
+            if abertos:
+                valor = formatar_moeda_pdf(match.group())
+                for rotulo in abertos: colunas[rotulo].append(valor)
+            continue
+
+        if _RE_PARADA.match(bloco_texto, match.start()): abertos = []
+        if tipo == 'asterisco':
+            if match.group('saldo') and fim_saldo is None: fim_saldo = match.end()
+        elif tipo in ('atual', 'parada'):
+            if fim_saldo is not None and pos_atual is None and match.group().endswith("ATUAL"): pos_atual = match.end()
+        else:
+            rotulo = ROTULOS_COLUNAS[int(tipo[1:])]
+            if rotulo not in colunas:
+                colunas[rotulo] = []
+                abertos.append(rotulo)
+
+    match_saldo = _RE_VALOR_SALDO.search(bloco_texto, pos_atual) if pos_atual is not None else None
+    return {
+        'saldo': formatar_moeda_pdf(match_saldo.group()) if match_saldo else 0.0,
+        'colunas': {rotulo: colunas.get(rotulo, []) for rotulo in ROTULOS_COLUNAS}
+    }
+
+def movimento_do_mes(colunas, idx_mes):
+    # Depreciação do mês + entradas - saídas por transferência - baixas, na coluna do mês escolhido
+    def valor(rotulo): return colunas[rotulo][idx_mes] if len(colunas[rotulo]) > idx_mes else 0.0
+    v_dep_mes, v_entradas = valor("DEPRECIAÇÃO MÊS CORRENTE"), valor("ENTRADAS (TRANSFERÊNCIA)")
+    v_saidas_transf, v_saidas_baixas = valor("SAÍDAS (TRANSFERÊNCIA)"), valor("SAÍDAS (BAIXAS)")
+    return v_dep_mes + v_entradas - v_saidas_transf - v_saidas_baixas
+
+def saldo_do_mes(bloco, idx_mes):
+    """Saldo acumulado no fim do mês `idx_mes`, a partir de um `ler_bloco`.
+
+    O "(*) SALDO ATUAL" é o do mês em que o relatório foi emitido (o último com valores nas colunas mensais)
+    e vale para ele e os seguintes. Os meses anteriores usam SALDO INICIAL do mês + movimento do mês; se o
+    relatório não traz o SALDO INICIAL desse mês, fica o saldo atual.
+    """
+    colunas = bloco['colunas']
+    emitido = max((i for valores in colunas.values() for i, v in enumerate(valores) if v), default=None)
+    if emitido is None or idx_mes >= emitido or len(colunas["SALDO INICIAL"]) <= idx_mes: return bloco['saldo']
+    return colunas["SALDO INICIAL"][idx_mes] + movimento_do_mes(colunas, idx_mes)
+
+def ler_pdf(arquivo_obj):
+    # {grupo: ler_bloco(...)} de um relatório de depreciação, com todos os meses, lido página a página
+    blocos = {}
+    try:
+        for grupo_id, bloco_texto in blocos_grupo(iterar_linhas(ler_bytes(arquivo_obj))):
+            blocos[grupo_id] = ler_bloco(bloco_texto)
+    except Exception:
+        return {}
+    return blocos
+
+def dados_do_mes(blocos, idx_mes):
+    # {grupo: {'saldo', 'movimento'}} do mês escolhido, sem reler o relatório
+    return {g: {'saldo': saldo_do_mes(b, idx_mes), 'movimento': movimento_do_mes(b['colunas'], idx_mes)} for g, b in blocos.items()}
+
+def processar_pdf(arquivo_obj, idx_mes):
+    return dados_do_mes(ler_pdf(arquivo_obj), idx_mes)
+
+def ler_aba(linhas, matriz):
+    # {grupo: {'saldo', 'movimento'}} a partir das linhas (values_only) de uma aba da planilha
+    d_excel = {}
+    for row in linhas:
+        if not row or not row[0]: continue
+        conta_raw = str(row[0]).strip()
+        if conta_raw.startswith("12") and conta_raw.replace('.', '').isdigit():
+            if conta_raw == "123110402": continue
+            grupo = matriz.grupo.get(conta_raw)
+            if grupo is not None:
+                valid_vals = [v for v in row if v is not None and str(v).strip() != ""]
+                if len(valid_vals) >= 2:
+                    saldo_raw, movim_raw = valid_vals[-1], valid_vals[-2]
+                elif len(valid_vals) == 1:
+                    saldo_raw, movim_raw = valid_vals[-1], 0.0
+                else:
+                    saldo_raw, movim_raw = 0.0, 0.0
+
+                val_saldo = converter_valor_excel(saldo_raw)
+                val_mov = converter_valor_excel(movim_raw)
+
+                if grupo not in d_excel: d_excel[grupo] = {'saldo': 0.0, 'movimento': 0.0}
+                d_excel[grupo]['saldo'] += val_saldo
+                d_excel[grupo]['movimento'] += val_mov
+    return d_excel
+
+class DadosUG:
+    """O que a revisão guarda de uma unidade num mês: saldo e movimento do relatório por grupo (ver memoria.Saldos).
+
+    `d_excel` é o mesmo dicionário lido da planilha (compartilhado entre os meses). As correções do usuário
+    ficam em `pdf_saldo.edicoes`/`pdf_movimento.edicoes`; os valores lidos continuam em `.original(grupo)`.
+    """
+    __slots__ = ('uid', 'd_excel', 'pdf_saldo', 'pdf_movimento', 'tem_pdf', 'erro_original', 'grupos_com_erro')
+
+    def __init__(self, uid, d_excel, pdf_saldo, pdf_movimento, tem_pdf, erro_original, grupos_com_erro):
+        self.uid, self.d_excel, self.pdf_saldo, self.pdf_movimento = uid, d_excel, pdf_saldo, pdf_movimento
+        self.tem_pdf, self.erro_original, self.grupos_com_erro = tem_pdf, erro_original, grupos_com_erro
+
+def montar_ug(uid, d_excel, d_pdf_raw, tem_pdf):
+    grupos_combinados = sorted(list(set(d_pdf_raw.keys()) | set(d_excel.keys())))
+
+    saldos, movimentos = [], []
+    grupos_com_erro = {} # Agora é um dicionário inteligente
+    erro_original = False
+
+    for g in grupos_combinados:
+        # Extrai e converte para o sinal correto para a conciliação (inversão)
+        vp_saldo = round(-1 * d_pdf_raw.get(g, {}).get('saldo', 0.0), 2)
+        vp_mov = round(-1 * d_pdf_raw.get(g, {}).get('movimento', 0.0), 2)
+
+        ve_saldo = round(d_excel.get(g, {}).get('saldo', 0.0), 2)
+        ve_mov = round(d_excel.get(g, {}).get('movimento', 0.0), 2)
+
+        saldos.append(vp_saldo)
+        movimentos.append(vp_mov)
+
+        err_saldo = abs(vp_saldo - ve_saldo) > 0.00
+        err_mov = abs(vp_mov - ve_mov) > 0.00
+
+        # Regista separadamente qual é a métrica com divergência
+        if err_saldo or err_mov:
+            erro_original = True
+            grupos_com_erro[g] = {'saldo': err_saldo, 'movimento': err_mov}
+
+    return DadosUG(uid, d_excel, Saldos(grupos_combinados, saldos), Saldos(grupos_combinados, movimentos), tem_pdf, erro_original, grupos_com_erro)
+
+def ler_arquivos(arquivo_alvo, pdfs, matriz, ao_progredir=None):
+    """Tudo o que a conciliação precisa dos arquivos, com os 12 meses dos relatórios PDF.
+
+    Devolve {'abas': {aba: (uid, d_excel)}, 'pdfs': {uid: ler_pdf(...)}, 'avisos': [...]}; cada mês sai daí com `montar_mes`.
+    Cada aba usa o PDF com a mesma UG no nome (ver IndiceArquivos); os avisos listam os PDFs sem aba e os repetidos.
+    `ao_progredir(texto, fracao)` recebe a mensagem de status e/ou a fração concluída (um dos dois pode ser None).
+    """
+    avisar = ao_progredir or (lambda texto, fracao: None)
+    wb_alvo = openpyxl.load_workbook(arquivo_alvo, read_only=True, data_only=True)
+    try:
+        abas_lidas = {}
+        abas = [s for s in wb_alvo.sheetnames if s != "MATRIZ"]
+        for idx, sheet_name in enumerate(abas):
+            avisar(f"Lendo e analisando dados da Unidade Gestora: {sheet_name}...", None)
+            abas_lidas[sheet_name] = (extrair_id_unidade(sheet_name), ler_aba(wb_alvo[sheet_name].iter_rows(values_only=True), matriz))
+            avisar(None, (idx + 1) / len(abas))
+    finally:
+        wb_alvo.close()
+
+    indice = IndiceArquivos({nome_arquivo(f): f for f in pdfs})
+    ugs = {uid for uid, _ in abas_lidas.values() if uid}
+    blocos_pdf = {uid: ingestao.obter(ler_bytes(indice.primeiro(uid)), ler_pdf) for uid in ugs if indice.primeiro(uid) is not None}
+    return {'abas': abas_lidas, 'pdfs': blocos_pdf, 'avisos': indice.avisos(ugs)}
+
+def montar_mes(extraidos, idx_mes):
+    # dados_ug de um mês a partir do que `ler_arquivos` leu (trocar de mês não relê nada)
+    dados_ug = {}
+    for sheet_name, (uid, d_excel) in extraidos['abas'].items():
+        blocos = extraidos['pdfs'].get(uid)
+        dados_ug[sheet_name] = montar_ug(uid, d_excel, dados_do_mes(blocos, idx_mes) if blocos is not None else {}, blocos is not None)
+    return dados_ug
+
+def processar(arquivo_alvo, pdfs, matriz, idx_mes, ao_progredir=None):
+    """dados_ug por aba da planilha, cruzada com o relatório PDF da mesma unidade, no mês `idx_mes`."""
+    return montar_mes(ler_arquivos(arquivo_alvo, pdfs, matriz, ao_progredir), idx_mes)
+
+def tabela_anual(extraidos):
+    # Movimento de cada grupo nos 12 meses, como está nos relatórios PDF (visão do ano inteiro)
+    linhas = []
+    for uid, blocos in extraidos['pdfs'].items():
+        for g, bloco in sorted(blocos.items()):
+            linhas.append({'Unidade': uid, 'Grupo': g, **{mes: movimento_do_mes(bloco['colunas'], i) for i, mes in enumerate(MESES)}})
+    return pd.DataFrame(linhas, columns=['Unidade', 'Grupo'] + MESES)
+
+# ==========================================
+# CRUZAMENTO E RELATÓRIO
+# ==========================================
+def conciliar_ug(info):
+    """Divergências, alertas de edição e totais de uma unidade (com as edições de `info.pdf_saldo`/`info.pdf_movimento`)."""
+    d_excel, pdf_saldo, pdf_movimento = info.d_excel, info.pdf_saldo, info.pdf_movimento
+    divergencias = []
+    alertas_auditoria = []
+    soma_pdf_s = soma_excel_s = soma_pdf_m = soma_excel_m = 0.0
+
+    grupos = pdf_saldo.chaves.tolist()
+    for g in grupos:
+        vp_s = pdf_saldo.atual(g)
+        ve_s = d_excel.get(g, {}).get('saldo', 0.0)
+        vp_m = pdf_movimento.atual(g)
+        ve_m = d_excel.get(g, {}).get('movimento', 0.0)
+
+        soma_pdf_s += vp_s
+        soma_excel_s += ve_s
+        soma_pdf_m += vp_m
+        soma_excel_m += ve_m
+
+        dif_s = round(vp_s - ve_s, 2)
+        if abs(dif_s) > 0.00:
+            divergencias.append({'grupo': g, 'tipo': 'Saldo Acumulado', 'pdf': vp_s, 'excel': ve_s, 'diff': dif_s})
+
+        dif_m = round(vp_m - ve_m, 2)
+        if abs(dif_m) > 0.00:
+            divergencias.append({'grupo': g, 'tipo': 'Mês Corrente', 'pdf': vp_m, 'excel': ve_m, 'diff': dif_m})
+
+        # Auditoria por grupo
+        if pdf_saldo.editado(g):
+            alertas_auditoria.append(f"* ALERTA: O Saldo Acumulado do Grupo {g} foi alterado manualmente pelo utilizador. (Original lido do PDF: R$ {formatar_real(pdf_saldo.original(g))})")
+        if pdf_movimento.editado(g):
+            alertas_auditoria.append(f"* ALERTA: O Mês Corrente do Grupo {g} foi alterado manualmente pelo utilizador. (Original lido do PDF: R$ {formatar_real(pdf_movimento.original(g))})")
+
+    return {
+        'grupos': grupos,
+        'divergencias': divergencias,
+        'alertas_auditoria': alertas_auditoria,
+        'soma_pdf_s': soma_pdf_s, 'soma_excel_s': soma_excel_s,
+        'soma_pdf_m': soma_pdf_m, 'soma_excel_m': soma_excel_m,
+        'dif_total_saldo': round(soma_pdf_s - soma_excel_s, 2),
+        'dif_total_mov': round(soma_pdf_m - soma_excel_m, 2)
+    }
+
+def escrever_ug(pdf_out, sheet_name, info, conciliacao, mes_selecionado):
+    uid, pdf_saldo, pdf_movimento = info.uid, info.pdf_saldo, info.pdf_movimento
+    grupos, divergencias = conciliacao['grupos'], conciliacao['divergencias']
+    dif_total_saldo, dif_total_mov = conciliacao['dif_total_saldo'], conciliacao['dif_total_mov']
+
+    if pdf_out.get_y() > 240: pdf_out.add_page()
+
+    pdf_out.set_font("helvetica", 'B', 10)
+    pdf_out.set_fill_color(240, 240, 240)
+    pdf_out.cell(0, 8, f"Unidade Gestora: {sheet_name} (ID: {uid})", 1, fill=True, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf_out.ln(2)
+
+    pdf_out.set_font("helvetica", 'B', 9)
+    pdf_out.set_fill_color(220, 230, 241)
+    pdf_out.cell(48, 7, "Métrica", 1, fill=True, align='C')
+    pdf_out.cell(48, 7, "Total Relatório", 1, fill=True, align='C')
+    pdf_out.cell(48, 7, "Total Planilha", 1, fill=True, align='C')
+    pdf_out.cell(46, 7, "Diferença", 1, fill=True, align='C', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf_out.set_font("helvetica", '', 9)
+
+    edit_geral_saldo = any(pdf_saldo.editado(g) for g in grupos)
+    edit_geral_mov = any(pdf_movimento.editado(g) for g in grupos)
+
+    str_pdf_s = f"R$ {formatar_real(conciliacao['soma_pdf_s'])}" + (" *" if edit_geral_saldo else "")
+    str_pdf_m = f"R$ {formatar_real(conciliacao['soma_pdf_m'])}" + (" *" if edit_geral_mov else "")
+
+    # Resumo Métrica Saldo
+    pdf_out.cell(48, 7, "Saldo Acumulado", 1)
+    pdf_out.cell(48, 7, str_pdf_s, 1, align='R')
+    pdf_out.cell(48, 7, f"R$ {formatar_real(conciliacao['soma_excel_s'])}", 1, align='R')
+    if abs(dif_total_saldo) > 0.00: pdf_out.set_text_color(200, 0, 0)
+    pdf_out.cell(46, 7, f"R$ {formatar_real(dif_total_saldo)}", 1, align='R', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf_out.set_text_color(0, 0, 0)
+
+    # Resumo Métrica Movimento
+    pdf_out.cell(48, 7, f"Mês Corrente ({mes_selecionado})", 1)
+    pdf_out.cell(48, 7, str_pdf_m, 1, align='R')
+    pdf_out.cell(48, 7, f"R$ {formatar_real(conciliacao['soma_excel_m'])}", 1, align='R')
+    if abs(dif_total_mov) > 0.00: pdf_out.set_text_color(200, 0, 0)
+    pdf_out.cell(46, 7, f"R$ {formatar_real(dif_total_mov)}", 1, align='R', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf_out.set_text_color(0, 0, 0)
+
+    pdf_out.ln(3)
+
+    if not divergencias:
+        pdf_out.set_fill_color(220, 255, 220)
+        pdf_out.set_font("helvetica", 'B', 9)
+        pdf_out.cell(0, 8, "CONCILIADO - SEM DIVERGÊNCIAS", 1, fill=True, align='C', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    else:
+        pdf_out.set_fill_color(255, 220, 220)
+        pdf_out.set_font("helvetica", 'B', 9)
+        pdf_out.cell(0, 8, "DIVERGÊNCIAS ENCONTRADAS:", 1, fill=True, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+        pdf_out.set_fill_color(250, 250, 250)
+        pdf_out.set_font("helvetica", 'B', 8)
+        pdf_out.cell(15, 6, "Grupo", 1, fill=True, align='C')
+        pdf_out.cell(35, 6, "Tipo", 1, fill=True, align='C')
+        pdf_out.cell(46, 6, "Valor Relatório", 1, fill=True, align='C')
+        pdf_out.cell(46, 6, "Valor Planilha", 1, fill=True, align='C')
+        pdf_out.cell(48, 6, "Diferença", 1, fill=True, align='C', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+        pdf_out.set_font("helvetica", '', 8)
+        for d in divergencias:
+            g = d['grupo']
+            is_edit = (pdf_saldo if d['tipo'] == 'Saldo Acumulado' else pdf_movimento).editado(g)
+
+            val_pdf_str = f"R$ {formatar_real(d['pdf'])}" + (" *" if is_edit else "")
+
+            pdf_out.cell(15, 6, str(d['grupo']), 1, align='C')
+            pdf_out.cell(35, 6, d['tipo'], 1, align='C')
+            pdf_out.cell(46, 6, val_pdf_str, 1, align='R')
+            pdf_out.cell(46, 6, f"R$ {formatar_real(d['excel'])}", 1, align='R')
+            pdf_out.set_text_color(200, 0, 0)
+            pdf_out.cell(48, 6, f"R$ {formatar_real(d['diff'])}", 1, align='R', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+            pdf_out.set_text_color(0, 0, 0)
+
+    # LOGS DE AUDITORIA NO PDF
+    if conciliacao['alertas_auditoria']:
+        pdf_out.set_font("helvetica", 'I', 7)
+        pdf_out.set_text_color(180, 0, 0)
+        for alerta in conciliacao['alertas_auditoria']:
+            pdf_out.cell(0, 5, alerta, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf_out.set_text_color(0, 0, 0)
+
+    pdf_out.ln(5)
+    pdf_out.cell(0, 0, "", "B", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf_out.ln(5)
+
+def gerar_relatorio(dados_ug, mes_selecionado, conciliacoes=None):
+    # `conciliacoes` ({aba: conciliar_ug(info)}) evita refazer o cruzamento já feito na revisão
+    conciliacoes = conciliacoes or {}
+    pdf_out = PDF_Report(TITULO_RELATORIO)
+    pdf_out.set_auto_page_break(auto=True, margin=15)
+    pdf_out.add_page()
+    for sheet_name, info in dados_ug.items(): escrever_ug(pdf_out, sheet_name, info, conciliacoes.get(sheet_name) or conciliar_ug(info), mes_selecionado)
+    return bytes(pdf_out.output())
+
+def resumo(dados_ug):
+    """Totais e grupos divergentes de cada unidade, para exportação (JSON/CSV)."""
+    unidades = []
+    for sheet_name, info in dados_ug.items():
+        conc = conciliar_ug(info)
+        unidades.append({
+            'ug': sheet_name,
+            'uid': info.uid,
+            'tem_pdf': info.tem_pdf,
+            'diferenca_saldo': conc['dif_total_saldo'],
+            'diferenca_mes': conc['dif_total_mov'],
+            'divergencias': [{'ug': sheet_name, 'item': d['grupo'], 'descricao': d['tipo'],
+                              'valor_relatorio': round(d['pdf'], 2), 'valor_siafi': round(d['excel'], 2),
+                              'diferenca': d['diff']} for d in conc['divergencias']]
+        })
+    return unidades
@@ -0,0 +1,90 @@
+import copy
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from conciliador_core.arquivos import identificar_arquivo, ler_bytes, nome_arquivo
+
+# ==========================================
+# INGESTÃO ANTECIPADA DOS UPLOADS
+# ==========================================
+# Assim que os arquivos chegam no file_uploader, cada PDF já começa a ser lido
+# (texto e OCR) numa thread de fundo; o botão de conciliação só junta os
+# resultados prontos. O pool e os resultados são do processo, compartilhados
+# entre as sessões como o pool de OCR: o mesmo PDF enviado duas vezes é lido
+# uma vez só. O OCR continua no pool de processos de ocr.py; estas threads só
+# coordenam e fazem a extração de texto.
+MAX_THREADS_INGESTAO = max(1, int(os.environ.get("CONCILIADOR_INGESTAO_THREADS", "2")))
+MAX_RESULTADOS = 64  # leituras guardadas em memória (as mais antigas saem primeiro; o cache em disco continua)
+
+_pool = None
+_futuros = OrderedDict()  # (sha256, leitor, parâmetros) -> Future
+_hashes = {}              # file_id do upload -> sha256, para não re-hashear a cada rerun
+_lock = threading.Lock()
+
+def _obter_pool():
+    global _pool
+    if _pool is None: _pool = ThreadPoolExecutor(max_workers=MAX_THREADS_INGESTAO, thread_name_prefix="ingestao")
+    return _pool
+
+def classificar(nome):
+    """(tipo, ug) de um arquivo pelo nome: tipo "pdf", "planilha" ou None; ug como no pareamento (ver identificar_arquivo)."""
+    nome = nome.lower()
+    tipo = "pdf" if nome.endswith(".pdf") else ("planilha" if nome.endswith((".xlsx", ".xls")) else None)
+    return tipo, identificar_arquivo(nome)[0]
+
+def _sha256(arquivo, pdf_bytes=None):
+    file_id = getattr(arquivo, "file_id", None)
+    if file_id is not None and file_id in _hashes: return _hashes[file_id]
+    h = hashlib.sha256(pdf_bytes if pdf_bytes is not None else ler_bytes(arquivo)).hexdigest()
+    if file_id is not None:
+        if len(_hashes) >= 16 * MAX_RESULTADOS: _hashes.clear()
+        _hashes[file_id] = h
+    return h
+
+def _chave(sha, leitor, parametros):
+    return (sha, f"{leitor.__module__}.{leitor.__qualname__}", tuple(sorted(parametros.items())))
+
+def iniciar(arquivos, leitor, **parametros):
+    """Envia ao pool a leitura `leitor(pdf_bytes, **parametros)` de cada PDF em `arquivos` ainda não lido.
+
+    Devolve [{'nome', 'tipo', 'ug', 'pronto'}] de todos os arquivos (planilhas com 'pronto' None).
+    Chamado a cada rerun da página: os PDFs já enviados não são lidos nem hasheados de novo.
+    """
+    situacao = []
+    for arquivo in arquivos or []:
+        nome = nome_arquivo(arquivo)
+        tipo, ug = classificar(nome)
+        pronto = None
+        if tipo == "pdf":
+            with _lock:
+                chave = _chave(_sha256(arquivo), leitor, parametros)
+                futuro = _futuros.get(chave)
+                if futuro is None:
+                    futuro = _futuros[chave] = _obter_pool().submit(leitor, ler_bytes(arquivo), **parametros)
+                    _podar()
+            pronto = futuro.done()
+        situacao.append({'nome': nome, 'tipo': tipo, 'ug': ug, 'pronto': pronto})
+    return situacao
+
+def obter(pdf_bytes, leitor, ao_progredir=None, **parametros):
+    """Resultado de `leitor(pdf_bytes, **parametros)`: espera a leitura adiantada por `iniciar` ou, se não houver, lê agora.
+
+    Só a leitura feita agora informa o progresso (`ao_progredir` vai para o leitor). Uma leitura adiantada
+    que falhou é refeita aqui. Devolve uma cópia, porque o resultado guardado pode ser entregue a outras sessões.
+    """
+    chave = _chave(_sha256(pdf_bytes, pdf_bytes), leitor, parametros)
+    with _lock: futuro = _futuros.get(chave)
+    if futuro is not None and (futuro.cancelled() or futuro.exception() is not None):
+        with _lock: _futuros.pop(chave, None)
+        futuro = None
+    if futuro is None:
+        return leitor(pdf_bytes, ao_progredir=ao_progredir, **parametros) if ao_progredir else leitor(pdf_bytes, **parametros)
+    return copy.deepcopy(futuro.result())
+
+def _podar():
+    # Chamado com o lock: descarta as leituras concluídas mais antigas além de MAX_RESULTADOS
+    for chave in [c for c, f in _futuros.items() if f.done()][:max(0, len(_futuros) - MAX_RESULTADOS)]:
+        del _futuros[chave]
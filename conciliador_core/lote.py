@@ -0,0 +1,196 @@
+"""Conciliações sem a interface do Streamlit, para rodar em lote (agendador, servidor, terminal).
+
+Uma conciliação:
+    python -m conciliador_core rmb --siafi SIAFI.xlsx --pdfs pasta/ --out relatorio.pdf [--extracao coordenadas]
+    python -m conciliador_core depreciacao --siafi SIAFI.xlsx --pdfs pasta/ --mes 3 --out relatorio.pdf
+    python -m conciliador_core biblioteca --siafi base.xlsx --pdfs pasta/ --mes 3 --ano 2026 --out relatorio.pdf
+
+Todas as pastas de um mês, em paralelo: cada pasta do tipo pedido (pelo nome dela ou de uma pasta acima,
+ex.: /dados/2026-03/Almoxarifado/UG_153001) que tem uma planilha é uma conciliação, só com os arquivos dela:
+    python -m conciliador_core almoxarifado --lote /dados/2026-03 --jobs 4 [--padrao "*almox*"]
+
+Além do PDF, grava `.json` (totais e divergências por UG) e `.csv` (uma linha por divergência) com o mesmo nome.
+"""
+import argparse
+import csv
+import datetime
+import fnmatch
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from conciliador_core import almoxarifado, biblioteca, depreciacao, rmb
+from conciliador_core.matriz import CAMINHO_MATRIZ, obter_matriz
+from conciliador_core.siafi import PlanilhaSiafi
+
+# ==========================================
+# CONCILIADORES (MESMO PROCESSAMENTO DAS PÁGINAS)
+# ==========================================
+CAMPOS_CSV = ['ug', 'item', 'descricao', 'valor_relatorio', 'valor_siafi', 'diferenca']
+
+class ErroConciliacao(Exception):
+    pass
+
+def _conciliar_rmb(siafi, pdfs, opcoes):
+    matriz = obter_matriz(opcoes['matriz'])
+    with PlanilhaSiafi(siafi) as planilha_siafi:
+        pares, avisos = rmb.parear(planilha_siafi, {p.name: p for p in pdfs})
+        if not pares: raise ErroConciliacao("nenhum par (aba da planilha + PDF com o mesmo número de UG) encontrado")
+        dados_ug, avisos_leitura = rmb.processar(pares, planilha_siafi, matriz, modo_extracao=opcoes.get('extracao', 'texto'))
+    return rmb.gerar_relatorio(dados_ug), rmb.resumo(dados_ug), avisos + avisos_leitura
+
+def _conciliar_depreciacao(siafi, pdfs, opcoes):
+    matriz = obter_matriz(opcoes['matriz'])
+    if not matriz.conta_para_nat: raise ErroConciliacao("matriz vazia")
+    idx_mes = opcoes['mes'] - 1
+    dados_ug = depreciacao.processar(siafi, pdfs, matriz, idx_mes)
+    return depreciacao.gerar_relatorio(dados_ug, depreciacao.MESES[idx_mes]), depreciacao.resumo(dados_ug), []
+
+def _conciliar_almoxarifado(siafi, pdfs, opcoes):
+    with PlanilhaSiafi(siafi) as planilha_siafi:
+        pares, logs = almoxarifado.parear(planilha_siafi, {p.name: p for p in pdfs})
+        if not pares: raise ErroConciliacao("nenhum par (aba da planilha + PDF) encontrado")
+        dados_ug, logs_leitura = almoxarifado.processar(pares, planilha_siafi)
+    return almoxarifado.gerar_relatorio(dados_ug), almoxarifado.resumo(dados_ug), logs + logs_leitura
+
+def _conciliar_biblioteca(siafi, pdfs, opcoes):
+    dados_ug = biblioteca.ler_planilha(siafi)
+    logs = biblioteca.processar(dados_ug, {p.name.lower(): p for p in pdfs}, opcoes['mes'] - 1, opcoes['ano'])
+    return biblioteca.gerar_relatorio(dados_ug), biblioteca.resumo(dados_ug), logs
+
+CONCILIADORES = {
+    'rmb': (_conciliar_rmb, ('.xlsx',)),
+    'depreciacao': (_conciliar_depreciacao, ('.xlsx',)),
+    'almoxarifado': (_conciliar_almoxarifado, ('.xlsx', '.xls')),
+    'biblioteca': (_conciliar_biblioteca, ('.xlsx', '.xls', '.csv')),
+}
+# Nome de pasta (ou de uma pasta acima dela, dentro do lote) que marca as conciliações de cada tipo
+PADROES_PASTA = {'rmb': '*rmb*', 'depreciacao': '*deprecia*', 'almoxarifado': '*almox*', 'biblioteca': '*bibliot*'}
+PREFIXO_SAIDA = "conciliacao_"  # arquivos gravados por esta ferramenta: nunca são lidos como entrada
+
+# ==========================================
+# EXECUÇÃO DE UMA CONCILIAÇÃO E GRAVAÇÃO DOS RESULTADOS
+# ==========================================
+def _eh_entrada(nome):
+    return not nome.startswith('~$') and not nome.lower().startswith(PREFIXO_SAIDA)
+
+def buscar_pdfs(pasta, subpastas=True):
+    # PDFs da pasta (e das subpastas), em ordem estável, sem os relatórios gravados por esta ferramenta
+    arquivos = Path(pasta).rglob('*') if subpastas else Path(pasta).iterdir()
+    return sorted((p for p in arquivos if p.is_file() and p.suffix.lower() == '.pdf' and _eh_entrada(p.name)), key=lambda p: str(p).lower())
+
+def executar(tipo, siafi, pasta_pdfs, saida, opcoes, subpastas=True):
+    """Roda uma conciliação e grava `saida` (.pdf) mais o .json e o .csv; devolve uma linha de resumo.
+
+    No modo lote (`subpastas=False`) só entram os PDFs da própria pasta, para as conciliações não se sobreporem.
+    """
+    conciliar, _ = CONCILIADORES[tipo]
+    pdf_bytes, unidades, avisos = conciliar(Path(siafi), buscar_pdfs(pasta_pdfs, subpastas), opcoes)
+
+    saida = Path(saida)
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_bytes(pdf_bytes)
+
+    divergencias = [d for u in unidades for d in u['divergencias']]
+    resultado = {'tipo': tipo, 'planilha': str(siafi), 'pdfs': str(pasta_pdfs), 'mes': opcoes.get('mes'),
+                 'ano': opcoes.get('ano'), 'avisos': avisos, 'unidades': unidades}
+    with open(saida.with_suffix('.json'), 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2, default=str)
+    with open(saida.with_suffix('.csv'), 'w', encoding='utf-8', newline='') as f:
+        escritor = csv.DictWriter(f, fieldnames=CAMPOS_CSV)
+        escritor.writeheader()
+        escritor.writerows(divergencias)
+
+    return f"{saida}: {len(unidades)} UG(s), {len(divergencias)} divergência(s), {len(avisos)} aviso(s)"
+
+def _pasta_do_tipo(raiz, pasta, padrao):
+    # A pasta, uma pasta acima dela (dentro do lote) ou a própria raiz tem o nome no padrão do tipo
+    partes = (Path(raiz).resolve().name,) + Path(pasta).relative_to(raiz).parts
+    return any(fnmatch.fnmatch(parte.lower(), padrao.lower()) for parte in partes)
+
+def tarefas_do_lote(tipo, raiz, saida, padrao=None):
+    """(planilha, pasta, arquivo de saída) para cada pasta de `raiz` do tipo pedido que contém uma planilha.
+
+    O tipo vem do nome da pasta ou de uma pasta acima (`padrao`, por padrão PADROES_PASTA[tipo]).
+    """
+    _, extensoes = CONCILIADORES[tipo]
+    padrao = padrao or PADROES_PASTA[tipo]
+    tarefas = []
+    for pasta, _, arquivos in sorted(os.walk(raiz)):
+        if not _pasta_do_tipo(raiz, pasta, padrao): continue
+        planilhas = sorted(a for a in arquivos if a.lower().endswith(extensoes) and _eh_entrada(a))
+        if not planilhas: continue
+        destino = Path(saida) / Path(pasta).relative_to(raiz) if saida else Path(pasta)
+        tarefas.append((Path(pasta) / planilhas[0], Path(pasta), destino / f"conciliacao_{tipo}.pdf"))
+    return tarefas
+
+# ==========================================
+# LINHA DE COMANDO
+# ==========================================
+def _mes(valor):
+    # Aceita o número (1-12) ou o nome/abreviação do mês (JAN, Março...)
+    texto = valor.strip().upper()
+    if texto.isdigit() and 1 <= int(texto) <= 12: return int(texto)
+    for nomes in (depreciacao.MESES, biblioteca.MESES):
+        for i, nome in enumerate(nomes):
+            if nome.upper() == texto or nome.upper()[:3] == texto: return i + 1
+    raise argparse.ArgumentTypeError(f"mês inválido: {valor}")
+
+def criar_parser():
+    parser = argparse.ArgumentParser(prog="python -m conciliador_core", description="Conciliações SIAFI sem a interface web.")
+    sub = parser.add_subparsers(dest='tipo', required=True)
+    for tipo in CONCILIADORES:
+        p = sub.add_parser(tipo)
+        p.add_argument('--siafi', help="planilha SIAFI (ou planilha base, na biblioteca)")
+        p.add_argument('--pdfs', help="pasta com os relatórios PDF (subpastas incluídas)")
+        p.add_argument('--out', help="relatório PDF de saída; .json e .csv são gravados ao lado")
+        p.add_argument('--lote', help="pasta raiz: cada subpasta do tipo (ver --padrao) com uma planilha vira uma conciliação")
+        p.add_argument('--padrao', help=f"no modo lote, nome das pastas deste tipo (padrão: \"{PADROES_PASTA[tipo]}\")")
+        p.add_argument('--saida', help="no modo lote, pasta onde gravar os resultados (padrão: a própria pasta de cada conciliação)")
+        p.add_argument('--jobs', type=int, default=1, help="conciliações simultâneas no modo lote")
+        if tipo in ('depreciacao', 'biblioteca'):
+            p.add_argument('--mes', type=_mes, required=True, help="mês de referência (1-12 ou nome)")
+        if tipo == 'biblioteca':
+            p.add_argument('--ano', type=int, default=datetime.date.today().year)
+        if tipo in ('rmb', 'depreciacao'):
+            p.add_argument('--matriz', default=CAMINHO_MATRIZ)
+        if tipo == 'rmb':
+            p.add_argument('--extracao', choices=rmb.MODOS_EXTRACAO, default='texto',
+                           help="leitura dos PDFs: texto corrido ou colunas pela posição (tabelas alinhadas)")
+    return parser
+
+def main(argv=None):
+    parser = criar_parser()
+    args = parser.parse_args(argv)
+    opcoes = {k: getattr(args, k) for k in ('mes', 'ano', 'matriz', 'extracao') if hasattr(args, k)}
+    if 'matriz' in opcoes: opcoes['matriz'] = os.path.abspath(opcoes['matriz'])
+
+    if args.lote:
+        tarefas = tarefas_do_lote(args.tipo, args.lote, args.saida, args.padrao)
+        if not tarefas: parser.error(f"nenhuma pasta '{args.padrao or PADROES_PASTA[args.tipo]}' com planilha encontrada em {args.lote}")
+    else:
+        if not (args.siafi and args.pdfs and args.out): parser.error("informe --siafi, --pdfs e --out (ou --lote)")
+        tarefas = [(args.siafi, args.pdfs, args.out)]
+
+    falhas = 0
+    jobs = max(1, min(args.jobs, len(tarefas)))
+    if jobs == 1:
+        for siafi, pasta, saida in tarefas:
+            try: print(executar(args.tipo, siafi, pasta, saida, opcoes, subpastas=not args.lote))
+            except Exception as e:
+                falhas += 1
+                print(f"ERRO {pasta}: {e}", file=sys.stderr)
+    else:
+        # Cada conciliação tem o próprio pool de OCR; os núcleos são divididos entre elas
+        os.environ.setdefault("CONCILIADOR_OCR_PROCESSOS", str(max(1, (os.cpu_count() or 1) // jobs)))
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futuros = {pool.submit(executar, args.tipo, siafi, pasta, saida, opcoes, not args.lote): pasta for siafi, pasta, saida in tarefas}
+            for futuro in as_completed(futuros):
+                try: print(futuro.result())
+                except Exception as e:
+                    falhas += 1
+                    print(f"ERRO {futuros[futuro]}: {e}", file=sys.stderr)
+    return 1 if falhas else 0
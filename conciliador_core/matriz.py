@@ -0,0 +1,106 @@
+import hashlib
+import io
+import os
+import re
+import threading
+
+import openpyxl
+
+# ==========================================
+# MATRIZ DE RELACIONAMENTO (CONTA x NAT. DESPESA)
+# ==========================================
+# Na raiz do repositório, ao lado da pasta do pacote: vale para qualquer diretório de trabalho (agendador, CLI)
+CAMINHO_MATRIZ = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "MATRIZ.xlsx")
+
+_RE_DIGITOS_FINAIS = re.compile(r'(\d+)$')
+_RE_NAO_DIGITO = re.compile(r'\D')
+_RE_ID_UNIDADE = re.compile(r"(\d+)")
+
+class Matriz:
+    """Conteúdo da MATRIZ.xlsx com as consultas já calculadas.
+
+    - `linhas`: pares (coluna A, coluna B) como estão na planilha
+    - `conta_para_nat` / `nat_para_conta`: os dois sentidos da relação conta x nat. despesa
+    - `chave_vinculo`: conta -> chave (2 últimos dígitos da nat. despesa) usada no RMB
+    - `grupo`: conta -> grupo usado na Depreciação
+    """
+    def __init__(self, linhas):
+        self.linhas = linhas
+        self.conta_para_nat = {}
+        self.nat_para_conta = {}
+        for a, b in linhas:
+            if a is None: continue
+            c0, c1 = _normalizar_codigo(a), _normalizar_codigo(b)
+            # A conta contábil (123...) pode estar em qualquer uma das colunas
+            if not c0.startswith('123') and c1.startswith('123'): c0, c1 = c1, c0
+            self.conta_para_nat[c0] = c1
+            self.nat_para_conta.setdefault(c1, c0)
+
+        self.chave_vinculo = {}
+        self.grupo = {}
+        for conta, nat in self.conta_para_nat.items():
+            chave = get_chave_vinculo(conta, self.conta_para_nat)
+            if chave is not None: self.chave_vinculo[conta] = chave
+            grupo = extrair_codigo_grupo(nat)
+            if grupo is not None: self.grupo[conta] = grupo
+
+def _normalizar_codigo(valor):
+    texto = str(valor).strip()
+    return texto[:-2] if texto.endswith('.0') else texto
+
+def _ler_linhas(conteudo):
+    wb_matriz = openpyxl.load_workbook(io.BytesIO(conteudo), read_only=True, data_only=True)
+    try:
+        ws_matriz = wb_matriz.active
+        return [
+            (row[0], row[1] if len(row) > 1 else None)
+            for row in ws_matriz.iter_rows(min_row=1, max_col=2, values_only=True)
+            if any(v is not None for v in row)
+        ]
+    finally:
+        wb_matriz.close()
+
+# Uma cópia por processo, compartilhada por todas as sessões do Streamlit.
+# Só é relida quando a data de modificação (ou o tamanho) do arquivo muda e,
+# mesmo assim, só é reprocessada se o conteúdo (SHA-256) for outro.
+_cache_matriz = {}
+_cache_lock = threading.Lock()
+
+def obter_matriz(caminho_matriz=CAMINHO_MATRIZ):
+    caminho = os.path.abspath(caminho_matriz)
+    info = os.stat(caminho)
+    assinatura = (info.st_mtime_ns, info.st_size)
+    with _cache_lock:
+        em_cache = _cache_matriz.get(caminho)
+        if em_cache and em_cache[0] == assinatura: return em_cache[2]
+
+        with open(caminho, "rb") as f: conteudo = f.read()
+        digest = hashlib.sha256(conteudo).hexdigest()
+        if em_cache and em_cache[1] == digest:
+            matriz = em_cache[2]
+        else:
+            matriz = Matriz(_ler_linhas(conteudo))
+        _cache_matriz[caminho] = (assinatura, digest, matriz)
+        return matriz
+
+def get_chave_vinculo(conta, dict_matriz):
+    conta = str(conta).strip()
+    if conta in dict_matriz:
+        val_matriz = str(dict_matriz[conta])
+        match = _RE_DIGITOS_FINAIS.search(val_matriz)
+        if match:
+            digits = match.group(1)
+            return int(digits[-2:]) if len(digits) >= 2 else int(digits)
+    return None
+
+def extrair_codigo_grupo(valor_nat_desp):
+    try:
+        if isinstance(valor_nat_desp, float): valor_nat_desp = int(valor_nat_desp)
+        s_val = _RE_NAO_DIGITO.sub('', str(valor_nat_desp).strip())
+        if len(s_val) < 5: return None
+        return int(s_val[-2:])
+    except: return None
+
+def extrair_id_unidade(texto):
+    match = _RE_ID_UNIDADE.search(str(texto))
+    return match.group(1) if match else None
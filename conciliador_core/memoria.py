@@ -0,0 +1,107 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# DADOS DAS UGs GUARDADOS NA SESSÃO
+# ==========================================
+# O Streamlit mantém o session_state de cada navegador aberto até a sessão expirar, então o que a revisão
+# guarda por UG precisa ser enxuto: chaves e valores em arrays NumPy ordenados pela chave, e as correções
+# do usuário num dicionário à parte (chave -> valor editado). O valor lido do arquivo nunca é copiado; os
+# DataFrames do cruzamento só são montados quando a UG é (re)calculada.
+
+class Saldos:
+    """Valor de cada chave (e um rótulo opcional) em arrays NumPy ordenados pela chave, com as edições por cima.
+
+    `original(chave)` é o valor lido do arquivo; `atual(chave)` já considera a edição, se houver.
+    """
+    __slots__ = ('chaves', 'valores', 'rotulos', 'edicoes')
+
+    def __init__(self, chaves=(), valores=(), rotulos=None, tipo_chave=None):
+        chaves = np.asarray(chaves, dtype=tipo_chave)
+        ordem = np.argsort(chaves, kind='stable')
+        self.chaves = chaves[ordem]
+        self.valores = np.asarray(valores, dtype=np.float64)[ordem]
+        # Os rótulos (descrições das contas) se repetem entre UGs e sessões: cada texto fica guardado uma vez só
+        self.rotulos = np.array([sys.intern(r) if isinstance(r, str) else r for r in rotulos], dtype=object)[ordem] if rotulos is not None else None
+        self.edicoes = {}
+
+    @classmethod
+    def de_dataframe(cls, df, coluna_chave, coluna_valor, coluna_rotulo=None, tipo_chave=None):
+        rotulos = df[coluna_rotulo].to_numpy(dtype=object) if coluna_rotulo else None
+        return cls(df[coluna_chave].to_numpy(), df[coluna_valor].to_numpy(dtype=np.float64), rotulos, tipo_chave)
+
+    def __len__(self):
+        return len(self.chaves)
+
+    def _posicao(self, chave):
+        i = int(np.searchsorted(self.chaves, chave))
+        return i if i < len(self.chaves) and self.chaves[i] == chave else None
+
+    def original(self, chave):
+        i = self._posicao(chave)
+        return float(self.valores[i]) if i is not None else 0.0
+
+    def atual(self, chave):
+        return self.edicoes.get(chave, self.original(chave))
+
+    def editar(self, chave, valor):
+        # Só guarda o que difere do arquivo: voltar ao valor lido desfaz a edição
+        if valor == self.original(chave) and self._posicao(chave) is not None: self.edicoes.pop(chave, None)
+        else: self.edicoes[chave] = float(valor)
+
+    def editado(self, chave, tolerancia=0.01):
+        return chave in self.edicoes and abs(self.edicoes[chave] - self.original(chave)) > tolerancia
+
+    def atuais(self):
+        """(chaves, valores) com as edições aplicadas; chaves editadas que o arquivo não tinha entram no fim."""
+        if not self.edicoes: return self.chaves, self.valores
+        valores, novas = self.valores.copy(), []
+        for chave, valor in self.edicoes.items():
+            i = self._posicao(chave)
+            if i is None: novas.append((chave, valor))
+            else: valores[i] = valor
+        if not novas: return self.chaves, valores
+        # Chaves de texto têm largura fixa (<U): o tipo é alargado para não cortar as chaves novas
+        chaves_novas = np.asarray([c for c, _ in novas])
+        tipo = np.result_type(self.chaves, chaves_novas) if self.chaves.dtype.kind == 'U' else self.chaves.dtype
+        return (np.concatenate([self.chaves.astype(tipo, copy=False), chaves_novas.astype(tipo)]),
+                np.concatenate([valores, [v for _, v in novas]]))
+
+    def dataframe(self, coluna_chave, coluna_valor, coluna_rotulo=None, com_edicoes=True):
+        # Para o cruzamento; chaves que só existem nas edições ficam sem rótulo
+        chaves, valores = self.atuais() if com_edicoes else (self.chaves, self.valores)
+        colunas = {coluna_chave: chaves, coluna_valor: valores}
+        if coluna_rotulo:
+            rotulos = self.rotulos if self.rotulos is not None else np.empty(0, dtype=object)
+            colunas[coluna_rotulo] = np.concatenate([rotulos, np.full(len(chaves) - len(rotulos), None, dtype=object)])
+        return pd.DataFrame(colunas)
+
+# ==========================================
+# MEMÓRIA OCUPADA PELA SESSÃO
+# ==========================================
+def tamanho(obj, _vistos=None):
+    """Bytes aproximados de `obj` e de tudo o que ele referencia (cada objeto contado uma vez)."""
+    vistos = set() if _vistos is None else _vistos
+    if id(obj) in vistos: return 0
+    vistos.add(id(obj))
+    if isinstance(obj, pd.DataFrame): return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, pd.Series): return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes + (sum(tamanho(x, vistos) for x in obj.ravel()) if obj.dtype == object else 0)
+    total = sys.getsizeof(obj)
+    if isinstance(obj, dict): total += sum(tamanho(k, vistos) + tamanho(v, vistos) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)): total += sum(tamanho(x, vistos) for x in obj)
+    elif hasattr(type(obj), '__slots__') and type(obj).__module__.startswith('conciliador_core'):
+        total += sum(tamanho(getattr(obj, s), vistos) for s in type(obj).__slots__ if hasattr(obj, s))
+    return total
+
+def formatar_bytes(n):
+    # "850 KB", "12,4 MB"
+    return f"{n / 1024:.0f} KB" if n < 1024 ** 2 else f"{n / 1024 ** 2:.1f} MB".replace('.', ',')
+
+def bytes_sessao(estado):
+    """Bytes usados pelos dados guardados em `estado` (o st.session_state ou qualquer dicionário)."""
+    vistos = set()
+    return sum(tamanho(estado[chave], vistos) for chave in list(estado.keys()))
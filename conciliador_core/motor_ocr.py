@@ -0,0 +1,126 @@
+import re
+import threading
+
+import pytesseract
+from pytesseract import Output
+
+try:
+    import tesserocr
+except ImportError:  # opcional: precisa do libtesseract-dev e do libleptonica-dev para instalar
+    tesserocr = None
+
+# ==========================================
+# MOTOR DE OCR (TESSEROCR OU PYTESSERACT)
+# ==========================================
+# Com o tesserocr instalado, cada processo do pool de OCR mantém as instâncias da API do tesseract
+# abertas (uma por idioma/psm/variáveis), com o modelo carregado uma vez só, e recebe as imagens da
+# memória. Sem ele, cada chamada do pytesseract grava a imagem em disco e abre um processo `tesseract`
+# novo, que recarrega o modelo. As três funções devolvem o mesmo nos dois motores.
+MOTOR = "tesserocr" if tesserocr is not None else "pytesseract"
+
+def _desativar_tesserocr():
+    # O tesserocr importou, mas a API não abre ou não lê a imagem (modelo 'por' fora do tessdata que ele procura,
+    # libtesseract de outra versão...): o processo passa a usar o pytesseract, que chama o executável `tesseract`
+    global tesserocr, MOTOR
+    tesserocr, MOTOR = None, "pytesseract"
+
+_apis = threading.local()
+
+def _ler_config(config):
+    # '--psm 6 -c tessedit_char_whitelist=0123' -> (6, None, (('tessedit_char_whitelist', '0123'),))
+    psm = re.search(r'--psm\s+(\d+)', config or "")
+    oem = re.search(r'--oem\s+(\d+)', config or "")
+    variaveis = tuple(re.findall(r'-c\s+([^=\s]+)=(\S+)', config or ""))
+    return int(psm.group(1)) if psm else None, int(oem.group(1)) if oem else None, variaveis
+
+def _api(lang, config):
+    # Instância da API deste processo/thread para a combinação pedida, criada só na primeira vez
+    if not hasattr(_apis, "abertas"): _apis.abertas = {}
+    chave = (lang,) + _ler_config(config)
+    api = _apis.abertas.get(chave)
+    if api is None:
+        psm, oem, variaveis = chave[1:]
+        opcoes = {"lang": lang}
+        if psm is not None: opcoes["psm"] = psm
+        if oem is not None: opcoes["oem"] = oem
+        api = tesserocr.PyTessBaseAPI(**opcoes)
+        for nome, valor in variaveis: api.SetVariable(nome, valor)
+        _apis.abertas[chave] = api
+    return api
+
+def ler_texto(img, lang='por', config=''):
+    """Texto da imagem (como pytesseract.image_to_string)."""
+    if tesserocr is not None:
+        try:
+            api = _api(lang, config)
+            api.SetImage(img)
+            return api.GetUTF8Text()
+        except Exception:
+            _desativar_tesserocr()
+    return pytesseract.image_to_string(img, lang=lang, config=config)
+
+def _media(notas):
+    # Confiança média do tesseract (0-100) nas palavras lidas; None se não leu nenhuma
+    notas = [float(n) for n in notas if float(n) >= 0]
+    return sum(notas) / len(notas) if notas else None
+
+def ler_texto_com_confianca(img, lang='por', config=''):
+    """(texto, confiança média das palavras): o texto é o de `ler_texto`, do mesmo reconhecimento da confiança."""
+    if tesserocr is not None:
+        try:
+            api = _api(lang, config)
+            api.SetImage(img)
+            return api.GetUTF8Text(), _media(api.AllWordConfidences())
+        except Exception:
+            _desativar_tesserocr()
+    # Uma execução do `tesseract` grava o .txt (o mesmo do image_to_string) e o .tsv (o do image_to_data)
+    tess = pytesseract.pytesseract
+    with tess.save(img) as (base, entrada):
+        tess.run_tesseract(entrada, base, 'txt', lang, f"-c tessedit_create_tsv=1 {config}".strip())
+        with open(f"{base}.txt", encoding="utf-8") as f: texto = f.read()
+        with open(f"{base}.tsv", encoding="utf-8") as f: dados = tess.file_to_dict(f.read(), '\t', -1)
+    return texto, _media(c for c, t in zip(dados.get('conf', []), dados.get('text', [])) if str(t).strip())
+
+def ler_dados(img, lang='por', config=''):
+    """Palavras com caixa, confiança e bloco/parágrafo/linha (como pytesseract.image_to_data com Output.DICT)."""
+    if tesserocr is not None:
+        try:
+            return _ler_dados_tesserocr(img, lang, config)
+        except Exception:
+            _desativar_tesserocr()
+    return pytesseract.image_to_data(img, lang=lang, config=config, output_type=Output.DICT)
+
+def _ler_dados_tesserocr(img, lang, config):
+    RIL = tesserocr.RIL
+    api = _api(lang, config)
+    api.SetImage(img)
+    api.Recognize()
+    dados = {k: [] for k in ('text', 'left', 'top', 'width', 'height', 'conf', 'block_num', 'par_num', 'line_num')}
+    bloco = paragrafo = linha = 0
+    for palavra in tesserocr.iterate_level(api.GetIterator(), RIL.WORD):
+        if palavra.IsAtBeginningOf(RIL.BLOCK): bloco, paragrafo, linha = bloco + 1, 0, 0
+        if palavra.IsAtBeginningOf(RIL.PARA): paragrafo, linha = paragrafo + 1, 0
+        if palavra.IsAtBeginningOf(RIL.TEXTLINE): linha += 1
+        caixa = palavra.BoundingBox(RIL.WORD)
+        if caixa is None: continue
+        x0, y0, x1, y1 = caixa
+        dados['text'].append(palavra.GetUTF8Text(RIL.WORD) or "")
+        dados['left'].append(x0); dados['top'].append(y0); dados['width'].append(x1 - x0); dados['height'].append(y1 - y0)
+        dados['conf'].append(palavra.Confidence(RIL.WORD))
+        dados['block_num'].append(bloco); dados['par_num'].append(paragrafo); dados['line_num'].append(linha)
+    return dados
+
+def detectar_orientacao(img):
+    """Graus (0, 90, 180 ou 270) para endireitar a imagem (o 'rotate' do OSD do tesseract)."""
+    if tesserocr is not None:
+        try:
+            api = _api('osd', f'--psm {int(tesserocr.PSM.OSD_ONLY)}')
+            api.SetImage(img)
+        except Exception:
+            _desativar_tesserocr()
+        else:
+            # Sem resultado é a imagem que não tem texto suficiente, não o motor: falha como o image_to_osd
+            osd = api.DetectOrientationScript()
+            if osd is None: raise RuntimeError("OSD sem resultado para a imagem")
+            return (360 - osd['orient_deg']) % 360
+    return pytesseract.image_to_osd(img, output_type=Output.DICT)['rotate']
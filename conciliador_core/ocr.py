@@ -0,0 +1,241 @@
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from pdf2image import convert_from_path
+from PIL import Image
+
+from conciliador_core import motor_ocr
+from conciliador_core.cache import chave_cache, gravar_entrada, ler_entrada
+
+# ==========================================
+# POOL DE OCR (PROCESSOS)
+# ==========================================
+# O OCR é limitado por CPU e o Streamlit roda todas as sessões no mesmo
+# processo, por isso existe um único pool por processo, limitado ao número
+# de núcleos disponíveis e compartilhado entre os usuários.
+def _nucleos_disponiveis():
+    try: return len(os.sched_getaffinity(0))
+    except AttributeError: return os.cpu_count() or 1
+
+MAX_PROCESSOS_OCR = max(1, int(os.environ.get("CONCILIADOR_OCR_PROCESSOS", _nucleos_disponiveis())))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _obter_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # "spawn" evita herdar as threads do servidor do Streamlit no fork
+            _pool = ProcessPoolExecutor(max_workers=MAX_PROCESSOS_OCR, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def _descartar_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool: _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _faixas_contiguas(paginas):
+    # [3, 4, 5, 9, 10] -> [(3, 5), (9, 10)]
+    faixas = []
+    for num_pagina in sorted(set(paginas)):
+        if faixas and num_pagina == faixas[-1][1] + 1:
+            faixas[-1] = (faixas[-1][0], num_pagina)
+        else:
+            faixas.append((num_pagina, num_pagina))
+    return faixas
+
+def rasterizar_paginas(caminho_pdf, paginas, pasta_saida, dpi=300, escala_cinza=True):
+    """Renderiza apenas as `paginas` pedidas, uma chamada ao poppler por faixa contígua.
+
+    Gera pares (num_pagina, caminho_imagem) à medida que cada faixa fica pronta;
+    as imagens ficam em disco em `pasta_saida` e não passam pela memória deste processo.
+    """
+    for inicio, fim in _faixas_contiguas(paginas):
+        caminhos = convert_from_path(
+            caminho_pdf, dpi=dpi, first_page=inicio, last_page=fim,
+            output_folder=pasta_saida, output_file=f"p{inicio:05d}_",
+            paths_only=True, grayscale=escala_cinza
+        )
+        yield from zip(range(inicio, fim + 1), caminhos)
+
+# ==========================================
+# OCR ADAPTATIVO: SÓ A TABELA EM ALTA RESOLUÇÃO
+# ==========================================
+# "completo": a página inteira em alta resolução. "adaptativo": uma passada em baixa resolução localiza as
+# linhas de item (começam com número e têm valor monetário) e a coluna onde começam os valores; só essa
+# região é lida em alta resolução, com os valores restritos a dígitos e pontuação. As linhas fora da
+# tabela (cabeçalhos como "DE ENTRADAS") ficam com o texto da passada em baixa resolução.
+MODOS_OCR = ("completo", "adaptativo")
+MODO_OCR_PADRAO = os.environ.get("CONCILIADOR_OCR_MODO", "completo")
+FATOR_LOCALIZACAO = 3      # 300 dpi -> 100 dpi na passada que localiza a tabela
+MARGEM_REGIAO = 12         # pixels (na resolução final) em volta da tabela e antes da coluna de valores
+CARACTERES_VALORES = "0123456789.,-()"
+_RE_VALOR_OCR = re.compile(r'\d,\d{2}\)?$')
+_RE_INICIO_ITEM = re.compile(r'^"?\d')
+
+def _linhas_ocr(img, lang, config, dx=0, dy=0, escala=1):
+    # Linhas do image_to_data: listas de [texto, x0, y0, x1, y1, confiança] (nas coordenadas da imagem original), da esquerda para a direita
+    dados = motor_ocr.ler_dados(img, lang=lang, config=config)
+    linhas = {}
+    for i, texto in enumerate(dados['text']):
+        if not texto.strip(): continue
+        x0, y0 = dados['left'][i] * escala + dx, dados['top'][i] * escala + dy
+        palavra = [texto, x0, y0, x0 + dados['width'][i] * escala, y0 + dados['height'][i] * escala, float(dados['conf'][i])]
+        linhas.setdefault((dados['block_num'][i], dados['par_num'][i], dados['line_num'][i]), []).append(palavra)
+    return sorted((sorted(l, key=lambda p: p[1]) for l in linhas.values()), key=lambda l: min(p[2] for p in l))
+
+def _eh_item(linha):
+    return _RE_INICIO_ITEM.match(linha[0][0]) is not None and any(_RE_VALOR_OCR.search(p[0]) for p in linha)
+
+def _texto_das_linhas(linhas):
+    return "\n".join(" ".join(p[0] for p in linha) for linha in linhas)
+
+def _confianca(palavras):
+    # Confiança média do tesseract (0-100) nas palavras lidas; None se não leu nenhuma
+    notas = [p[5] for p in palavras if p[5] >= 0]
+    return sum(notas) / len(notas) if notas else None
+
+def _ocr_adaptativo(img, lang, config):
+    # (texto, confiança na tabela) ou None se a página não tem linhas de item reconhecíveis
+    largura, altura = img.size
+    linhas_baixa = _linhas_ocr(img.reduce(FATOR_LOCALIZACAO), lang, config, escala=FATOR_LOCALIZACAO)
+    itens = [l for l in linhas_baixa if _eh_item(l)]
+    if not itens: return None
+
+    topo = max(0, min(p[2] for l in itens for p in l) - MARGEM_REGIAO)
+    base = min(altura, max(p[4] for l in itens for p in l) + MARGEM_REGIAO)
+    esquerda = max(0, min(l[0][1] for l in itens) - MARGEM_REGIAO)
+    direita = min(largura, max(p[3] for l in itens for p in l) + MARGEM_REGIAO)
+    x_valores = max(esquerda + 1, min(p[1] for l in itens for p in l if _RE_VALOR_OCR.search(p[0])) - MARGEM_REGIAO)
+
+    rotulos = _linhas_ocr(img.crop((esquerda, topo, x_valores, base)), lang, config, esquerda, topo)
+    config_valores = f"{config} -c tessedit_char_whitelist={CARACTERES_VALORES}"
+    valores = [p for l in _linhas_ocr(img.crop((x_valores, topo, direita, base)), lang, config_valores, x_valores, topo) for p in l]
+
+    # Cada valor vai para a linha de rótulo cujo centro vertical está mais perto (valores sem linha formam a sua)
+    tabela = [list(l) for l in rotulos]
+    for p in valores:
+        centro = (p[2] + p[4]) / 2
+        perto = min(tabela, key=lambda l: abs((min(q[2] for q in l) + max(q[4] for q in l)) / 2 - centro), default=None)
+        if perto is not None and min(q[2] for q in perto) <= centro <= max(q[4] for q in perto): perto.append(p)
+        else: tabela.append([p])
+    tabela = sorted((sorted(l, key=lambda p: p[1]) for l in tabela), key=lambda l: min(p[2] for p in l))
+
+    acima = [l for l in linhas_baixa if max(p[4] for p in l) <= topo]
+    abaixo = [l for l in linhas_baixa if min(p[2] for p in l) >= base]
+    return _texto_das_linhas(acima + tabela + abaixo), _confianca([p for l in tabela for p in l])
+
+# ==========================================
+# ORIENTAÇÃO: UMA DETECÇÃO POR DOCUMENTO
+# ==========================================
+# Os relatórios de uma unidade vêm quase sempre na mesma orientação: o OSD roda uma vez, numa miniatura
+# da primeira página, e a rotação vale para o documento todo (e fica no cache pelo hash do PDF). Só a
+# página cujo OCR sai com confiança baixa repete o OSD, na própria miniatura.
+FATOR_MINIATURA_OSD = 2    # 300 dpi -> 150 dpi para o OSD
+CONFIANCA_MINIMA = 60      # abaixo disso (média do tesseract, 0-100) a página confere a própria orientação
+
+def _detectar_rotacao(img):
+    # Graus para endireitar a imagem segundo o OSD numa miniatura, ou None se o OSD falhar
+    try:
+        return motor_ocr.detectar_orientacao(img.reduce(FATOR_MINIATURA_OSD))
+    except Exception:
+        return None
+
+def _rotacao_da_imagem(caminho_imagem):
+    # Executado no processo filho, na primeira página renderizada do documento
+    try:
+        with Image.open(caminho_imagem) as img: return _detectar_rotacao(img)
+    except Exception:
+        return None
+
+def _girar(img, graus):
+    return img.rotate(-graus, expand=True) if graus else img
+
+def _ler_imagem(img, lang, config, modo, com_confianca):
+    # (texto, confiança ou None). O texto do modo completo é sempre o do `ler_texto`; a confiança, se pedida,
+    # vem do mesmo reconhecimento e só decide se a página repete o OSD
+    if modo == "adaptativo":
+        # Página sem linhas de item reconhecíveis (ou falha na localização): OCR da página inteira
+        try:
+            resultado = _ocr_adaptativo(img, lang, config)
+            if resultado is not None: return resultado
+        except Exception: pass
+    if not com_confianca: return motor_ocr.ler_texto(img, lang=lang, config=config), None
+    return motor_ocr.ler_texto_com_confianca(img, lang=lang, config=config)
+
+def _ocr_imagem(caminho_imagem, lang, config, rotacao=None, modo="completo"):
+    # Executado no processo filho. `rotacao`: None sem correção de orientação, ou os graus do documento.
+    # Devolve None se a imagem não puder ser lida.
+    try:
+        with Image.open(caminho_imagem) as img:
+            if rotacao is None: return _ler_imagem(img, lang, config, modo, False)[0]
+
+            texto, confianca = _ler_imagem(_girar(img, rotacao), lang, config, modo, True)
+            if confianca is None or confianca < CONFIANCA_MINIMA:
+                rotacao_pagina = _detectar_rotacao(img)
+                if rotacao_pagina is not None and rotacao_pagina != rotacao:
+                    texto = _ler_imagem(_girar(img, rotacao_pagina), lang, config, modo, False)[0]
+            return texto
+    except Exception:
+        return None
+
+def _rotacao_do_documento(pool, pdf_bytes, caminho_primeira_pagina):
+    # Orientação guardada para este PDF ou detectada na primeira página; sem detecção, segue sem girar
+    chave = chave_cache(pdf_bytes, "orientacao", FATOR_MINIATURA_OSD)
+    entrada = ler_entrada(chave)
+    if entrada is not None: return entrada["rotacao"]
+    graus = pool.submit(_rotacao_da_imagem, caminho_primeira_pagina).result()
+    if graus is None: return 0
+    gravar_entrada(chave, {"rotacao": graus})
+    return graus
+
+def ocr_paginas(pdf_bytes, paginas, dpi=300, lang='por', config='--psm 6', detectar_rotacao=False, escala_cinza=True, ao_progredir=None, modo=None):
+    """Faz o OCR das `paginas` (numeradas a partir de 1) em paralelo, no `modo` de MODOS_OCR (padrão: MODO_OCR_PADRAO).
+
+    Devolve os textos na mesma ordem de `paginas` (None para as que falharem) e
+    chama `ao_progredir(feitas, total)` a cada página concluída. Cada faixa
+    rasterizada já é enviada ao pool enquanto a próxima é renderizada.
+    """
+    resultados = [None] * len(paginas)
+    if not paginas: return resultados
+    modo = modo or MODO_OCR_PADRAO
+
+    posicoes = {}
+    for i, num_pagina in enumerate(paginas): posicoes.setdefault(num_pagina, []).append(i)
+
+    with tempfile.TemporaryDirectory(prefix="conciliador_ocr_") as pasta:
+        caminho_pdf = os.path.join(pasta, "documento.pdf")
+        with open(caminho_pdf, "wb") as f: f.write(pdf_bytes)
+
+        pool = _obter_pool()
+        futuros = {}
+        try:
+            rotacao = None
+            try:
+                for num_pagina, caminho_imagem in rasterizar_paginas(caminho_pdf, paginas, pasta, dpi, escala_cinza):
+                    if detectar_rotacao and rotacao is None: rotacao = _rotacao_do_documento(pool, pdf_bytes, caminho_imagem)
+                    futuros[pool.submit(_ocr_imagem, caminho_imagem, lang, config, rotacao, modo)] = num_pagina
+            except BrokenProcessPool:
+                raise
+            except Exception:
+                # Falha do poppler: as páginas já renderizadas seguem para o OCR, as demais ficam sem texto
+                pass
+
+            feitas = 0
+            for futuro in as_completed(futuros):
+                texto = futuro.result()
+                for i in posicoes[futuros[futuro]]:
+                    resultados[i] = texto
+                    feitas += 1
+                if ao_progredir: ao_progredir(feitas, len(paginas))
+        except BrokenProcessPool:
+            # Um processo filho morreu (ex.: falta de memória): as páginas restantes ficam sem OCR
+            _descartar_pool(pool)
+    return resultados
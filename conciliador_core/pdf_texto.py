@@ -0,0 +1,154 @@
+import io
+import time
+
+import pdfplumber
+from pdfminer.pdftypes import resolve1
+from pdfminer.psparser import LIT
+
+from conciliador_core import motor_ocr
+from conciliador_core.cache import chave_cache, gravar_paginas, ler_classificacao, ler_paginas
+from conciliador_core.ocr import MODO_OCR_PADRAO, ocr_paginas
+
+# ==========================================
+# PRÉ-CLASSIFICAÇÃO: PÁGINA DE TEXTO OU ESCANEADA
+# ==========================================
+# Decide antes do extract_text (agrupamento em palavras e linhas) se a página é escaneada, para ela ir
+# direto para o OCR. As páginas de texto continuam passando pelo `precisa_ocr` de quem chama.
+MIN_CARACTERES_TEXTO = 50    # a partir daqui a página tem camada de texto e as imagens nem são olhadas
+MIN_COBERTURA_IMAGEM = 0.5   # fração da página coberta por imagens para poucos caracteres contarem como carimbo
+_FORM = LIT('Form')
+
+def _pode_ter_texto(page):
+    # Sem fontes nos recursos (nem formulários com recursos próprios) não há texto: nem interpreta a página
+    recursos = resolve1(page.page_obj.resources) or {}
+    if resolve1(recursos.get('Font')): return True
+    return any(getattr(resolve1(x), 'attrs', {}).get('Subtype') == _FORM for x in (resolve1(recursos.get('XObject')) or {}).values())
+
+def _cobertura_imagens(page):
+    area = 0.0
+    for img in page.images:
+        largura = min(img['x1'], page.width) - max(img['x0'], 0)
+        altura = min(img['bottom'], page.height) - max(img['top'], 0)
+        if largura > 0 and altura > 0: area += largura * altura
+    return min(1.0, area / (page.width * page.height)) if page.width and page.height else 0.0
+
+def classificar_pagina(page):
+    """"escaneada" (vai direto para o OCR) ou "texto" (o texto extraído decide), pelos caracteres, fontes e imagens."""
+    if not _pode_ter_texto(page): return "escaneada"
+    n_caracteres = len(page.chars)
+    if n_caracteres >= MIN_CARACTERES_TEXTO: return "texto"
+    if n_caracteres == 0 or _cobertura_imagens(page) >= MIN_COBERTURA_IMAGEM: return "escaneada"
+    return "texto"
+
+# ==========================================
+# EXTRAÇÃO DE TEXTO DOS RELATÓRIOS PDF
+# ==========================================
+def _chave_paginas(pdf_bytes, perfil, com_ocr, dpi, lang, config, detectar_rotacao, modo_ocr):
+    if not com_ocr: parametros_ocr = ("sem-ocr",)
+    else:
+        modo_ocr = modo_ocr or MODO_OCR_PADRAO
+        # O motor entra na chave: tesserocr e pytesseract podem diferir em espaços e quebras de linha
+        parametros_ocr = (dpi, lang, config, detectar_rotacao, motor_ocr.MOTOR) + (() if modo_ocr == "completo" else (modo_ocr,))
+    return chave_cache(pdf_bytes, perfil, pdfplumber.__version__, *parametros_ocr)
+
+def extrair_paginas(pdf_bytes, perfil="texto", precisa_ocr=None, dpi=300, lang='por', config='--psm 6', detectar_rotacao=False, ao_progredir=None, modo_ocr=None):
+    """Lista de (texto, is_ocr) de cada página, na ordem do documento.
+
+    As páginas escaneadas (classificar_pagina) e aquelas em que `precisa_ocr(texto)` é
+    verdadeiro são enviadas, todas de uma vez, ao pool de OCR. Se o OCR falhar, a página
+    mantém o texto original (nenhum, se foi classificada como escaneada).
+    `perfil` identifica o critério de OCR da página chamadora na chave do cache.
+    `modo_ocr` é um de ocr.MODOS_OCR (padrão: ocr.MODO_OCR_PADRAO).
+    A classe e o tempo da classificação de cada página ficam no cache junto do texto (ver tempos_classificacao).
+    """
+    chave = _chave_paginas(pdf_bytes, perfil, precisa_ocr is not None, dpi, lang, config, detectar_rotacao, modo_ocr)
+    paginas = ler_paginas(chave)
+    if paginas is not None: return paginas
+
+    textos, escaneadas, classificacao = [], set(), []
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as p_doc:
+        for i, page in enumerate(p_doc.pages):
+            if precisa_ocr is not None:
+                inicio = time.perf_counter()
+                classe = classificar_pagina(page)
+                classificacao.append((classe, time.perf_counter() - inicio))
+                if classe == "escaneada":
+                    escaneadas.add(i)
+                    textos.append(None)
+                    continue
+            textos.append(page.extract_text())
+
+    paginas = [(txt, False) for txt in textos]
+    ocr_falhou = False
+    if precisa_ocr is not None:
+        idx_ocr = [i for i, txt in enumerate(textos) if i in escaneadas or precisa_ocr(txt)]
+        textos_ocr = ocr_paginas(pdf_bytes, [i + 1 for i in idx_ocr], dpi=dpi, lang=lang, config=config, detectar_rotacao=detectar_rotacao, ao_progredir=ao_progredir, modo=modo_ocr)
+        for i, txt_ocr in zip(idx_ocr, textos_ocr):
+            paginas[i] = (txt_ocr if txt_ocr is not None else textos[i], True)
+            ocr_falhou = ocr_falhou or txt_ocr is None
+
+    # Falhas de OCR podem ser passageiras (ex.: pool reiniciado), então não ficam guardadas
+    if not ocr_falhou: gravar_paginas(chave, paginas, classificacao)
+    return paginas
+
+def tempos_classificacao(pdf_bytes, perfil, dpi=300, lang='por', config='--psm 6', detectar_rotacao=False, modo_ocr=None):
+    # [(classe, segundos)] de cada página na extração com OCR já feita por `extrair_paginas` com estes parâmetros (None se não está no cache)
+    return ler_classificacao(_chave_paginas(pdf_bytes, perfil, True, dpi, lang, config, detectar_rotacao, modo_ocr))
+
+def iterar_paginas(pdf_bytes, perfil="texto"):
+    """Texto de cada página (sem OCR), entregue assim que a página é lida.
+
+    Quem consome pode ir processando enquanto as páginas seguintes são extraídas; os objetos do
+    pdfplumber de cada página são liberados logo depois. Usa o mesmo cache de `extrair_paginas`.
+    """
+    chave = chave_cache(pdf_bytes, perfil, pdfplumber.__version__, "sem-ocr")
+    paginas = ler_paginas(chave)
+    if paginas is not None:
+        for txt, _ in paginas: yield txt
+        return
+
+    textos = []
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as p_doc:
+        for page in p_doc.pages:
+            txt = page.extract_text()
+            page.close()
+            textos.append(txt)
+            yield txt
+    gravar_paginas(chave, [(txt, False) for txt in textos])
+
+def iterar_linhas(pdf_bytes, perfil="texto"):
+    # Linhas do documento inteiro, página após página (as mesmas do texto completo quebrado em '\n')
+    for txt in iterar_paginas(pdf_bytes, perfil):
+        yield from (txt or "").split("\n")
+
+def _agrupar_linhas(palavras, tolerancia_y):
+    # Palavras do extract_words em linhas (topo a até `tolerancia_y` pontos do início da linha), cada uma da esquerda para a direita
+    linhas, topo = [], None
+    for p in sorted(palavras, key=lambda p: (p['top'], p['x0'])):
+        if topo is None or p['top'] - topo > tolerancia_y:
+            linhas.append([])
+            topo = p['top']
+        linhas[-1].append([p['text'], round(p['x0'], 1), round(p['x1'], 1)])
+    for linha in linhas: linha.sort(key=lambda p: p[1])
+    return linhas
+
+def iterar_palavras(pdf_bytes, perfil="texto", tolerancia_y=3):
+    """Palavras posicionadas de cada página (sem OCR): lista de linhas, cada linha uma lista de [texto, x0, x1].
+
+    Serve para separar colunas pela posição em vez de pelo texto corrido. As linhas de cada página
+    ficam no cache no lugar do texto, numa chave própria.
+    """
+    chave = chave_cache(pdf_bytes, perfil, pdfplumber.__version__, "palavras", tolerancia_y)
+    paginas = ler_paginas(chave)
+    if paginas is not None:
+        for linhas, _ in paginas: yield linhas
+        return
+
+    todas = []
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as p_doc:
+        for page in p_doc.pages:
+            linhas = _agrupar_linhas(page.extract_words(), tolerancia_y)
+            page.close()
+            todas.append(linhas)
+            yield linhas
+    gravar_paginas(chave, [(linhas, False) for linhas in todas])
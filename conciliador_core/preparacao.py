@@ -0,0 +1,222 @@
+import io
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from copy import copy
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+
+# ==========================================
+# PREPARAÇÃO DA PLANILHA SIAFI DE DEPRECIAÇÃO
+# ==========================================
+# Cada aba UG ganha a coluna A com a natureza de despesa (o PROCV na MATRIZ), perde as linhas
+# da conta 123110402, tem as contas convertidas para número e é ordenada pela coluna A, com
+# uma linha TOTAL no fim. Os dados são lidos uma vez, tratados em memória e escritos de volta
+# numa só passada (sem um delete_rows por linha, que desloca todas as células de baixo).
+LINHA_INICIAL_DEP = 9  # primeira linha de dados (a 8ª é o cabeçalho das colunas)
+CONTA_EXCLUIDA_DEP = "123110402"
+LARGURAS_DEP = {'A': 15, 'B': 15, 'C': 20, 'D': 20}
+
+_BORDA_FINA = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+_FONTE_ARIAL_9 = Font(name='Arial', size=9)
+_ALINHAMENTO_CENTRO = Alignment(vertical='center')
+
+def procv_depreciacao(matriz):
+    # Coluna A (como texto) -> coluna B da MATRIZ, como o PROCV da planilha
+    return {str(chave).strip(): valor for chave, valor in matriz.linhas if chave is not None}
+
+def _eh_numero(texto):
+    return texto.replace('.', '', 1).isdigit()
+
+def preparar_linhas_depreciacao(linhas, procv):
+    """Linhas de dados preparadas, cada uma começando pela natureza de despesa (ou "#N/D").
+
+    `linhas` são as tuplas (values_only) da aba original a partir da LINHA_INICIAL_DEP.
+    """
+    preparadas = []
+    for linha in linhas:
+        conta = linha[0] if linha else None
+        texto = str(conta).strip() if conta else ""
+        if texto == CONTA_EXCLUIDA_DEP: continue
+        if _eh_numero(texto): conta = float(texto) if '.' in texto else int(texto)
+        nova = [procv.get(texto, "#N/D"), conta, *linha[1:]]
+        preparadas.append(nova + [None] * (4 - len(nova)))
+
+    # Só as colunas A a D são ordenadas; as seguintes, se houver, ficam na ordem da aba
+    ordenadas = sorted((linha[:4] for linha in preparadas), key=lambda x: str(x[0]) if x[0] is not None else "")
+    return [abcd + linha[4:] for abcd, linha in zip(ordenadas, preparadas)]
+
+def preparar_aba_depreciacao(ws, procv):
+    """Prepara no lugar uma aba carregada com openpyxl (fora do modo read-only); devolve as linhas de dados escritas."""
+    ultima_linha = ws.max_row
+    preparadas = preparar_linhas_depreciacao(list(ws.iter_rows(min_row=LINHA_INICIAL_DEP, max_row=ultima_linha, values_only=True)), procv)
+    ws.insert_cols(1)
+
+    for i, linha in enumerate(preparadas):
+        r = LINHA_INICIAL_DEP + i
+        for c, valor in enumerate(linha, start=1): ws.cell(row=r, column=c).value = valor
+        if _eh_numero(str(linha[1]) if linha[1] else ""): ws.cell(row=r, column=2).number_format = 'General'
+
+    # As linhas excluídas sobram no fim da aba e saem de uma vez, sem nada abaixo para deslocar
+    sobra = ultima_linha - (LINHA_INICIAL_DEP - 1) - len(preparadas)
+    if sobra > 0: ws.delete_rows(LINHA_INICIAL_DEP + len(preparadas), sobra)
+
+    linha_total = ws.max_row + 1
+    ws.cell(row=linha_total, column=2).value = "TOTAL"
+    for c, letra in ((3, 'C'), (4, 'D')):
+        ws.cell(row=linha_total, column=c).value = f"=SUM({letra}{LINHA_INICIAL_DEP}:{letra}{linha_total - 1})"
+        ws.cell(row=linha_total, column=c).number_format = "#,##0.00"
+    ws.cell(row=LINHA_INICIAL_DEP - 1, column=1).value = "Nat Desp"
+
+    for letra, largura in LARGURAS_DEP.items(): ws.column_dimensions[letra].width = largura
+    for r, linha_ws in enumerate(ws.iter_rows(min_row=6, max_row=linha_total, max_col=4), start=6):
+        for celula in linha_ws:
+            celula.font = _FONTE_ARIAL_9
+            celula.alignment = _ALINHAMENTO_CENTRO
+            if r >= LINHA_INICIAL_DEP: celula.border = _BORDA_FINA
+    return preparadas
+
+def preparar_planilha_depreciacao(arquivo, matriz):
+    """(workbook, abas preparadas) da planilha enviada, com todas as abas exceto a MATRIZ preparadas."""
+    procv = procv_depreciacao(matriz)
+    wb = openpyxl.load_workbook(arquivo)
+    abas = [nome for nome in wb.sheetnames if nome != "MATRIZ"]
+    for nome in abas: preparar_aba_depreciacao(wb[nome], procv)
+    return wb, abas
+
+# ==========================================
+# DIVISÃO DAS ABAS EM ARQUIVOS (ZIP)
+# ==========================================
+# Cada aba preparada vira um modelo só com valores, estilos, larguras e mesclas (dá para mandar a
+# outro processo) e é escrita num workbook write-only próprio, sem reabrir a planilha inteira por aba.
+# O pool de processos é opcional: abrir os processos custa mais que escrever abas pequenas.
+MAX_PROCESSOS_DIVISAO = max(1, int(os.environ.get("CONCILIADOR_DIVISAO_PROCESSOS", "1")))
+_ATRIBUTOS_ESTILO = ('font', 'border', 'fill', 'number_format', 'alignment', 'protection')
+
+def modelo_da_aba(ws):
+    """Valores, estilos, larguras, alturas e mesclas de uma aba carregada, em estruturas simples."""
+    estilos, indices, linhas = [], {}, []
+    for linha_ws in ws.iter_rows():
+        linha = []
+        for celula in linha_ws:
+            idx = None
+            if celula.has_style:
+                idx = indices.get(celula.style_id)
+                if idx is None:
+                    idx = indices[celula.style_id] = len(estilos)
+                    estilos.append({nome: copy(getattr(celula, nome)) for nome in _ATRIBUTOS_ESTILO})
+            linha.append((celula.value, idx))
+        linhas.append(linha)
+    return {
+        'nome': ws.title,
+        'linhas': linhas,
+        'estilos': estilos,
+        'larguras': {letra: d.width for letra, d in ws.column_dimensions.items() if d.customWidth},
+        'alturas': {r: d.height for r, d in ws.row_dimensions.items() if d.height is not None},
+        'mesclas': [str(intervalo) for intervalo in ws.merged_cells.ranges],
+    }
+
+def escrever_aba(modelo):
+    """Bytes de um .xlsx só com a aba do `modelo` (ver modelo_da_aba), escrito em modo write-only."""
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(modelo['nome'])
+    for letra, largura in modelo['larguras'].items(): ws.column_dimensions[letra].width = largura
+    for r, altura in modelo['alturas'].items(): ws.row_dimensions[r].height = altura
+    for intervalo in modelo['mesclas']: ws.merged_cells.add(intervalo)
+
+    # Cada estilo é registrado no workbook uma vez; as demais células copiam o StyleArray já resolvido
+    # (como o openpyxl faz ao copiar abas), sem procurar fonte, borda etc. a cada célula
+    resolvidos = {}
+    def celula(valor, idx):
+        if idx is None: return valor
+        c = WriteOnlyCell(ws, valor)
+        if idx in resolvidos: c._style = copy(resolvidos[idx])
+        else:
+            for nome, estilo in modelo['estilos'][idx].items(): setattr(c, nome, estilo)
+            resolvidos[idx] = copy(c._style)
+        return c
+
+    for linha in modelo['linhas']: ws.append([celula(valor, idx) for valor, idx in linha])
+    saida = io.BytesIO()
+    wb.save(saida)
+    return saida.getvalue()
+
+def gerar_zip_abas(modelos, max_processos=None):
+    """Bytes de um ZIP com um `<aba>.xlsx` por modelo; cada arquivo entra no ZIP assim que fica pronto."""
+    max_processos = max_processos or MAX_PROCESSOS_DIVISAO
+    saida = io.BytesIO()
+    with zipfile.ZipFile(saida, "w", zipfile.ZIP_DEFLATED) as zf:
+        if max_processos == 1 or len(modelos) < 2:
+            for modelo in modelos: zf.writestr(f"{modelo['nome']}.xlsx", escrever_aba(modelo))
+        else:
+            with ProcessPoolExecutor(max_workers=min(max_processos, len(modelos)), mp_context=multiprocessing.get_context("spawn")) as pool:
+                futuros = {pool.submit(escrever_aba, modelo): modelo['nome'] for modelo in modelos}
+                for futuro in as_completed(futuros): zf.writestr(f"{futuros[futuro]}.xlsx", futuro.result())
+    return saida.getvalue()
+
+# ==========================================
+# PREPARAÇÃO DA PLANILHA SIAFI DO RMB
+# ==========================================
+# O modelo de cada aba (dados filtrados e ordenados, linhas destacadas e total) é calculado uma vez,
+# com operações de coluna, e serve tanto à planilha única quanto a cada arquivo do ZIP.
+CONTAS_EXCLUIDAS_RMB = [123110703, 123110402, 123119910]
+CORES_DESTAQUE_RMB = {123110801: '#FF0000', 123119905: '#0000FF'}  # conta -> fundo das linhas com valor
+LINHA_DADOS_RMB = 7  # índice (a partir de 0) da linha 8, onde começam os dados
+
+def preparar_aba_rmb(nome, df_raw, procv):
+    """Modelo de uma aba lida com header=None: cabeçalho, dados com a descrição da MATRIZ na coluna A, destaques e total.
+
+    Devolve None se a aba não tiver linhas de dados.
+    """
+    if len(df_raw) < 8: return None
+    cabecalho = df_raw.iloc[:LINHA_DADOS_RMB]
+    dados = df_raw.iloc[LINHA_DADOS_RMB:].copy()
+
+    dados[0] = pd.to_numeric(dados[0], errors='coerce')
+    dados = dados[~dados[0].isin(CONTAS_EXCLUIDAS_RMB)]
+    dados['Nova_Descricao'] = dados[0].map(procv)
+    colunas = list(dados.columns)
+    colunas.insert(0, colunas.pop(colunas.index('Nova_Descricao')))
+    dados = dados[colunas].sort_values(by='Nova_Descricao', ascending=True)
+
+    # Linhas destacadas: conta da lista com valor numérico diferente de zero (conta, coluna C e valor são reescritos com a cor)
+    contas = dados.iloc[:, 1].to_numpy()
+    valores = pd.to_numeric(dados.iloc[:, 3], errors='coerce').to_numpy(dtype=float)
+    com_valor = np.isfinite(valores) & (valores != 0)
+    coluna_c = dados.iloc[:, 2].to_numpy(dtype=object)
+    destaques = []
+    for conta, cor in CORES_DESTAQUE_RMB.items():
+        for i in np.flatnonzero((contas == conta) & com_valor):
+            destaques.append((int(i), cor, [contas[i], None if pd.isna(coluna_c[i]) else coluna_c[i], valores[i]]))
+    destaques.sort(key=lambda d: d[0])
+
+    return {'nome': nome, 'cabecalho': cabecalho, 'dados': dados, 'destaques': destaques, 'total': np.nansum(valores)}
+
+def escrever_aba_rmb(writer, modelo):
+    """Escreve o `modelo` (ver preparar_aba_rmb) como uma aba do ExcelWriter (xlsxwriter), com cores e total."""
+    nome = modelo['nome']
+    # Cabeçalho deslocado 1 coluna para a direita; dados a partir da coluna A, linha 8
+    modelo['cabecalho'].to_excel(writer, sheet_name=nome, startrow=0, startcol=1, index=False, header=False)
+    modelo['dados'].to_excel(writer, sheet_name=nome, startrow=LINHA_DADOS_RMB, startcol=0, index=False, header=False)
+
+    worksheet = writer.sheets[nome]
+    workbook = writer.book
+    fmt_currency = workbook.add_format({'num_format': '#,##0.00'})
+    fmt_total_label = workbook.add_format({'bold': True, 'align': 'right'})
+    fmt_total_value = workbook.add_format({'bold': True, 'num_format': '#,##0.00', 'top': 1})
+    fmt_cores = {cor: workbook.add_format({'bg_color': cor, 'font_color': '#FFFFFF'}) for cor in CORES_DESTAQUE_RMB.values()}
+
+    worksheet.set_column('A:A', 40)  # Nova Descrição
+    worksheet.set_column('B:C', 15)
+    worksheet.set_column('D:D', 18, fmt_currency)
+
+    for i, cor, valores in modelo['destaques']: worksheet.write_row(LINHA_DADOS_RMB + i, 1, valores, fmt_cores[cor])
+
+    linha_total = LINHA_DADOS_RMB + len(modelo['dados'])
+    worksheet.write(linha_total, 2, "TOTAL", fmt_total_label)
+    worksheet.write(linha_total, 3, modelo['total'], fmt_total_value)
@@ -0,0 +1,19 @@
+from fpdf import FPDF, XPos, YPos
+
+# ==========================================
+# RELATÓRIO PDF (CABEÇALHO E RODAPÉ PADRÃO)
+# ==========================================
+class PDF_Report(FPDF):
+    def __init__(self, titulo, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.titulo = titulo
+
+    def header(self):
+        self.set_font('helvetica', 'B', 12)
+        self.cell(0, 10, self.titulo, align='C', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        self.ln(5)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font('helvetica', 'I', 8)
+        self.cell(0, 10, f'Página {self.page_no()}', align='C')
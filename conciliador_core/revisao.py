@@ -0,0 +1,41 @@
+# ==========================================
+# REVISÃO INCREMENTAL (ETAPA 2 DAS PÁGINAS)
+# ==========================================
+# Cada edição de um st.number_input reexecuta a página inteira. Para não refazer o cruzamento de todas as
+# UGs a cada tecla, a conciliação de cada UG fica guardada no session_state e só é recalculada quando
+# um input dela muda (on_change=marcar_alterada). O PDF final só é gerado quando o usuário pede o download.
+# `estado` é o st.session_state (ou qualquer dicionário), para o módulo não depender do Streamlit.
+
+def limpar(estado):
+    # Ao processar novos arquivos: descarta as conciliações e o PDF da rodada anterior
+    for chave in ('conciliacoes', 'ugs_alteradas', 'versao_revisao', 'relatorio_pdf'): estado.pop(chave, None)
+
+def marcar_alterada(estado, ug):
+    # on_change dos inputs de edição: só esta UG é recalculada no próximo rerun
+    estado.setdefault('ugs_alteradas', set()).add(ug)
+
+def conciliacao_da_ug(estado, ug, recalcular):
+    """Conciliação guardada da UG; `recalcular()` só roda na primeira exibição ou depois de uma edição nela."""
+    conciliacoes = estado.setdefault('conciliacoes', {})
+    alteradas = estado.setdefault('ugs_alteradas', set())
+    if ug in alteradas or ug not in conciliacoes:
+        conciliacoes[ug] = recalcular()
+        alteradas.discard(ug)
+        estado['versao_revisao'] = estado.get('versao_revisao', 0) + 1
+    return conciliacoes[ug]
+
+def relatorio_sob_demanda(estado, gerar, *parametros):
+    """Função sem argumentos para o `data=` do st.download_button.
+
+    `gerar()` só roda no clique (numa thread à parte, sem acesso ao session_state) e os bytes ficam
+    guardados até alguma UG ser recalculada ou `parametros` (ex.: o mês do relatório) mudarem.
+    """
+    versao = (estado.get('versao_revisao', 0),) + parametros
+    guardado = estado.setdefault('relatorio_pdf', {})
+
+    def baixar():
+        if guardado.get('versao') != versao:
+            guardado['bytes'] = gerar()
+            guardado['versao'] = versao
+        return guardado['bytes']
+    return baixar
@@ -0,0 +1,325 @@
+import re
+
+import numpy as np
+import pandas as pd
+from fpdf import XPos, YPos
+
+from conciliador_core import ingestao
+from conciliador_core.arquivos import IndiceArquivos, ler_bytes
+from conciliador_core.memoria import Saldos
+from conciliador_core.pdf_texto import extrair_paginas, iterar_palavras
+from conciliador_core.relatorio import PDF_Report
+from conciliador_core.siafi import extract_excel_data
+from conciliador_core.valores import formatar_real, limpar_valor
+
+# ==========================================
+# CONCILIAÇÃO RMB x SIAFI (SEM INTERFACE)
+# ==========================================
+TITULO_RELATORIO = 'Relatório de Conferência Patrimonial'
+CONTA_ESTOQUE = '123110801'
+CONTAS_IGNORADAS = ['123110703', '123110402', '123119910', CONTA_ESTOQUE]
+# "texto": valores tirados do texto corrido de cada linha; "coordenadas": coluna de cada valor pela posição na página
+MODOS_EXTRACAO = ("texto", "coordenadas")
+TOLERANCIA_COLUNA = 4  # pontos entre as bordas direitas de valores da mesma coluna
+_RE_VALOR = re.compile(r'([0-9]{1,3}(?:[.,][0-9]{3})*[.,]\d{2})')
+
+def pagina_precisa_ocr(txt):
+    return not txt or len(txt) < 50
+
+def parear(planilha_siafi, pdfs):
+    """Junta cada aba UG da planilha ao PDF com o mesmo número de UG no nome (ver IndiceArquivos).
+
+    `pdfs` é um dicionário nome -> arquivo (upload, caminho ou bytes). Os avisos incluem os PDFs sem aba e os repetidos.
+    """
+    pares, avisos = [], []
+    indice = IndiceArquivos(pdfs)
+    abas_ug = list(planilha_siafi.abas_ug())
+    for sheet_name, ug in abas_ug:
+        pdf_match = indice.primeiro(ug)
+        if pdf_match:
+            pares.append({'ug': ug, 'sheet_name': sheet_name, 'pdf': pdf_match})
+        else:
+            avisos.append(f"Falta PDF: A Unidade Gestora {ug} está na planilha, mas o PDF correspondente não foi enviado.")
+    return pares, avisos + indice.avisos({ug for _, ug in abas_ug})
+
+def ler_aba(df_raw, matriz):
+    # (df_padrao, saldo_estoque, tem_estoque) de uma aba UG lida com header=None
+    df_padrao = pd.DataFrame(columns=['Chave_Vinculo', 'Saldo_Excel', 'Descricao_Completa'])
+    saldo_estoque = 0.0
+    tem_estoque_com_saldo = False
+
+    df_dados = extract_excel_data(df_raw)
+    if not df_dados.empty:
+        if CONTA_ESTOQUE in df_dados['Conta'].values:
+            saldo_estoque = df_dados[df_dados['Conta'] == CONTA_ESTOQUE]['Valor'].sum()
+            if abs(saldo_estoque) > 0.0: tem_estoque_com_saldo = True
+
+        df_dados = df_dados[~df_dados['Conta'].isin(CONTAS_IGNORADAS)].copy()
+        df_dados['Chave_Vinculo'] = df_dados['Conta'].map(matriz.chave_vinculo)
+        df_valid = df_dados.dropna(subset=['Chave_Vinculo']).copy()
+
+        if not df_valid.empty:
+            df_valid['Chave_Vinculo'] = df_valid['Chave_Vinculo'].astype(int)
+            df_padrao = df_valid.groupby('Chave_Vinculo').agg({'Valor': 'sum', 'Descricao': 'first'}).reset_index()
+            df_padrao.columns = ['Chave_Vinculo', 'Saldo_Excel', 'Descricao_Completa']
+    return df_padrao, saldo_estoque, tem_estoque_com_saldo
+
+def _chave_final(chave_raw):
+    return int(chave_raw[-2:]) if len(chave_raw) >= 4 else int(chave_raw)
+
+def _itens_do_texto(txt, is_ocr):
+    # (chave, saldo) das linhas de item de uma página: o saldo é o 4º valor a partir do fim da linha
+    itens = []
+    if not txt: return itens
+    if "DE ENTRADAS" in txt.upper() or "DE SAÍDAS" in txt.upper(): return itens
+
+    for line in txt.split('\n'):
+        line = line.strip()
+        if re.match(r'^"?\d+', line):
+            vals = []
+            if is_ocr:
+                vals_raw = re.findall(r'([\d\.\s]+,\d{2})', line)
+                vals = [v.replace(' ', '') for v in vals_raw]
+            else:
+                vals = _RE_VALOR.findall(line)
+
+            if len(vals) >= 4:
+                chave_match = re.match(r'^"?(\d+)', line)
+                if chave_match:
+                    itens.append((_chave_final(chave_match.group(1)), limpar_valor(vals[-4])))
+    return itens
+
+def _itens_por_coordenadas(paginas):
+    """(chave, saldo) de todo o documento pela posição das palavras, ou None se os valores não formam colunas.
+
+    Os números vêm alinhados à direita: as bordas direitas dos valores, agrupadas no documento inteiro, definem
+    as colunas e o saldo é a 4ª coluna a partir da direita. Célula vazia não desloca o saldo e uma linha de
+    item sem valores recebe os da linha de baixo (valores que quebraram de linha). Sem colunas alinhadas
+    (texto corrido) devolve None e vale a leitura pelo texto.
+    """
+    itens = []  # [chave, [(x1, valor), ...]]
+    for linhas in paginas:
+        texto = "\n".join(" ".join(p[0] for p in linha) for linha in linhas).upper()
+        if "DE ENTRADAS" in texto or "DE SAÍDAS" in texto: continue
+        for linha in linhas:
+            valores = [(x1, t.strip('"')) for t, x0, x1 in linha if _RE_VALOR.fullmatch(t.strip('"'))]
+            chave_match = re.match(r'^"?(\d+)$', linha[0][0])
+            if chave_match: itens.append([chave_match.group(1), valores])
+            elif valores and itens and not itens[-1][1]: itens[-1][1] = valores
+
+    grupos = []
+    for x1 in sorted(x1 for _, valores in itens for x1, _ in valores):
+        if grupos and x1 - grupos[-1][-1] <= TOLERANCIA_COLUNA: grupos[-1].append(x1)
+        else: grupos.append([x1])
+    # Numa tabela alguma linha preenche todas as colunas; no texto corrido cada linha cria colunas novas
+    if len(grupos) < 4 or len(grupos) > max(len(valores) for _, valores in itens): return None
+    centros = [sum(g) / len(g) for g in grupos]
+    coluna_saldo = len(centros) - 4
+
+    resultado = []
+    for chave_raw, valores in itens:
+        por_coluna = {}
+        for x1, valor in valores:
+            coluna = min(range(len(centros)), key=lambda i: abs(centros[i] - x1))
+            if coluna in por_coluna: return None  # dois valores na mesma coluna: texto corrido, não tabela
+            por_coluna[coluna] = valor
+        if coluna_saldo in por_coluna: resultado.append((_chave_final(chave_raw), limpar_valor(por_coluna[coluna_saldo])))
+    return resultado
+
+def ler_pdf(pdf_bytes, ao_progredir=None, modo="texto"):
+    """Saldo de cada item do relatório, somado por chave de vínculo.
+
+    Com modo "coordenadas" o saldo sai da coluna certa pela posição (ver _itens_por_coordenadas); documentos
+    com página escaneada ou sem colunas alinhadas voltam para o modo "texto".
+    """
+    itens = None
+    if modo == "coordenadas":
+        paginas = list(iterar_palavras(pdf_bytes, perfil="rmb"))
+        if not any(pagina_precisa_ocr("\n".join(" ".join(p[0] for p in linha) for linha in linhas)) for linhas in paginas):
+            itens = _itens_por_coordenadas(paginas)
+    if itens is None:
+        itens = [item for txt, is_ocr in extrair_paginas(pdf_bytes, perfil="rmb", precisa_ocr=pagina_precisa_ocr, ao_progredir=ao_progredir)
+                 for item in _itens_do_texto(txt, is_ocr)]
+    if itens:
+        return pd.DataFrame(itens, columns=['Chave_Vinculo', 'Saldo_PDF']).groupby('Chave_Vinculo')['Saldo_PDF'].sum().reset_index()
+    return pd.DataFrame(columns=['Chave_Vinculo', 'Saldo_PDF'])
+
+class DadosUG:
+    """O que a revisão guarda de uma UG: saldos da planilha e do relatório (ver memoria.Saldos) e o estoque interno.
+
+    As correções do usuário ficam em `pdf.edicoes`; o saldo lido do relatório continua em `pdf.original(chave)`.
+    """
+    __slots__ = ('excel', 'pdf', 'saldo_estoque', 'tem_estoque')
+
+    def __init__(self, excel, pdf, saldo_estoque, tem_estoque):
+        self.excel, self.pdf, self.saldo_estoque, self.tem_estoque = excel, pdf, float(saldo_estoque), bool(tem_estoque)
+
+def montar_ug(df_padrao, saldo_estoque, tem_estoque, df_pdf_final):
+    return DadosUG(Saldos.de_dataframe(df_padrao, 'Chave_Vinculo', 'Saldo_Excel', 'Descricao_Completa', tipo_chave=np.int64),
+                   Saldos.de_dataframe(df_pdf_final, 'Chave_Vinculo', 'Saldo_PDF', tipo_chave=np.int64),
+                   saldo_estoque, tem_estoque)
+
+def processar(pares, planilha_siafi, matriz, ao_progredir=None, modo_extracao="texto"):
+    """Lê a aba e o PDF de cada par e devolve (dados_ug, avisos).
+
+    `ao_progredir(texto, fracao)` recebe a mensagem de status e/ou a fração concluída (um dos dois pode ser None).
+    `modo_extracao` é um de MODOS_EXTRACAO (ver ler_pdf).
+    """
+    avisar = ao_progredir or (lambda texto, fracao: None)
+    dados_ug = {}
+    avisos = []
+
+    for idx, par in enumerate(pares):
+        ug = par['ug']
+        avisar(f"Lendo e analisando dados da Unidade Gestora: {ug}...", None)
+
+        try:
+            df_padrao, saldo_estoque, tem_estoque = ler_aba(planilha_siafi.ler(par['sheet_name']), matriz)
+        except Exception:
+            df_padrao, saldo_estoque, tem_estoque = pd.DataFrame(columns=['Chave_Vinculo', 'Saldo_Excel', 'Descricao_Completa']), 0.0, False
+            avisos.append(f"Erro ao processar os dados da planilha para a UG {ug}.")
+
+        def progresso_ocr(feitas, total, idx=idx, ug=ug):
+            avisar(f"Lendo e analisando dados da Unidade Gestora: {ug} (OCR: página {feitas} de {total})...", (idx + feitas / total) / len(pares))
+
+        try:
+            df_pdf_final = ingestao.obter(ler_bytes(par['pdf']), ler_pdf, progresso_ocr, modo=modo_extracao)
+        except Exception:
+            df_pdf_final = pd.DataFrame(columns=['Chave_Vinculo', 'Saldo_PDF'])
+            avisos.append(f"Erro ao ler o documento PDF da UG {ug}.")
+
+        dados_ug[ug] = montar_ug(df_padrao, saldo_estoque, tem_estoque, df_pdf_final)
+        avisar(None, (idx + 1) / len(pares))
+
+    return dados_ug, avisos
+
+# ==========================================
+# CRUZAMENTO E RELATÓRIO
+# ==========================================
+def _df_excel(info):
+    return info.excel.dataframe('Chave_Vinculo', 'Saldo_Excel', 'Descricao_Completa')
+
+def chaves_com_erro(info):
+    # Cruzamento original: define onde a edição fica liberada, mesmo depois de corrigida
+    original = pd.merge(info.pdf.dataframe('Chave_Vinculo', 'Saldo_PDF', com_edicoes=False), _df_excel(info), on='Chave_Vinculo', how='outer').fillna(0)
+    original['Diferenca_Original'] = original['Saldo_PDF'] - original['Saldo_Excel']
+    return original[abs(original['Diferenca_Original']) > 0.05]['Chave_Vinculo'].tolist()
+
+def conciliar_ug(info):
+    """Cruzamento atual (com as edições de `info.pdf` já aplicadas) e seus totais.
+
+    Os totais usam todas as chaves; `final` guarda só as linhas que a página e o relatório mostram (as
+    divergentes e as que tiveram divergência na leitura), já que fica na sessão até a UG ser recalculada.
+    """
+    chaves = chaves_com_erro(info)
+    cruzamento = pd.merge(info.pdf.dataframe('Chave_Vinculo', 'Saldo_PDF'), _df_excel(info), on='Chave_Vinculo', how='outer').fillna(0)
+    cruzamento['Diferenca'] = (cruzamento['Saldo_PDF'] - cruzamento['Saldo_Excel']).round(2)
+    soma_pdf = cruzamento['Saldo_PDF'].sum()
+    soma_excel = cruzamento['Saldo_Excel'].sum()
+
+    final = cruzamento[(abs(cruzamento['Diferenca']) > 0.05) | cruzamento['Chave_Vinculo'].isin(chaves)].reset_index(drop=True)
+    final.insert(len(final.columns) - 1, 'Descricao', [d if pd.notna(d) and str(d).strip() != '0' else "ITEM SEM DESCRIÇÃO NO SIAFI" for d in final['Descricao_Completa']])
+    return {
+        'final': final,
+        'chaves_com_erro': chaves,
+        'soma_pdf': soma_pdf,
+        'soma_excel': soma_excel,
+        'dif_total': soma_pdf - soma_excel
+    }
+
+def escrever_ug(pdf_out, ug, info, conciliacao):
+    final = conciliacao['final']
+    chaves = conciliacao['chaves_com_erro']
+
+    pdf_out.set_font("helvetica", 'B', 11)
+    pdf_out.set_fill_color(240, 240, 240)
+    pdf_out.cell(0, 10, text=f"Unidade Gestora: {ug}", border=1, new_x=XPos.LMARGIN, new_y=YPos.NEXT, fill=True)
+
+    mask_mostrar = (abs(final['Diferenca']) > 0.05) | (final['Chave_Vinculo'].isin(chaves))
+    itens_para_mostrar = final[mask_mostrar].copy()
+
+    if not itens_para_mostrar.empty:
+        pdf_out.set_font("helvetica", 'B', 9)
+        pdf_out.set_fill_color(255, 200, 200)
+        pdf_out.cell(15, 8, "Item", 1, fill=True)
+        pdf_out.cell(85, 8, "Descrição da Conta", 1, fill=True)
+        pdf_out.cell(30, 8, "Saldo relatório", 1, fill=True)
+        pdf_out.cell(30, 8, "Saldo SIAFI", 1, fill=True)
+        pdf_out.cell(30, 8, "Diferença", 1, fill=True, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+        pdf_out.set_font("helvetica", '', 8)
+        alertas_auditoria = []
+
+        for _, row in itens_para_mostrar.iterrows():
+            chave = row['Chave_Vinculo']
+            val_original = info.pdf.original(chave)
+            editado = abs(row['Saldo_PDF'] - val_original) > 0.01
+
+            str_saldo_relatorio = formatar_real(row['Saldo_PDF']) + (" *" if editado else "")
+
+            pdf_out.cell(15, 7, str(int(chave)), 1)
+            pdf_out.cell(85, 7, str(row['Descricao'])[:48], 1)
+            pdf_out.cell(30, 7, str_saldo_relatorio, 1, align='R')
+            pdf_out.cell(30, 7, formatar_real(row['Saldo_Excel']), 1, align='R')
+            if abs(row['Diferenca']) > 0.05: pdf_out.set_text_color(200, 0, 0)
+            pdf_out.cell(30, 7, formatar_real(row['Diferenca']), 1, align='R', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+            pdf_out.set_text_color(0, 0, 0)
+
+            if editado:
+                alertas_auditoria.append(f"* ALERTA: O valor do Item {int(chave)} foi alterado manualmente pelo utilizador. (Valor original lido do PDF: R$ {formatar_real(val_original)})")
+
+        # Impressão dos alertas de auditoria
+        if alertas_auditoria:
+            pdf_out.set_font("helvetica", 'I', 7)
+            pdf_out.set_text_color(180, 0, 0)
+            for alerta in alertas_auditoria:
+                pdf_out.cell(0, 5, alerta, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+            pdf_out.set_text_color(0, 0, 0)
+    else:
+        pdf_out.set_font("helvetica", 'I', 9)
+        pdf_out.cell(0, 8, "Nenhuma divergência encontrada entre SIAFI e os Relatórios.", 1, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    if info.tem_estoque:
+        pdf_out.ln(2)
+        pdf_out.set_font("helvetica", 'B', 9)
+        pdf_out.set_fill_color(255, 255, 200)
+        pdf_out.cell(100, 8, f"SALDO ESTOQUE INTERNO ({CONTA_ESTOQUE})", 1, fill=True)
+        pdf_out.cell(90, 8, f"R$ {formatar_real(info.saldo_estoque)}", 1, fill=True, align='R', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf_out.ln(2)
+    pdf_out.set_font("helvetica", 'B', 9)
+    pdf_out.set_fill_color(220, 230, 241)
+    pdf_out.cell(100, 8, "RESUMO DOS TOTAIS", 1, fill=True)
+    pdf_out.cell(30, 8, formatar_real(conciliacao['soma_pdf']), 1, fill=True, align='R')
+    pdf_out.cell(30, 8, formatar_real(conciliacao['soma_excel']), 1, fill=True, align='R')
+    if abs(conciliacao['dif_total']) > 0.05: pdf_out.set_text_color(200, 0, 0)
+    pdf_out.cell(30, 8, formatar_real(conciliacao['dif_total']), 1, fill=True, align='R', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf_out.set_text_color(0, 0, 0)
+    pdf_out.ln(5)
+
+def gerar_relatorio(dados_ug, conciliacoes=None):
+    # `conciliacoes` ({ug: conciliar_ug(info)}) evita refazer o cruzamento já feito na revisão
+    conciliacoes = conciliacoes or {}
+    pdf_out = PDF_Report(TITULO_RELATORIO)
+    pdf_out.add_page()
+    for ug, info in dados_ug.items(): escrever_ug(pdf_out, ug, info, conciliacoes.get(ug) or conciliar_ug(info))
+    return bytes(pdf_out.output())
+
+def resumo(dados_ug):
+    """Totais e itens divergentes de cada UG, para exportação (JSON/CSV)."""
+    unidades = []
+    for ug, info in dados_ug.items():
+        conc = conciliar_ug(info)
+        final = conc['final']
+        divergentes = final[abs(final['Diferenca']) > 0.05]
+        unidades.append({
+            'ug': ug,
+            'total_relatorio': round(float(conc['soma_pdf']), 2),
+            'total_siafi': round(float(conc['soma_excel']), 2),
+            'diferenca': round(float(conc['dif_total']), 2),
+            'saldo_estoque': round(info.saldo_estoque, 2),
+            'divergencias': [{'ug': ug, 'item': int(r['Chave_Vinculo']), 'descricao': str(r['Descricao']),
+                              'valor_relatorio': round(float(r['Saldo_PDF']), 2), 'valor_siafi': round(float(r['Saldo_Excel']), 2),
+                              'diferenca': float(r['Diferenca'])} for _, r in divergentes.iterrows()]
+        })
+    return unidades
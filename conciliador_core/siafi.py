@@ -0,0 +1,96 @@
+import importlib.util
+import io
+import re
+
+import numpy as np
+import pandas as pd
+
+from conciliador_core.valores import converter_coluna
+
+# ==========================================
+# LEITURA DAS ABAS DO SIAFI (UMA ABA POR UG)
+# ==========================================
+COLUNAS_CONTAS = ['Conta', 'Descricao', 'Valor']
+
+# O calamine (python-calamine) lê .xlsx/.xls bem mais rápido que o openpyxl; é usado quando instalado.
+# Sem ele fica o padrão do pandas: openpyxl em modo read_only para .xlsx
+MOTOR_EXCEL = "calamine" if importlib.util.find_spec("python_calamine") else None
+
+_RE_UG_INICIO = re.compile(r'^(\d+)')
+
+class PlanilhaSiafi:
+    """Planilha SIAFI aberta uma única vez por upload.
+
+    Só a lista de abas é lida na abertura; o conteúdo de cada aba é processado
+    apenas em `ler(aba)`, então abas descartadas pelo nome nunca são lidas.
+    """
+    def __init__(self, arquivo):
+        if hasattr(arquivo, "read"):
+            arquivo.seek(0)
+            arquivo = io.BytesIO(arquivo.read())
+        self._xls = pd.ExcelFile(arquivo, engine=MOTOR_EXCEL)
+        self.abas = self._xls.sheet_names
+
+    def abas_ug(self, padrao=_RE_UG_INICIO, ignorar=("MATRIZ",)):
+        # (aba, ug) de cada aba com número de UG no nome, na ordem da planilha
+        for aba in self.abas:
+            if aba.upper() in ignorar: continue
+            match = padrao.search(aba)
+            if match: yield aba, match.group(1)
+
+    def ler(self, aba):
+        # Mesmo DataFrame que pd.read_excel(..., sheet_name=aba, header=None)
+        return self._xls.parse(aba, header=None)
+
+    def close(self):
+        self._xls.close()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+def _celulas_vazias(coluna):
+    # Textos só com espaços contam como célula vazia; números e datas nunca são vazios
+    try:
+        return coluna.astype(object).str.strip().eq('').to_numpy(dtype=bool)
+    except AttributeError:  # coluna sem nenhum texto
+        return np.zeros(len(coluna), dtype=bool)
+
+def extract_excel_data(df_raw):
+    """Contas 123* de uma aba UG lida com `header=None`, em um DataFrame Conta/Descricao/Valor.
+
+    Após a conta (coluna 0), a 1ª célula preenchida é a descrição e a 2ª o valor.
+    Com uma única célula preenchida, ela é o valor se tiver cara de número, senão a descrição.
+    As condições são calculadas por coluna, com máscaras, em vez de linha a linha.
+    """
+    if df_raw.shape[1] == 0: return pd.DataFrame(columns=COLUNAS_CONTAS)
+    contas = df_raw.iloc[:, 0].map(str).str.strip().str.replace('.0', '', regex=False)
+    sel = contas.str.startswith('123').to_numpy(dtype=bool)
+    contas = contas.to_numpy(dtype=object)[sel]
+    n = len(contas)
+
+    sub = df_raw.iloc[np.flatnonzero(sel), 1:]
+    descricao = np.full(n, "SEM DESCRIÇÃO", dtype=object)
+    valor = np.zeros(n, dtype=float)
+    if n and sub.shape[1]:
+        celulas = sub.to_numpy(dtype=object)
+        preenchida = sub.notna().to_numpy(dtype=bool, copy=True)
+        for j in range(sub.shape[1]): preenchida[:, j] &= ~_celulas_vazias(sub.iloc[:, j])
+
+        acumulado = preenchida.cumsum(axis=1)
+        qtd = acumulado[:, -1]
+        linhas = np.arange(n)
+        primeira = celulas[linhas, np.argmax(acumulado >= 1, axis=1)]
+        segunda = celulas[linhas, np.argmax(acumulado >= 2, axis=1)]
+
+        duas = qtd >= 2
+        descricao[duas] = [str(c).strip().upper() for c in primeira[duas]]
+        valor[duas] = converter_coluna(segunda[duas])[0]
+
+        uma = np.flatnonzero(qtd == 1)
+        textos = np.array([str(c).strip() for c in primeira[uma]], dtype=object)
+        convertidos = converter_coluna(primeira[uma])[0]
+        eh_valor = (convertidos != 0.0) | np.isin(textos, ['0', '0.0'])
+        valor[uma[eh_valor]] = convertidos[eh_valor]
+        descricao[uma[~eh_valor]] = [t.upper() for t in textos[~eh_valor]]
+
+    return pd.DataFrame({'Conta': contas, 'Descricao': descricao, 'Valor': valor}, columns=COLUNAS_CONTAS)
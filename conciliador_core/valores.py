@@ -0,0 +1,211 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# CONVERSÃO E FORMATAÇÃO DE VALORES (R$)
+# ==========================================
+# Padrões compilados uma única vez por processo, e não a cada rerun do Streamlit
+_RE_FINAL_VIRGULA = re.compile(r',\d{1,2}$')
+_RE_FINAL_PONTO = re.compile(r'\.\d{1,2}$')
+_RE_NAO_NUMERICO = re.compile(r'[^\d.-]')
+_RE_NAO_NUMERICO_EXCEL = re.compile(r'[^\d\.,\-]')
+_RE_NAO_NUMERICO_PDF = re.compile(r'[^\d\.,]')
+
+# Cada regra existe em duas formas: a pública devolve só o número; a `_..._ok`
+# devolve (número, ok), com ok falso quando o 0.0 significa "sem valor"
+def _limpar_valor_ok(v):
+    if v is None or pd.isna(v) or str(v).strip() == '': return 0.0, False
+    if isinstance(v, (int, float)): return float(v), True
+    v = str(v).replace('"', '').replace("'", "").strip()
+    if _RE_FINAL_VIRGULA.search(v): v = v.replace('.', '').replace(',', '.')
+    elif _RE_FINAL_PONTO.search(v): v = v.replace(',', '')
+    try: return float(_RE_NAO_NUMERICO.sub('', v)), True
+    except: return 0.0, False
+
+def _limpar_valor_excel_ok(v):
+    if pd.isna(v) or v is None: return 0.0, False
+    if isinstance(v, (int, float)): return float(v), True
+    v_str = str(v).strip()
+    if v_str == '': return 0.0, False
+    v_str = _RE_NAO_NUMERICO_EXCEL.sub('', v_str)
+    if ',' in v_str and '.' in v_str:
+        if v_str.rfind(',') > v_str.rfind('.'):
+            v_str = v_str.replace('.', '').replace(',', '.')
+        else:
+            v_str = v_str.replace(',', '')
+    elif ',' in v_str:
+        v_str = v_str.replace(',', '.')
+    try:
+        return float(v_str), True
+    except:
+        return 0.0, False
+
+def _limpar_valor_pdf_ok(v):
+    v = _RE_NAO_NUMERICO_PDF.sub('', str(v)).rstrip('.,')
+    if not any(c.isdigit() for c in v): return 0.0, False
+    if len(v) >= 3 and v[-3] in ['.', ',']:
+        inteiro = v[:-3].replace('.', '').replace(',', '')
+        decimal = v[-2:]
+        try:
+            return float(f"{inteiro}.{decimal}"), True
+        except:
+            return 0.0, False
+    return 0.0, False
+
+def _converter_valor_excel_ok(valor):
+    if pd.isna(valor) or valor is None: return 0.0, False
+    if isinstance(valor, (int, float)): return float(valor), True
+    v_str = str(valor).strip().replace('R$', '').replace(' ', '')
+    if ',' in v_str: v_str = v_str.replace('.', '').replace(',', '.')
+    try: return float(v_str), True
+    except: return 0.0, False
+
+def _formatar_moeda_pdf_ok(valor_str):
+    if not valor_str: return 0.0, False
+    try:
+        if len(valor_str) >= 3 and valor_str[-3] in [',', '.']:
+            inteiro = valor_str[:-3].replace('.', '').replace(',', '')
+            decimal = valor_str[-2:]
+            return float(f"{inteiro}.{decimal}"), True
+        else:
+            limpo = valor_str.replace('.', '').replace(',', '.')
+            return float(limpo), True
+    except:
+        return 0.0, False
+
+def limpar_valor(v): return _limpar_valor_ok(v)[0]
+def limpar_valor_excel(v): return _limpar_valor_excel_ok(v)[0]
+def limpar_valor_pdf(v): return _limpar_valor_pdf_ok(v)[0]
+def converter_valor_excel(valor): return _converter_valor_excel_ok(valor)[0]
+def formatar_moeda_pdf(valor_str): return _formatar_moeda_pdf_ok(valor_str)[0]
+
+def formatar_real(valor):
+    # Transforma 1234.56 em 1.234,56
+    sinal = "-" if valor < -0.001 else ""
+    return f"{sinal}{abs(valor):,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+
+# ==========================================
+# CONVERSÃO DE COLUNAS INTEIRAS (VETORIZADA)
+# ==========================================
+# Mesmas regras das funções acima, aplicadas à coluna toda com operações de texto
+# do pandas em vez de uma chamada Python (e várias buscas `re`) por célula.
+# Só dígitos ASCII são reconhecidos (é o que o SIAFI e o RMB exportam).
+_RE_NUMERO_SIMPLES = r'[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)'
+# Tudo o mais que o float() do Python aceita: espaços nas pontas, '_' entre dígitos, expoente, inf/nan
+_D = r'[0-9](?:_?[0-9])*'
+_RE_NUMERO_PYTHON = rf'[ \t\n\r\f\v]*[+-]?(?:(?:{_D}(?:\.(?:{_D})?)?|\.{_D})(?:[eE][+-]?{_D})?|(?i:inf|infinity|nan))[ \t\n\r\f\v]*'
+
+def _para_float(t, limpo=True):
+    # float() de cada texto; `ok` é falso onde o float() daria erro
+    valores = np.zeros(len(t), dtype=float)
+    ok = t.str.fullmatch(_RE_NUMERO_SIMPLES).fillna(False).to_numpy(dtype=bool, copy=True)
+    if ok.any(): valores[ok] = t[ok].astype(float).to_numpy()
+    if limpo: return valores, ok
+    # Texto não filtrado pode ter as outras formas; essas (raras) vão ao float() uma a uma
+    resto = np.flatnonzero(~ok & t.str.fullmatch(_RE_NUMERO_PYTHON).fillna(False).to_numpy(dtype=bool))
+    valores[resto] = [float(texto) for texto in t.iloc[resto]]
+    ok[resto] = True
+    return valores, ok
+
+def _substituir(t, mascara, novo):
+    if mascara.any(): t = t.mask(mascara, novo(t[mascara]))
+    return t
+
+def _col_limpar_valor(t):
+    t = t.str.replace('"', '', regex=False).str.replace("'", '', regex=False).str.strip()
+    virgula = t.str.contains(r',\d{1,2}$')
+    ponto = ~virgula & t.str.contains(r'\.\d{1,2}$')
+    t = _substituir(t, virgula, lambda x: x.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+    t = _substituir(t, ponto, lambda x: x.str.replace(',', '', regex=False))
+    return _para_float(t.str.replace(r'[^\d.-]', '', regex=True))
+
+def _col_limpar_valor_excel(t):
+    t = t.str.strip().str.replace(r'[^\d\.,\-]', '', regex=True)
+    virgula = t.str.contains(',', regex=False)
+    ambos = virgula & t.str.contains('.', regex=False)
+    virgula_por_ultimo = ambos & t.str.contains(r',[^.]*$')
+    t = _substituir(t, virgula_por_ultimo, lambda x: x.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+    t = _substituir(t, ambos & ~virgula_por_ultimo, lambda x: x.str.replace(',', '', regex=False))
+    t = _substituir(t, virgula & ~ambos, lambda x: x.str.replace(',', '.', regex=False))
+    return _para_float(t)
+
+def _col_converter_valor_excel(t):
+    t = t.str.strip().str.replace('R$', '', regex=False).str.replace(' ', '', regex=False)
+    t = _substituir(t, t.str.contains(',', regex=False), lambda x: x.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+    return _para_float(t, limpo=False)
+
+def _col_centavos(t, senao, limpo):
+    # Penúltimo separador na 3ª posição a partir do fim: o resto é a parte inteira
+    centavos = (t.str.len() >= 3) & t.str.slice(-3, -2).isin(['.', ','])
+    t = _substituir(t, centavos, lambda x: x.str.slice(0, -3).str.replace('.', '', regex=False).str.replace(',', '', regex=False) + '.' + x.str.slice(-2))
+    t = _substituir(t, ~centavos, senao)
+    return _para_float(t, limpo)
+
+def _col_limpar_valor_pdf(t):
+    t = t.str.replace(r'[^\d\.,]', '', regex=True).str.rstrip('.,')
+    return _col_centavos(t, lambda x: x.str.slice(0, 0), limpo=True)
+
+def _col_formatar_moeda_pdf(t):
+    return _col_centavos(t, lambda x: x.str.replace('.', '', regex=False).str.replace(',', '.', regex=False), limpo=False)
+
+# Como cada regra trata células que não são texto: "numero" converte int/float
+# direto, "texto" converte tudo via str() e "zero" devolve 0.0 (só aceita texto)
+_REGRAS_COLUNA = {
+    limpar_valor: (_limpar_valor_ok, _col_limpar_valor, "numero"),
+    limpar_valor_excel: (_limpar_valor_excel_ok, _col_limpar_valor_excel, "numero"),
+    converter_valor_excel: (_converter_valor_excel_ok, _col_converter_valor_excel, "numero"),
+    limpar_valor_pdf: (_limpar_valor_pdf_ok, _col_limpar_valor_pdf, "texto"),
+    formatar_moeda_pdf: (_formatar_moeda_pdf_ok, _col_formatar_moeda_pdf, "zero"),
+}
+
+# Abaixo disso o custo fixo das operações de coluna (~5 ms) supera o da conversão célula a célula
+MIN_CELULAS_VETORIZADO = 2000
+
+def converter_coluna(valores, regra=limpar_valor):
+    """Aplica `regra` (uma das funções de conversão acima) a uma coluna inteira.
+
+    Aceita Series, lista ou array e devolve (float64, válidos): o mesmo número que
+    `regra` daria célula a célula, e falso em `válidos` onde ela cairia no 0.0 por
+    falta de valor (célula vazia, texto que não é número).
+    """
+    escalar, col_texto, nao_texto = _REGRAS_COLUNA[regra]
+    if isinstance(valores, pd.Series) and nao_texto == "numero" and pd.api.types.is_numeric_dtype(valores) and not pd.api.types.is_bool_dtype(valores):
+        numeros = valores.to_numpy(dtype=float, na_value=np.nan)
+        validos = ~np.isnan(numeros)
+        return np.where(validos, numeros, 0.0), validos
+
+    celulas = np.asarray(valores, dtype=object)
+    n = len(celulas)
+    if n < MIN_CELULAS_VETORIZADO:
+        convertidos = [escalar(v) for v in celulas]
+        return np.array([v for v, _ in convertidos], dtype=float), np.array([ok for _, ok in convertidos], dtype=bool)
+
+    resultado = np.zeros(n, dtype=float)
+    validos = np.zeros(n, dtype=bool)
+    vazias = pd.isna(celulas)
+
+    # Um type() por célula e depois uma máscara por tipo distinto (costumam ser 2 ou 3)
+    codigos, tipos = pd.factorize(pd.Series(celulas, dtype=object).map(type))
+    textos = np.isin(codigos, [k for k, tipo in enumerate(tipos) if issubclass(tipo, str)])
+    numeros = np.isin(codigos, [k for k, tipo in enumerate(tipos) if issubclass(tipo, (int, float))])
+    numeros &= ~vazias
+    outros = ~(textos | numeros | vazias)
+
+    if nao_texto == "numero":
+        resultado[numeros] = celulas[numeros].astype(float)
+        validos[numeros] = True
+        converter = textos | outros
+    elif nao_texto == "texto": converter = ~vazias
+    else: converter = textos
+
+    idx = np.flatnonzero(converter)
+    if len(idx):
+        selecionadas = celulas[idx]
+        sem_texto = ~textos[idx]
+        if sem_texto.any():
+            selecionadas = selecionadas.copy()
+            selecionadas[sem_texto] = [str(v) for v in selecionadas[sem_texto]]
+        resultado[idx], validos[idx] = col_texto(pd.Series(selecionadas, dtype="str"))
+    return resultado, validos
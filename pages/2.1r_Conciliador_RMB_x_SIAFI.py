@@ -2,13 +2,18 @@ import streamlit as st
 import pandas as pd
 import pdfplumber
 import re
-from fpdf import FPDF, XPos, YPos
+from fpdf import XPos, YPos
 import io
 import os
 import pytesseract
 from pdf2image import convert_from_bytes
 from PIL import Image
 from pytesseract import Output
+from conciliador_core.arquivos import IndiceArquivos
+from conciliador_core.matriz import obter_matriz
+from conciliador_core.relatorio import PDF_Report
+from conciliador_core.siafi import PlanilhaSiafi, extract_excel_data
+from conciliador_core.valores import formatar_real, limpar_valor
 
 # ==========================================
 # CONFIGURAÇÃO INICIAL
@@ -34,65 +39,6 @@ st.markdown(hide_streamlit_style, unsafe_allow_html=True)
 # Botão para retornar à tela inicial solto no topo da tela
 st.page_link("Menu_principal.py", label="⬅️ Voltar ao Menu Inicial")
 
-# ==========================================
-# FUNÇÕES DE PROCESSAMENTO (BASTIDORES)
-# ==========================================
-def limpar_valor(v):
-    if v is None or pd.isna(v) or str(v).strip() == '': return 0.0
-    if isinstance(v, (int, float)): return float(v)
-    v = str(v).replace('"', '').replace("'", "").strip()
-    if re.search(r',\d{1,2}$', v): v = v.replace('.', '').replace(',', '.')
-    elif re.search(r'\.\d{1,2}$', v): v = v.replace(',', '')
-    try: return float(re.sub(r'[^\d.-]', '', v))
-    except: return 0.0
-
-def extract_excel_data(df_raw):
-    extracted_data = []
-    for idx, row in df_raw.iterrows():
-        if row.isna().all(): continue
-        val_0 = str(row.iloc[0]).strip().replace('.0', '')
-        
-        if val_0.startswith('123'):
-            codigo = val_0
-            desc = "SEM DESCRIÇÃO"
-            val = 0.0
-            cols = [c for c in row.iloc[1:] if pd.notna(c) and str(c).strip() != '']
-            
-            if len(cols) >= 2:
-                desc = str(cols[0]).strip().upper()
-                val = limpar_valor(cols[1])
-            elif len(cols) == 1:
-                parsed_val = limpar_valor(cols[0])
-                if parsed_val != 0.0 or str(cols[0]).strip() in ['0', '0.0']:
-                    val = parsed_val
-                else:
-                    desc = str(cols[0]).strip().upper()
-                    
-            extracted_data.append({'Conta': codigo, 'Descricao': desc, 'Valor': val})
-    return pd.DataFrame(extracted_data)
-
-def get_chave_vinculo(conta, dict_matriz):
-    conta = str(conta).strip()
-    if conta in dict_matriz:
-        val_matriz = str(dict_matriz[conta])
-        match = re.search(r'(\d+)$', val_matriz)
-        if match:
-            digits = match.group(1)
-            return int(digits[-2:]) if len(digits) >= 2 else int(digits)
-    return None
-
-def formatar_real(valor):
-    return f"{valor:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
-
-class PDF_Report(FPDF):
-    def header(self):
-        self.set_font('helvetica', 'B', 12)
-        self.cell(0, 10, 'Relatório de Conferência Patrimonial', align='C', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-        self.ln(5)
-    def footer(self):
-        self.set_y(-15); self.set_font('helvetica', 'I', 8)
-        self.cell(0, 10, f'Página {self.page_no()}', align='C')
-
 # ==========================================
 # INTERFACE DO USUÁRIO
 # ==========================================
@@ -153,36 +99,28 @@ if st.button("🚀 Gerar Relatório de Conciliação", type="primary", use_conta
 
     # 1. Carregar a Matriz de Relacionamento (Transparente para o usuário)
     try:
-        df_matriz = pd.read_excel("MATRIZ.xlsx", header=None)
-        dict_matriz = {}
-        for i in range(len(df_matriz)):
-            c0 = str(df_matriz.iloc[i, 0]).strip().replace('.0', '')
-            c1 = str(df_matriz.iloc[i, 1]).strip().replace('.0', '')
-            if c0.startswith('123'): dict_matriz[c0] = c1
-            elif c1.startswith('123'): dict_matriz[c1] = c0
+        matriz = obter_matriz()
     except Exception as e:
         st.error("❌ Ocorreu um erro ao ler a Matriz de configuração. Verifique o arquivo MATRIZ.xlsx.")
         st.stop()
 
     # 2. Parear as abas da Planilha com os PDFs correspondentes
-    pdfs = {f.name: f for f in uploaded_pdfs}
+    indice_pdfs = IndiceArquivos({f.name: f for f in uploaded_pdfs})
     pares = []
     avisos_usuario = []
 
     try:
-        xls_file = pd.ExcelFile(uploaded_siafi)
-        for sheet_name in xls_file.sheet_names:
-            if sheet_name.upper() == "MATRIZ": continue
-            
-            # Identifica o número da Unidade Gestora pelo nome da aba
-            match = re.search(r'^(\d+)', sheet_name)
-            if match:
-                ug = match.group(1)
-                pdf_match = next((f for n, f in pdfs.items() if n.startswith(ug)), None)
-                if pdf_match: 
-                    pares.append({'ug': ug, 'sheet_name': sheet_name, 'pdf': pdf_match})
-                else: 
-                    avisos_usuario.append(f"Falta PDF: A Unidade Gestora {ug} está na planilha, mas o PDF correspondente não foi enviado.")
+        planilha_siafi = PlanilhaSiafi(uploaded_siafi)
+        
+        # Identifica o número da Unidade Gestora pelo nome da aba
+        abas_ug = list(planilha_siafi.abas_ug())
+        for sheet_name, ug in abas_ug:
+            pdf_match = indice_pdfs.primeiro(ug)
+            if pdf_match: 
+                pares.append({'ug': ug, 'sheet_name': sheet_name, 'pdf': pdf_match})
+            else: 
+                avisos_usuario.append(f"Falta PDF: A Unidade Gestora {ug} está na planilha, mas o PDF correspondente não foi enviado.")
+        avisos_usuario += indice_pdfs.avisos({ug for _, ug in abas_ug})
     except Exception as e:
         st.error("❌ Não foi possível ler a Planilha SIAFI. Certifique-se de que o arquivo não está corrompido.")
         st.stop()
@@ -190,7 +128,7 @@ if st.button("🚀 Gerar Relatório de Conciliação", type="primary", use_conta
     if not pares:
         st.error("❌ Não foi possível encontrar pares correspondentes (Aba do Excel + PDF com o mesmo número de UG). Verifique o nome dos arquivos.")
     else:
-        pdf_out = PDF_Report()
+        pdf_out = PDF_Report('Relatório de Conferência Patrimonial')
         pdf_out.add_page()
         st.subheader("🔍 Resultados da Conciliação")
 
@@ -207,7 +145,7 @@ if st.button("🚀 Gerar Relatório de Conciliação", type="primary", use_conta
                 tem_estoque_com_saldo = False
                 
                 try:
-                    df_raw = pd.read_excel(xls_file, sheet_name=par['sheet_name'], header=None)
+                    df_raw = planilha_siafi.ler(par['sheet_name'])
                     df_dados = extract_excel_data(df_raw)
                     
                     if not df_dados.empty:
@@ -220,7 +158,7 @@ if st.button("🚀 Gerar Relatório de Conciliação", type="primary", use_conta
                         contas_ignoradas = ['123110703', '123110402', '123119910', '123110801']
                         df_dados = df_dados[~df_dados['Conta'].isin(contas_ignoradas)].copy()
                         
-                        df_dados['Chave_Vinculo'] = df_dados['Conta'].apply(lambda c: get_chave_vinculo(c, dict_matriz))
+                        df_dados['Chave_Vinculo'] = df_dados['Conta'].map(matriz.chave_vinculo)
                         df_valid = df_dados.dropna(subset=['Chave_Vinculo']).copy()
                         
                         if not df_valid.empty:
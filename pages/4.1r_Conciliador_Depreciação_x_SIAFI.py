@@ -2,10 +2,12 @@ import streamlit as st
 import pandas as pd
 import pdfplumber
 import re
-from fpdf import FPDF, XPos, YPos
+from fpdf import XPos, YPos
 import io
-import os
 import openpyxl
+from conciliador_core.matriz import extrair_id_unidade, obter_matriz
+from conciliador_core.relatorio import PDF_Report
+from conciliador_core.valores import converter_valor_excel, formatar_moeda_pdf, formatar_real
 
 # ==========================================
 # CONFIGURAÇÃO INICIAL
@@ -34,43 +36,6 @@ st.page_link("Menu_principal.py", label="⬅️ Voltar ao Menu Inicial")
 # ==========================================
 # FUNÇÕES DE PROCESSAMENTO (BASTIDORES)
 # ==========================================
-def formatar_real(valor):
-    sinal = "-" if valor < -0.001 else ""
-    return f"{sinal}{abs(valor):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
-def formatar_moeda_pdf(valor_str):
-    if not valor_str: return 0.0
-    try:
-        if len(valor_str) >= 3 and valor_str[-3] in [',', '.']:
-            inteiro = valor_str[:-3].replace('.', '').replace(',', '')
-            decimal = valor_str[-2:]
-            return float(f"{inteiro}.{decimal}")
-        else:
-            limpo = valor_str.replace('.', '').replace(',', '.')
-            return float(limpo)
-    except:
-        return 0.0
-
-def converter_valor_excel(valor):
-    if pd.isna(valor) or valor is None: return 0.0
-    if isinstance(valor, (int, float)): return float(valor)
-    v_str = str(valor).strip().replace('R$', '').replace(' ', '')
-    if ',' in v_str: v_str = v_str.replace('.', '').replace(',', '.')
-    try: return float(v_str)
-    except: return 0.0
-
-def extrair_codigo_grupo(valor_nat_desp):
-    try:
-        if isinstance(valor_nat_desp, float): valor_nat_desp = int(valor_nat_desp)
-        s_val = re.sub(r'\D', '', str(valor_nat_desp).strip())
-        if len(s_val) < 5: return None
-        return int(s_val[-2:])
-    except: return None
-
-def extrair_id_unidade(texto):
-    match = re.search(r"(\d+)", str(texto))
-    return match.group(1) if match else None
-
 def extrair_valor_mes(bloco_texto, nome_linha, idx_mes):
     nome_regex = nome_linha.replace("(", r"\(").replace(")", r"\)").replace(" ", r"\s+")
     nome_regex = nome_regex.replace("Ç", "[CÇ]").replace("Ã", "[AÃ]").replace("Ê", "[EÊ]").replace("Í", "[IÍ]")
@@ -120,28 +85,6 @@ def processar_pdf(arquivo_obj, idx_mes):
             
     return dados_pdf
 
-def carregar_matriz():
-    caminho_matriz = "MATRIZ.xlsx"
-    dicionario_matriz = {}
-    if os.path.exists(caminho_matriz):
-        wb_matriz = openpyxl.load_workbook(caminho_matriz, data_only=True)
-        ws_matriz = wb_matriz.active
-        for row in ws_matriz.iter_rows(min_row=1, max_col=2, values_only=True):
-            if row[0] is not None:
-                dicionario_matriz[str(row[0]).strip()] = str(row[1]).strip()
-    return dicionario_matriz
-
-class PDFRelatorio(FPDF):
-    def header(self):
-        self.set_font('Helvetica', 'B', 12)
-        self.cell(0, 10, 'Relatório de Conciliação - Depreciação Acumulada', 0, 1, 'C')
-        self.ln(5)
-        
-    def footer(self):
-        self.set_y(-15)
-        self.set_font('Helvetica', 'I', 8)
-        self.cell(0, 10, f'Página {self.page_no()}', 0, 0, 'C')
-
 # ==========================================
 # INTERFACE DO USUÁRIO
 # ==========================================
@@ -185,7 +128,7 @@ if st.button("Gerar Relatório de Conciliação", type="primary"):
 
         with st.spinner("Analisando seus documentos e cruzando os valores..."):
             try:
-                dicionario_matriz = carregar_matriz()
+                matriz = obter_matriz()
 
                 dados_pdfs_extraidos = {}
                 for f in pdfs:
@@ -193,9 +136,9 @@ if st.button("Gerar Relatório de Conciliação", type="primary"):
                     if uid:
                         dados_pdfs_extraidos[uid] = processar_pdf(f, idx_mes)
 
-                wb_alvo = openpyxl.load_workbook(arquivo_alvo, data_only=True)
+                wb_alvo = openpyxl.load_workbook(arquivo_alvo, read_only=True, data_only=True)
                 
-                pdf_out = PDFRelatorio()
+                pdf_out = PDF_Report('Relatório de Conciliação - Depreciação Acumulada')
                 pdf_out.set_auto_page_break(auto=True, margin=15)
                 pdf_out.add_page()
                 lista_resumo = []
@@ -223,29 +166,27 @@ if st.button("Gerar Relatório de Conciliação", type="primary"):
                             if conta_raw == "123110402":
                                 continue
                                 
-                            nat_desp = dicionario_matriz.get(conta_raw)
+                            grupo = matriz.grupo.get(conta_raw)
                             
-                            if nat_desp:
-                                grupo = extrair_codigo_grupo(nat_desp)
-                                if grupo is not None:
-                                    valid_vals = [v for v in row if v is not None and str(v).strip() != ""]
-                                    if len(valid_vals) >= 2:
-                                        saldo_raw = valid_vals[-1]
-                                        movim_raw = valid_vals[-2]
-                                    elif len(valid_vals) == 1:
-                                        saldo_raw = valid_vals[-1]
-                                        movim_raw = 0.0
-                                    else:
-                                        saldo_raw, movim_raw = 0.0, 0.0
+                            if grupo is not None:
+                                valid_vals = [v for v in row if v is not None and str(v).strip() != ""]
+                                if len(valid_vals) >= 2:
+                                    saldo_raw = valid_vals[-1]
+                                    movim_raw = valid_vals[-2]
+                                elif len(valid_vals) == 1:
+                                    saldo_raw = valid_vals[-1]
+                                    movim_raw = 0.0
+                                else:
+                                    saldo_raw, movim_raw = 0.0, 0.0
                                                 
-                                    val_saldo = converter_valor_excel(saldo_raw)
-                                    val_mov = converter_valor_excel(movim_raw)
+                                val_saldo = converter_valor_excel(saldo_raw)
+                                val_mov = converter_valor_excel(movim_raw)
                                     
-                                    if grupo not in d_excel:
-                                        d_excel[grupo] = {'saldo': 0.0, 'movimento': 0.0}
+                                if grupo not in d_excel:
+                                    d_excel[grupo] = {'saldo': 0.0, 'movimento': 0.0}
                                         
-                                    d_excel[grupo]['saldo'] += val_saldo
-                                    d_excel[grupo]['movimento'] += val_mov
+                                d_excel[grupo]['saldo'] += val_saldo
+                                d_excel[grupo]['movimento'] += val_mov
 
                     if uid in dados_pdfs_extraidos:
                         d_pdf = dados_pdfs_extraidos[uid]
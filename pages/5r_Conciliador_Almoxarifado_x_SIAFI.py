@@ -2,13 +2,17 @@ import streamlit as st
 import pandas as pd
 import pdfplumber
 import re
-from fpdf import FPDF, XPos, YPos
+from fpdf import XPos, YPos
 import io
 import os
 import pytesseract
 from pdf2image import convert_from_bytes
 from PIL import Image
 from pytesseract import Output
+from conciliador_core.arquivos import IndiceArquivos
+from conciliador_core.relatorio import PDF_Report
+from conciliador_core.siafi import PlanilhaSiafi
+from conciliador_core.valores import converter_coluna, formatar_real, limpar_valor
 
 # ==========================================
 # CONFIGURAÇÃO INICIAL
@@ -37,28 +41,6 @@ with st.sidebar:
 # ==========================================
 # FUNÇÕES E CLASSES (BASTIDORES)
 # ==========================================
-def limpar_valor(v):
-    if v is None or pd.isna(v): return 0.0
-    if isinstance(v, (int, float)): return float(v)
-    v = str(v).replace('"', '').replace("'", "").strip()
-    if re.search(r',\d{1,2}$', v): v = v.replace('.', '').replace(',', '.')
-    elif re.search(r'\.\d{1,2}$', v): v = v.replace(',', '')
-    try: return float(re.sub(r'[^\d.-]', '', v))
-    except: return 0.0
-
-def formatar_real(valor):
-    return f"{valor:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
-
-class PDF_Report(FPDF):
-    def header(self):
-        self.set_font('helvetica', 'B', 12)
-        self.cell(0, 10, 'Relatório de Conferência: Conta Corrente x Conta Contábil', align='C', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-        self.ln(5)
-    def footer(self):
-        self.set_y(-15)
-        self.set_font('helvetica', 'I', 8)
-        self.cell(0, 10, f'Página {self.page_no()}', align='C')
-
 # ==========================================
 # INTERFACE DO USUÁRIO
 # ==========================================
@@ -90,7 +72,7 @@ if st.button("🚀 Iniciar Auditoria", use_container_width=True, type="primary")
         status_text = st.empty()
         
         # Separa os PDFs e pega o primeiro arquivo Excel encontrado
-        pdfs = {f.name: f for f in uploaded_files if f.name.lower().endswith('.pdf')}
+        indice_pdfs = IndiceArquivos({f.name: f for f in uploaded_files if f.name.lower().endswith('.pdf')})
         excel_files = [f for f in uploaded_files if f.name.lower().endswith(('.xlsx', '.xls'))]
         
         pares = []
@@ -102,10 +84,10 @@ if st.button("🚀 Iniciar Auditoria", use_container_width=True, type="primary")
             planilha_mestre = excel_files[0] # Pega a primeira planilha enviada
             
             try:
-                # Carrega o arquivo Excel para ler o nome das abas
-                planilha_mestre.seek(0)
-                xls = pd.ExcelFile(planilha_mestre)
-                nome_abas = xls.sheet_names
+                # Abre o arquivo Excel uma única vez; as abas só são lidas quando usadas
+                planilha_siafi = PlanilhaSiafi(planilha_mestre)
+                nome_abas = planilha_siafi.abas
+                ugs = set()
                 
                 # Para cada aba, tenta encontrar o código da UG e casar com um PDF
                 for aba in nome_abas:
@@ -113,8 +95,9 @@ if st.button("🚀 Iniciar Auditoria", use_container_width=True, type="primary")
                     match = re.search(r'(\d+)', aba)
                     if match:
                         ug = match.group(1)
-                        # Procura um PDF que comece com esse código
-                        pdf_match = next((f for n, f in pdfs.items() if n.startswith(ug)), None)
+                        ugs.add(ug)
+                        # Procura o PDF com esse código de UG no nome
+                        pdf_match = indice_pdfs.primeiro(ug)
                         
                         if pdf_match:
                             pares.append({
@@ -126,6 +109,7 @@ if st.button("🚀 Iniciar Auditoria", use_container_width=True, type="primary")
                             logs.append(f"⚠️ Aba '{aba}' (UG {ug}): Planilha encontrada, mas falta o PDF correspondente.")
                     else:
                         logs.append(f"ℹ️ Aba '{aba}' ignorada: Não foi encontrado um número de UG no nome da aba.")
+                logs += [f"⚠️ {aviso}" for aviso in indice_pdfs.avisos(ugs)]
                         
             except Exception as e:
                 st.error(f"❌ Erro ao ler a estrutura da planilha Excel: {e}")
@@ -133,7 +117,7 @@ if st.button("🚀 Iniciar Auditoria", use_container_width=True, type="primary")
         if not pares:
             st.error("❌ Nenhum par completo (Aba do Excel + PDF) foi identificado.")
         else:
-            pdf_out = PDF_Report()
+            pdf_out = PDF_Report('Relatório de Conferência: Conta Corrente x Conta Contábil')
             pdf_out.add_page()
             
             st.markdown("---")
@@ -152,8 +136,7 @@ if st.button("🚀 Iniciar Auditoria", use_container_width=True, type="primary")
                     
                     try:
                         # Lê especificamente a aba atual
-                        planilha_mestre.seek(0)
-                        df_raw = pd.read_excel(planilha_mestre, sheet_name=nome_aba, header=None)
+                        df_raw = planilha_siafi.ler(nome_aba)
                         
                         # Procurar a linha que contém "Conta Corrente" para usar como cabeçalho
                         idx_cabecalho = df_raw[df_raw.apply(lambda r: r.astype(str).str.contains('Conta Corrente', case=False).any(), axis=1)].index
@@ -166,7 +149,7 @@ if st.button("🚀 Iniciar Auditoria", use_container_width=True, type="primary")
                             df['Conta_Corrente'] = df.iloc[:, 0].astype(str).str.replace(r'\.0$', '', regex=True).str.strip().str.zfill(2)
                             
                             # Coluna E (Índice 4) = Saldo
-                            df['Valor_Limpo'] = df.iloc[:, 4].apply(limpar_valor)
+                            df['Valor_Limpo'] = converter_coluna(df.iloc[:, 4])[0]
                             
                             # Descrição Genérica
                             df['Descricao_Excel'] = "Conta Corrente " + df['Conta_Corrente']
@@ -1,9 +1,7 @@
 import streamlit as st
 import pandas as pd
-import pdfplumber
-import re
-from fpdf import FPDF, XPos, YPos
-import io
+from conciliador_core import biblioteca, memoria, revisao
+from conciliador_core.valores import formatar_real
 
 # ==========================================
 # CONFIGURAÇÃO INICIAL E MEMÓRIA
@@ -36,122 +34,6 @@ st.markdown(hide_streamlit_style, unsafe_allow_html=True)
 
 st.page_link("Menu_principal.py", label="⬅️ Voltar ao Menu Inicial")
 
-# ==========================================
-# FUNÇÕES E CLASSES (BASTIDORES)
-# ==========================================
-def formatar_real(valor):
-    sinal = "-" if valor < -0.001 else ""
-    # Transforma 1234.56 em 1.234,56
-    return f"{sinal}{abs(valor):,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
-
-def limpar_valor_excel(v):
-    if pd.isna(v) or v is None: return 0.0
-    if isinstance(v, (int, float)): return float(v)
-    v_str = str(v).strip()
-    if v_str == '': return 0.0
-    v_str = re.sub(r'[^\d\.,\-]', '', v_str)
-    if ',' in v_str and '.' in v_str:
-        if v_str.rfind(',') > v_str.rfind('.'):
-            v_str = v_str.replace('.', '').replace(',', '.')
-        else:
-            v_str = v_str.replace(',', '')
-    elif ',' in v_str:
-        v_str = v_str.replace(',', '.')
-    try:
-        return float(v_str)
-    except:
-        return 0.0
-
-def limpar_valor_pdf(v):
-    v = re.sub(r'[^\d\.,]', '', str(v)).rstrip('.,')
-    if not any(c.isdigit() for c in v): return 0.0
-    if len(v) >= 3 and v[-3] in ['.', ',']:
-        inteiro = v[:-3].replace('.', '').replace(',', '')
-        decimal = v[-2:]
-        try:
-            return float(f"{inteiro}.{decimal}")
-        except:
-            return 0.0
-    return 0.0
-
-def extrair_valor_pdf(pdf_bytes, texto_busca, texto_abrev=None, is_dep=False):
-    texto_completo = ""
-    try:
-        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-            for page in pdf.pages:
-                texto_completo += page.extract_text() + "\n"
-    except Exception:
-        pass
-    
-    linhas = texto_completo.split('\n')
-    valores_encontrados = []
-    encontrou_mes = False
-    
-    for i, line in enumerate(linhas):
-        line_clean = line.strip().replace('"', '') 
-        if not line_clean: continue
-        
-        condicao_mes = False
-        condicao_total = False
-        
-        if not is_dep:
-            padrao_mes = rf'^[\d\s\W]*({texto_busca.upper()}'
-            if texto_abrev:
-                padrao_mes += rf'|{texto_abrev.upper()}'
-            padrao_mes += r')\b'
-            
-            if re.search(padrao_mes, line_clean.upper()):
-                condicao_mes = True
-            elif encontrou_mes and re.match(r'^[\d\s\W]*TOTAL\b', line_clean.upper()):
-                condicao_total = True
-        else:
-            if line_clean.upper().startswith(texto_busca.upper()):
-                condicao_mes = True
-                
-        if condicao_mes or condicao_total:
-            if condicao_mes:
-                encontrou_mes = True 
-                
-            bloco_texto = line_clean
-            
-            for j in range(i + 1, min(i + 30, len(linhas))):
-                proxima = linhas[j].strip().replace('"', '')
-                if not proxima: continue
-                if not is_dep:
-                    if re.match(r'^(Janeiro|Fevereiro|Março|Abril|Maio|Junho|Julho|Agosto|Setembro|Outubro|Novembro|Dezembro|Jan\.?|Fev\.?|Mar\.?|Abr\.?|Mai\.?|Jun\.?|Jul\.?|Ago\.?|Set\.?|Out\.?|Nov\.?|Dez\.?|TOTAL|Pag\.|Página|Pergamum|Sistema|Emissão|Data)', proxima, re.IGNORECASE):
-                        break
-                else:
-                    if re.match(r'^(\d{2}/\d{4}|TOTAL|Pag\.|Página|Pergamum|Sistema|Emissão|Data)', proxima, re.IGNORECASE):
-                        break
-                bloco_texto += " " + proxima
-                
-            bloco_texto = re.sub(r'(\.\d{3})\s+(?=\d{3}[.,]\d{2}(?!\d))', r'\1', bloco_texto)
-            matches = [m for m in re.findall(r'[\d\.,]+', bloco_texto) if any(c.isdigit() for c in m)]
-            
-            for m in reversed(matches):
-                v_clean = re.sub(r'[^\d\.,]', '', m).rstrip('.,')
-                if len(v_clean) >= 3 and v_clean[-3] in ['.', ',']:
-                    valor_real = limpar_valor_pdf(v_clean)
-                    valores_encontrados.append(valor_real)
-                    break 
-                    
-    if not valores_encontrados:
-        return 0.0
-    if is_dep:
-        return valores_encontrados[-1]
-    else:
-        return max(valores_encontrados)
-
-class PDF_Report(FPDF):
-    def header(self):
-        self.set_font('helvetica', 'B', 12)
-        self.cell(0, 10, 'Relatório de Conferência Biblioteca', align='C', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-        self.ln(5)
-    def footer(self):
-        self.set_y(-15)
-        self.set_font('helvetica', 'I', 8)
-        self.cell(0, 10, f'Página {self.page_no()}', align='C')
-
 # ==========================================
 # INTERFACE DO USUÁRIO
 # ==========================================
@@ -160,7 +42,7 @@ st.title("📚 Conciliador: Acervo Bibliográfico")
 with st.expander("📘 GUIA DE USO (Clique para abrir)", expanded=False):
     st.markdown("📌 **Orientações de Uso**")
     st.markdown("""
-    1. Selecione o **Mês** e o **Ano** exatos que deseja conciliar.
+    1. Selecione o **Mês** e o **Ano** exatos que deseja conciliar (os PDFs são lidos com todos os meses: pode trocá-los depois, sem processar de novo).
     2. Anexe a **Planilha Excel** e os **arquivos PDF**.
     3. **Guia de Nomenclatura dos Relatórios:**
        - **Acervo:** Número da UG (ex: `153289.pdf`). Se houver mais de um, use letras ou números adicionais no final (ex: `153289a.pdf`, `153289a2.pdf`).
@@ -169,8 +51,7 @@ with st.expander("📘 GUIA DE USO (Clique para abrir)", expanded=False):
     """)
 
 col_mes, col_ano = st.columns(2)
-meses = ["Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]
-meses_abrev = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
+meses = biblioteca.MESES
 
 with col_mes:
     mes_selecionado = st.selectbox("Selecione o Mês:", meses)
@@ -178,11 +59,7 @@ with col_ano:
     ano_selecionado = st.number_input("Digite o Ano:", min_value=2000, max_value=2100, value=2026, step=1)
 
 idx_mes = meses.index(mes_selecionado)
-mes_num = f"{idx_mes + 1:02d}"
-
-texto_busca_acervo = mes_selecionado           
-texto_abrev_acervo = meses_abrev[idx_mes]      
-texto_busca_dep = f"{mes_num}/{ano_selecionado}" 
+periodo = (idx_mes, ano_selecionado)
 
 uploaded_files = st.file_uploader(
     "📂 Arraste a Planilha e os Relatórios para esta área", 
@@ -208,86 +85,42 @@ if st.button("🚀 Iniciar Conciliação", use_container_width=True, type="prima
             st.stop()
             
         planilha_mestre = excel_files[0]
-        dados_ug = {}
-        logs = []
 
         status_text.text("Lendo os dados da Planilha Base...")
         try:
-            planilha_mestre.seek(0)
-            if planilha_mestre.name.lower().endswith('.csv'):
-                df = pd.read_csv(planilha_mestre)
-            else:
-                df = pd.read_excel(planilha_mestre, header=None)
-            
-            for idx, row in df.iterrows():
-                val0 = str(row[0]).strip()
-                if val0.isdigit() and len(val0) >= 5:
-                    ug = val0
-                    nome = str(row[1]).strip()
-                    saldo_acervo = limpar_valor_excel(row[2]) if len(row) > 2 else 0.0
-                    saldo_dep = limpar_valor_excel(row[3]) if len(row) > 3 else 0.0
-                    
-                    dados_ug[ug] = {
-                        'nome': nome,
-                        'ex_acervo': saldo_acervo,
-                        'ex_dep': abs(saldo_dep), 
-                        'pdf_acervo': 0.0,
-                        'pdf_dep': 0.0,
-                        'original_pdf_acervo': 0.0, 
-                        'original_pdf_dep': 0.0,    
-                        'arquivos_acervo_somados': 0,
-                        'arquivos_dep_somados': 0,
-                        'detalhes_acervo': {}, 
-                        'detalhes_dep': {},
-                        'erro_original_acervo': False,
-                        'erro_original_dep': False
-                    }
+            dados_ug = biblioteca.ler_planilha(planilha_mestre)
         except Exception as e:
             st.error(f"❌ Erro ao ler a estrutura da planilha: {e}")
             st.stop()
 
+        # Lê todos os meses de cada PDF de uma vez; mês e ano são só uma visão sobre o que foi lido
         status_text.text("Processando e cruzando os documentos PDF...")
-        total_ugs = len(dados_ug)
-
-        for i, (ug, info) in enumerate(dados_ug.items()):
-            # Busca Acervo
-            padrao_acervo = re.compile(rf"^{ug}(a\d*)?\.pdf$")
-            for nome_arquivo, arquivo_obj in pdfs.items():
-                if padrao_acervo.match(nome_arquivo):
-                    info['arquivos_acervo_somados'] += 1
-                    arquivo_obj.seek(0)
-                    valor_extraido = extrair_valor_pdf(arquivo_obj.read(), texto_busca_acervo, texto_abrev_acervo, False)
-                    info['pdf_acervo'] += valor_extraido
-                    info['detalhes_acervo'][nome_arquivo] = valor_extraido
-            if info['arquivos_acervo_somados'] == 0: logs.append(f"⚠️ UG {ug}: Faltou o PDF do Acervo.")
-
-            # Busca Depreciação
-            padrao_dep = re.compile(rf"^{ug}d\d*\.pdf$")
-            for nome_arquivo, arquivo_obj in pdfs.items():
-                if padrao_dep.match(nome_arquivo):
-                    info['arquivos_dep_somados'] += 1
-                    arquivo_obj.seek(0)
-                    valor_extraido = extrair_valor_pdf(arquivo_obj.read(), texto_busca_dep, None, True)
-                    info['pdf_dep'] += valor_extraido
-                    info['detalhes_dep'][nome_arquivo] = valor_extraido
-            if info['arquivos_dep_somados'] == 0: logs.append(f"⚠️ UG {ug}: Faltou o PDF de Depreciação.")
-            
-            # TIRAR A "FOTOGRAFIA" DOS VALORES ORIGINAIS ANTES DE QUALQUER EDIÇÃO
-            info['original_pdf_acervo'] = info['pdf_acervo']
-            info['original_pdf_dep'] = info['pdf_dep']
-            
-            # Marca internamente se a UG teve divergência na primeira leitura para libertar a edição
-            info['erro_original_acervo'] = abs(info['pdf_acervo'] - info['ex_acervo']) > 0.05
-            info['erro_original_dep'] = abs(info['pdf_dep'] - info['ex_dep']) > 0.05
-                
-            progresso.progress((i + 1) / total_ugs)
-        
-        st.session_state.dados_ug = dados_ug
-        st.session_state.logs = logs
+        st.session_state.bib_extraidos = biblioteca.extrair_pdfs(dados_ug, pdfs, lambda texto, fracao: progresso.progress(fracao))
+        st.session_state.bib_planilha = dados_ug
+        st.session_state.bib_avisos_arquivos = biblioteca.avisos_arquivos(dados_ug, pdfs)
+        st.session_state.bib_periodos = {}
+        st.session_state.pop('bib_periodo_em_revisao', None)
         st.session_state.dados_processados = True
         progresso.empty()
         status_text.empty()
 
+# ==========================================
+# VISÃO DO PERÍODO: TROCAR MÊS/ANO NÃO RELÊ OS ARQUIVOS
+# ==========================================
+if st.session_state.get('dados_processados') and 'bib_extraidos' in st.session_state:
+    periodos = st.session_state.bib_periodos
+    if periodo not in periodos:
+        dados_periodo, logs_periodo = biblioteca.dados_do_periodo(st.session_state.bib_planilha, st.session_state.bib_extraidos, idx_mes, ano_selecionado)
+        periodos[periodo] = (dados_periodo, st.session_state.get('bib_avisos_arquivos', []) + logs_periodo)
+    anterior = st.session_state.get('bib_periodo_em_revisao')
+    if anterior != periodo:
+        # O período que sai só continua na sessão se tiver edições; sem elas, é remontado dos PDFs já lidos
+        if anterior in periodos and periodos[anterior][0] == biblioteca.dados_do_periodo(st.session_state.bib_planilha, st.session_state.bib_extraidos, *anterior)[0]:
+            del periodos[anterior]
+        st.session_state.bib_periodo_em_revisao = periodo
+        revisao.limpar(st.session_state)
+    st.session_state.dados_ug, st.session_state.logs = periodos[periodo]
+
 # ==========================================
 # ETAPA 2: REVISÃO CIRÚRGICA E GERAÇÃO DE PDF
 # ==========================================
@@ -299,48 +132,45 @@ if st.session_state.get('dados_processados'):
     dados_ug = st.session_state.dados_ug
     total_ex_acervo = total_ex_dep = total_pdf_acervo = total_pdf_dep = 0.0
 
-    pdf_out = PDF_Report()
-    pdf_out.add_page()
-
-    for ug, info in dados_ug.items():
+    def recalcular_ug(ug, info):
         # LÓGICA DE ATUALIZAÇÃO EM TEMPO REAL
         if info['erro_original_acervo']:
             if info['detalhes_acervo']:
                 soma = 0.0
                 for arq in info['detalhes_acervo'].keys():
-                    key = f"edit_ac_{ug}_{arq}"
+                    key = f"edit_ac_{idx_mes}_{ano_selecionado}_{ug}_{arq}"
                     if key in st.session_state: info['detalhes_acervo'][arq] = st.session_state[key]
                     soma += info['detalhes_acervo'][arq]
                 info['pdf_acervo'] = soma
             else:
-                key = f"edit_ac_{ug}_total"
+                key = f"edit_ac_{idx_mes}_{ano_selecionado}_{ug}_total"
                 if key in st.session_state: info['pdf_acervo'] = st.session_state[key]
 
         if info['erro_original_dep']:
             if info['detalhes_dep']:
                 soma = 0.0
                 for arq in info['detalhes_dep'].keys():
-                    key = f"edit_dp_{ug}_{arq}"
+                    key = f"edit_dp_{idx_mes}_{ano_selecionado}_{ug}_{arq}"
                     if key in st.session_state: info['detalhes_dep'][arq] = st.session_state[key]
                     soma += info['detalhes_dep'][arq]
                 info['pdf_dep'] = soma
             else:
-                key = f"edit_dp_{ug}_total"
+                key = f"edit_dp_{idx_mes}_{ano_selecionado}_{ug}_total"
                 if key in st.session_state: info['pdf_dep'] = st.session_state[key]
 
         # Recálculo das diferenças finais
-        dif_acervo_final = info['pdf_acervo'] - info['ex_acervo']
-        dif_dep_final = info['pdf_dep'] - info['ex_dep']
+        return biblioteca.conciliar_ug(info)
+
+    for ug, info in dados_ug.items():
+        # Só a UG com input alterado é recalculada; as demais vêm prontas da memória
+        conciliacao = revisao.conciliacao_da_ug(st.session_state, ug, lambda: recalcular_ug(ug, info))
+        dif_acervo_final, dif_dep_final = conciliacao['dif_acervo'], conciliacao['dif_dep']
         
         total_ex_acervo += info['ex_acervo']
         total_pdf_acervo += info['pdf_acervo']
         total_ex_dep += info['ex_dep']
         total_pdf_dep += info['pdf_dep']
 
-        # VERIFICA SE HOUVE EDIÇÃO MANUAL
-        editado_acervo = abs(info['pdf_acervo'] - info['original_pdf_acervo']) > 0.01
-        editado_dep = abs(info['pdf_dep'] - info['original_pdf_dep']) > 0.01
-
         # CRIAÇÃO DA INTERFACE DA UG
         mostrar_expander = info['erro_original_acervo'] or info['erro_original_dep'] or info['arquivos_acervo_somados'] > 1 or info['arquivos_dep_somados'] > 1
         
@@ -378,9 +208,11 @@ if st.session_state.get('dados_processados'):
                             cols = st.columns(2)
                             for idx, (arq, val) in enumerate(info['detalhes_acervo'].items()):
                                 with cols[idx % 2]:
-                                    st.number_input(f"Relatório: {arq}", value=float(val), step=100.0, key=f"edit_ac_{ug}_{arq}")
+                                    st.number_input(f"Relatório: {arq}", value=float(val), step=100.0, key=f"edit_ac_{idx_mes}_{ano_selecionado}_{ug}_{arq}",
+                                                    on_change=revisao.marcar_alterada, args=(st.session_state, ug))
                         else:
-                            st.number_input(f"Valor Total (Relatório Ausente)", value=float(info['pdf_acervo']), step=100.0, key=f"edit_ac_{ug}_total")
+                            st.number_input(f"Valor Total (Relatório Ausente)", value=float(info['pdf_acervo']), step=100.0, key=f"edit_ac_{idx_mes}_{ano_selecionado}_{ug}_total",
+                                            on_change=revisao.marcar_alterada, args=(st.session_state, ug))
 
                     if info['erro_original_dep']:
                         st.markdown("**🔸 Depreciação Acumulada**")
@@ -388,62 +220,11 @@ if st.session_state.get('dados_processados'):
                             cols = st.columns(2)
                             for idx, (arq, val) in enumerate(info['detalhes_dep'].items()):
                                 with cols[idx % 2]:
-                                    st.number_input(f"Relatório: {arq}", value=float(val), step=100.0, key=f"edit_dp_{ug}_{arq}")
+                                    st.number_input(f"Relatório: {arq}", value=float(val), step=100.0, key=f"edit_dp_{idx_mes}_{ano_selecionado}_{ug}_{arq}",
+                                                    on_change=revisao.marcar_alterada, args=(st.session_state, ug))
                         else:
-                            st.number_input(f"Valor Total (Relatório Ausente)", value=float(info['pdf_dep']), step=100.0, key=f"edit_dp_{ug}_total")
-
-        # ==========================================
-        # ESCRITA NO PDF FINAL
-        # ==========================================
-        texto_ug = f"Unidade Gestora: {ug} - {info['nome'][:50]}"
-        avisos_soma = []
-        if info['arquivos_acervo_somados'] > 1: avisos_soma.append(f"{info['arquivos_acervo_somados']} Acervos")
-        if info['arquivos_dep_somados'] > 1: avisos_soma.append(f"{info['arquivos_dep_somados']} Depreciações")
-        if avisos_soma: texto_ug += f" (+{' e '.join(avisos_soma)})"
-            
-        pdf_out.set_font("helvetica", 'B', 10)
-        pdf_out.set_fill_color(240, 240, 240)
-        pdf_out.cell(0, 8, text=texto_ug, border=1, new_x=XPos.LMARGIN, new_y=YPos.NEXT, fill=True)
-        
-        pdf_out.set_font("helvetica", 'B', 8)
-        pdf_out.set_fill_color(220, 230, 241)
-        pdf_out.cell(46, 7, "Conta", 1, fill=True)
-        pdf_out.cell(48, 7, "Saldo relatório", 1, fill=True, align='C') # Nova nomenclatura
-        pdf_out.cell(48, 7, "Saldo SIAFI", 1, fill=True, align='C')      # Nova nomenclatura
-        pdf_out.cell(48, 7, "Diferença", 1, fill=True, align='C', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-        
-        pdf_out.set_font("helvetica", '', 8)
-        
-        str_pdf_acervo = f"R$ {formatar_real(info['pdf_acervo'])}" + (" *" if editado_acervo else "")
-        str_pdf_dep = f"R$ {formatar_real(info['pdf_dep'])}" + (" *" if editado_dep else "")
-
-        # Linha Acervo
-        pdf_out.cell(46, 7, "Acervo Bibliográfico", 1)
-        pdf_out.cell(48, 7, str_pdf_acervo, 1, align='R')
-        pdf_out.cell(48, 7, f"R$ {formatar_real(info['ex_acervo'])}", 1, align='R')
-        if abs(dif_acervo_final) > 0.05: pdf_out.set_text_color(200, 0, 0)
-        pdf_out.cell(48, 7, f"R$ {formatar_real(dif_acervo_final)}", 1, align='R', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-        pdf_out.set_text_color(0, 0, 0)
-        
-        # Linha Depreciação
-        pdf_out.cell(46, 7, "Depreciação Acumulada", 1)
-        pdf_out.cell(48, 7, str_pdf_dep, 1, align='R')
-        pdf_out.cell(48, 7, f"R$ {formatar_real(info['ex_dep'])}", 1, align='R')
-        if abs(dif_dep_final) > 0.05: pdf_out.set_text_color(200, 0, 0)
-        pdf_out.cell(48, 7, f"R$ {formatar_real(dif_dep_final)}", 1, align='R', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-        pdf_out.set_text_color(0, 0, 0)
-        
-        # LOG DE ALERTA NO PDF
-        if editado_acervo or editado_dep:
-            pdf_out.set_font("helvetica", 'I', 7)
-            pdf_out.set_text_color(180, 0, 0) 
-            if editado_acervo:
-                pdf_out.cell(0, 5, f"* ALERTA: O valor do Acervo foi alterado manualmente pelo utilizador. (Valor original lido do PDF: R$ {formatar_real(info['original_pdf_acervo'])})", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-            if editado_dep:
-                pdf_out.cell(0, 5, f"* ALERTA: O valor da Depreciação foi alterado manualmente pelo utilizador. (Valor original lido do PDF: R$ {formatar_real(info['original_pdf_dep'])})", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-            pdf_out.set_text_color(0, 0, 0)
-        
-        pdf_out.ln(5)
+                            st.number_input(f"Valor Total (Relatório Ausente)", value=float(info['pdf_dep']), step=100.0, key=f"edit_dp_{idx_mes}_{ano_selecionado}_{ug}_total",
+                                            on_change=revisao.marcar_alterada, args=(st.session_state, ug))
 
     # Exibição do Resumo Geral
     dif_total_acervo = total_pdf_acervo - total_ex_acervo
@@ -457,12 +238,18 @@ if st.session_state.get('dados_processados'):
     if st.session_state.logs:
         with st.expander("⚠️ Avisos de Relatórios Ausentes", expanded=False):
             for log in st.session_state.logs: st.write(log)
+
+    if 'bib_extraidos' in st.session_state:
+        with st.expander(f"📅 Valores dos Relatórios em {ano_selecionado} (Todos os Meses)", expanded=False):
+            df_ano = biblioteca.tabela_anual(st.session_state.bib_extraidos, ano_selecionado)
+            st.dataframe(df_ano.style.format({mes: lambda x: f"R$ {formatar_real(x)}" for mes in biblioteca.MESES_ABREV}), use_container_width=True)
     
+    # O PDF só é gerado no clique, reaproveitando as conciliações já feitas acima
+    conciliacoes = st.session_state.get('conciliacoes', {})
     try:
-        pdf_bytes = bytes(pdf_out.output())
         st.download_button(
             label="📄 BAIXAR RELATÓRIO FINAL (.PDF)", 
-            data=pdf_bytes, 
+            data=revisao.relatorio_sob_demanda(st.session_state, lambda: biblioteca.gerar_relatorio(dados_ug, conciliacoes)), 
             file_name=f"RELATORIO_ACERVO_BIBLIOGRAFICO_{mes_selecionado}_{ano_selecionado}.pdf", 
             mime="application/pdf", 
             type="primary", 
@@ -470,3 +257,5 @@ if st.session_state.get('dados_processados'):
         )
     except Exception as e:
         st.error(f"Erro ao gerar o download: {e}")
+
+    st.caption(f"💾 Dados desta sessão guardados no servidor: {memoria.formatar_bytes(memoria.bytes_sessao(st.session_state))}")
@@ -0,0 +1,61 @@
+"""extract_excel_data (leitura colunar das abas UG) contra a versão linha a linha das páginas 2.1 / 2.1r."""
+import pandas as pd
+import pytest
+
+from benchmarks.sinteticos import gerar_aba_ug
+from conciliador_core.siafi import extract_excel_data
+from conciliador_core.valores import limpar_valor
+
+# ==========================================
+# VERSÃO ANTIGA (REFERÊNCIA)
+# ==========================================
+def extract_excel_data_linha_a_linha(df_raw):
+    # Versão original das páginas 2.1 / 2.1r, mantida como referência
+    extracted_data = []
+    for idx, row in df_raw.iterrows():
+        if row.isna().all(): continue
+        val_0 = str(row.iloc[0]).strip().replace('.0', '')
+
+        if val_0.startswith('123'):
+            codigo = val_0
+            desc = "SEM DESCRIÇÃO"
+            val = 0.0
+            cols = [c for c in row.iloc[1:] if pd.notna(c) and str(c).strip() != '']
+
+            if len(cols) >= 2:
+                desc = str(cols[0]).strip().upper()
+                val = limpar_valor(cols[1])
+            elif len(cols) == 1:
+                parsed_val = limpar_valor(cols[0])
+                if parsed_val != 0.0 or str(cols[0]).strip() in ['0', '0.0']:
+                    val = parsed_val
+                else:
+                    desc = str(cols[0]).strip().upper()
+
+            extracted_data.append({'Conta': codigo, 'Descricao': desc, 'Valor': val})
+    return pd.DataFrame(extracted_data)
+
+# ==========================================
+# CONFERÊNCIA
+# ==========================================
+def conferir(df_raw):
+    antigo = extract_excel_data_linha_a_linha(df_raw)
+    novo = extract_excel_data(df_raw)
+    if antigo.empty:
+        assert novo.empty
+        assert list(novo.columns) == ['Conta', 'Descricao', 'Valor']
+    else:
+        pd.testing.assert_frame_equal(novo, antigo, check_dtype=False)
+
+@pytest.mark.parametrize("seed", range(5))
+def test_abas_sinteticas(seed):
+    conferir(gerar_aba_ug(300, seed=seed))
+
+@pytest.mark.parametrize("df_raw", [
+    pd.DataFrame(),                                       # aba vazia
+    pd.DataFrame({0: ['123110101', 123110102.0]}),        # só a coluna da conta
+    pd.DataFrame({0: ['x'], 1: [1.0]}),                   # nenhuma conta 123
+    pd.DataFrame({0: ['123110101', '123110102', '123110103'], 1: ['0', 'bens móveis', '  '], 2: [None, None, '1.234,56']}),
+], ids=["vazia", "so_conta", "sem_123", "uma_celula"])
+def test_casos_de_borda(df_raw):
+    conferir(df_raw)